@@ -0,0 +1,148 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+# Compares the memory and allocations of exporting records directly with the
+# previous pipeline, which kept a plain object with a __dict__ per item and built a
+# second dict for the exporter.
+#
+# python benchmarks/bench_domain_records.py --count 200000
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from iconetl.mappers.receipt_mapper import IcxReceiptMapper  # noqa: E402
+from iconetl.mappers.transaction_mapper import IcxTransactionMapper  # noqa: E402
+
+RESOURCES_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "resources")
+BLOCK_FILE = os.path.join(
+    RESOURCES_DIR,
+    "test_export_blocks_job",
+    "version_04_block",
+    "web3_response.icx_getBlockByHeight_0xdcd995.json",
+)
+RECEIPT_FILE = os.path.join(
+    RESOURCES_DIR,
+    "test_export_receipts_job",
+    "receipts_with_logs",
+    "web3_response.icx_getTransactionResult_0x3680f3262fed98a4bc169c11b6ac66778da43c"
+    "889d47a673d252362138715da9.json",
+)
+
+
+class PlainObject(object):
+    pass
+
+
+def to_plain_object(record):
+    # What the domain classes were before they had slots
+    plain = PlainObject()
+    for key in record.__slots__:
+        setattr(plain, key, getattr(record, key))
+    return plain
+
+
+def to_dict(plain, item_type):
+    return dict(type=item_type, **vars(plain))
+
+
+def map_records(transaction_json, receipt_json, count):
+    transaction_mapper = IcxTransactionMapper()
+    receipt_mapper = IcxReceiptMapper()
+    items = []
+    for index in range(count):
+        items.append(
+            transaction_mapper.json_dict_to_transaction(
+                transaction_json, index, "0x00", 1, 1
+            )
+        )
+        receipt = receipt_mapper.json_dict_to_receipt(receipt_json)
+        items.append(receipt)
+        items.extend(receipt.logs)
+    return items
+
+
+def map_plain_objects_and_dicts(transaction_json, receipt_json, count):
+    records = map_records(transaction_json, receipt_json, count)
+    plain_objects = [to_plain_object(record) for record in records]
+    del records
+    return plain_objects, [
+        to_dict(plain, record_type(plain)) for plain in plain_objects
+    ]
+
+
+def record_type(plain):
+    if hasattr(plain, "from_address"):
+        return "transaction"
+    if hasattr(plain, "logs"):
+        return "receipt"
+    return "log"
+
+
+def measure(name, build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    print(
+        "{:<28} {:>8.1f} MB held {:>8.1f} MB peak {:>12,} memory blocks".format(
+            name, current / 1024 / 1024, peak / 1024 / 1024, blocks
+        )
+    )
+    del result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    with open(BLOCK_FILE) as f:
+        transaction_json = json.load(f)["result"]["confirmed_transaction_list"][0]
+    with open(RECEIPT_FILE) as f:
+        receipt_json = json.load(f)["result"]
+
+    print(
+        "{} transactions and receipts, {} logs each".format(
+            args.count, len(receipt_json.get("eventLogs", []))
+        )
+    )
+    measure(
+        "plain objects and dicts",
+        lambda: map_plain_objects_and_dicts(transaction_json, receipt_json, args.count),
+    )
+    measure(
+        "slotted records",
+        lambda: map_records(transaction_json, receipt_json, args.count),
+    )
+
+
+if __name__ == "__main__":
+    main()
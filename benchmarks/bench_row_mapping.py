@@ -0,0 +1,128 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+# Compares the time it takes to map block and receipt JSON and write it to CSV
+# files through domain records and straight through rows.
+#
+# python benchmarks/bench_row_mapping.py --count 20000
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from iconetl.jobs.exporters.blocks_and_transactions_item_exporter import (  # noqa: E402,E501
+    blocks_and_transactions_item_exporter,
+)
+from iconetl.jobs.exporters.receipts_and_logs_item_exporter import (  # noqa: E402
+    receipts_and_logs_item_exporter,
+)
+from iconetl.mappers.block_mapper import IcxBlockMapper  # noqa: E402
+from iconetl.mappers.receipt_mapper import IcxReceiptMapper  # noqa: E402
+from iconetl.mappers.row_mapper import IcxRowMapper  # noqa: E402
+
+RESOURCES_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "resources")
+BLOCK_FILE = os.path.join(
+    RESOURCES_DIR,
+    "test_export_blocks_job",
+    "version_04_block",
+    "web3_response.icx_getBlockByHeight_0xdcd995.json",
+)
+RECEIPT_FILE = os.path.join(
+    RESOURCES_DIR,
+    "test_export_receipts_job",
+    "receipts_with_logs",
+    "web3_response.icx_getTransactionResult_0x3680f3262fed98a4bc169c11b6ac66778da43c"
+    "889d47a673d252362138715da9.json",
+)
+
+
+def block_record_items(block_json):
+    block = IcxBlockMapper().json_dict_to_block(block_json)
+    return [block] + block.transactions
+
+
+def receipt_record_items(receipt_json):
+    receipt = IcxReceiptMapper().json_dict_to_receipt(receipt_json)
+    return [receipt] + receipt.logs
+
+
+def export(output_dir, block_json, receipt_json, count, map_block, map_receipt):
+    blocks_exporter = blocks_and_transactions_item_exporter(
+        os.path.join(output_dir, "blocks.csv"),
+        os.path.join(output_dir, "transactions.csv"),
+    )
+    receipts_exporter = receipts_and_logs_item_exporter(
+        os.path.join(output_dir, "receipts.csv"), os.path.join(output_dir, "logs.csv")
+    )
+    blocks_exporter.open()
+    receipts_exporter.open()
+    start_time = time.time()
+    for _ in range(count):
+        blocks_exporter.export_items(map_block(block_json))
+        receipts_exporter.export_items(map_receipt(receipt_json))
+    elapsed = time.time() - start_time
+    blocks_exporter.close()
+    receipts_exporter.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+
+    with open(BLOCK_FILE) as f:
+        block_json = json.load(f)["result"]
+    with open(RECEIPT_FILE) as f:
+        receipt_json = json.load(f)["result"]
+
+    row_mapper = IcxRowMapper()
+    output_dir = tempfile.mkdtemp()
+    try:
+        for name, map_block, map_receipt in [
+            ("records", block_record_items, receipt_record_items),
+            (
+                "rows",
+                row_mapper.json_dict_to_block_rows,
+                row_mapper.json_dict_to_receipt_rows,
+            ),
+        ]:
+            elapsed = export(
+                output_dir, block_json, receipt_json, args.count, map_block, map_receipt
+            )
+            print(
+                "{:<8} {:>8.2f} s {:>10,.0f} blocks and receipts per second".format(
+                    name, elapsed, args.count / elapsed
+                )
+            )
+    finally:
+        shutil.rmtree(output_dir)
+
+
+if __name__ == "__main__":
+    main()
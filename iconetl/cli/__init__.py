@@ -28,6 +28,7 @@ from iconetl.cli.export_receipts_and_logs import export_receipts_and_logs
 from iconetl.cli.extract_csv_column import extract_csv_column
 from iconetl.cli.get_block_range_for_date import get_block_range_for_date
 from iconetl.cli.get_block_range_for_timestamps import get_block_range_for_timestamps
+from iconetl.cli.stream import stream
 
 
 @click.group()
@@ -41,6 +42,8 @@ cli.add_command(export_all, "export_all")
 cli.add_command(export_receipts_and_logs, "export_receipts_and_logs")
 cli.add_command(export_blocks_and_transactions, "export_blocks_and_transactions")
 
+cli.add_command(stream, "stream")
+
 cli.add_command(get_block_range_for_date, "get_block_range_for_date")
 cli.add_command(get_block_range_for_timestamps, "get_block_range_for_timestamps")
 cli.add_command(extract_csv_column, "extract_csv_column")
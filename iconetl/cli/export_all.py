@@ -27,7 +27,15 @@ from blockchainetl_common.logging_utils import logging_basic_config
 from iconsdk.icon_service import IconService
 from iconsdk.providers.http_provider import HTTPProvider
 
-from iconetl.jobs.export_all_common import export_all_common
+from iconetl.enumeration.entity_type import EntityType
+from iconetl.jobs.export_all_common import (
+    DEFAULT_MAX_BATCH_SIZE,
+    DEFAULT_MIN_BATCH_SIZE,
+    export_all_common,
+)
+from iconetl.jobs.exporters.fields import parse_fields
+from iconetl.jobs.exporters.queued_item_exporter import DEFAULT_QUEUE_SIZE
+from iconetl.providers.auto import strip_async_prefix
 from iconetl.service.icx_service import IcxService
 
 logging_basic_config()
@@ -77,7 +85,10 @@ def get_partitions(start, end, partition_batch_size, provider_uri):
 
         day = timedelta(days=1)
 
-        svc = IconService(HTTPProvider(provider_uri))
+        # Block ranges of dates are looked up with synchronous requests to the
+        # first endpoint
+        first_provider_uri = provider_uri.split(",")[0].strip()
+        svc = IconService(HTTPProvider(strip_async_prefix(first_provider_uri)))
         icx_service = IcxService(svc)
 
         while start_date <= end_date:
@@ -113,6 +124,25 @@ def get_partitions(start, end, partition_batch_size, provider_uri):
         )
 
 
+def parse_fields_option(fields):
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise click.BadOptionUsage("--fields", str(e))
+
+
+def parse_entity_types(entity_types):
+    entity_types = [c.strip() for c in entity_types.split(",")]
+    for entity_type in entity_types:
+        if entity_type not in EntityType.ALL:
+            raise click.BadOptionUsage(
+                "--entity-types",
+                "{} is not an available entity type. Supply a comma separated list "
+                "of types from {}".format(entity_type, ",".join(EntityType.ALL)),
+            )
+    return entity_types
+
+
 @click.command(context_settings=dict(help_option_names=["-h", "--help"]))
 @click.option(
     "-s", "--start", required=True, type=str, help="Start block/ISO date/Unix time"
@@ -134,7 +164,9 @@ def get_partitions(start, end, partition_batch_size, provider_uri):
     default="https://ctz.solidwallet.io/api/v3",
     show_default=True,
     type=str,
-    help="The URI of the node endpoint",
+    help="The URI of the node endpoint. Separate several URIs with commas to "
+    "spread requests across nodes. Prefix it with async_, e.g. "
+    "async_https://ctz.solidwallet.io/api/v3, to export with the asyncio engine.",
 )
 @click.option(
     "-o",
@@ -150,7 +182,8 @@ def get_partitions(start, end, partition_batch_size, provider_uri):
     default=5,
     show_default=True,
     type=int,
-    help="The maximum number of workers.",
+    help="The maximum number of workers, shared by block and receipt requests. "
+    "With the asyncio engine this is the number of batch requests in flight.",
 )
 @click.option(
     "-B",
@@ -160,6 +193,143 @@ def get_partitions(start, end, partition_batch_size, provider_uri):
     type=int,
     help="The number of requests in JSON RPC batches.",
 )
+@click.option(
+    "--pool-size",
+    default=None,
+    type=int,
+    help="The maximum number of pooled keep-alive connections to the node. "
+    "Defaults to --max-workers.",
+)
+@click.option(
+    "--adaptive-batch-size",
+    is_flag=True,
+    help="Grow and shrink JSON RPC batches per request type based on response "
+    "latency, size and errors, starting from --export-batch-size.",
+)
+@click.option(
+    "--min-export-batch-size",
+    default=DEFAULT_MIN_BATCH_SIZE,
+    show_default=True,
+    type=int,
+    help="The smallest JSON RPC batch used with --adaptive-batch-size.",
+)
+@click.option(
+    "--max-export-batch-size",
+    default=DEFAULT_MAX_BATCH_SIZE,
+    show_default=True,
+    type=int,
+    help="The largest JSON RPC batch used with --adaptive-batch-size.",
+)
+@click.option(
+    "--stream-responses",
+    is_flag=True,
+    help="Parse JSON RPC responses incrementally to bound memory per worker. "
+    "Requires ijson.",
+)
+@click.option(
+    "--compression/--no-compression",
+    default=True,
+    show_default=True,
+    help="Ask the node for gzip, deflate or zstd compressed responses.",
+)
+@click.option(
+    "--compress-requests-over",
+    default=None,
+    type=int,
+    help="Gzip request bodies of at least this many bytes. The node must accept "
+    "compressed requests.",
+)
+@click.option(
+    "--cache-dir",
+    default=None,
+    type=str,
+    help="Directory of an on-disk cache of block and receipt responses. Cached "
+    "responses are not requested from the node again.",
+)
+@click.option(
+    "--cache-size",
+    default=10240,
+    show_default=True,
+    type=int,
+    help="The maximum size of the cache in MB. Least recently used responses are "
+    "evicted first.",
+)
+@click.option(
+    "--replay-only",
+    is_flag=True,
+    help="Export from --cache-dir only, without requesting anything from the node. "
+    "Requires start and end to be block numbers.",
+)
+@click.option(
+    "--keep-transaction-hashes",
+    is_flag=True,
+    help="Also write the hashes of exported transactions to files under "
+    "OUTPUT_DIR/.tmp, which helps debugging receipt exports.",
+)
+@click.option(
+    "--max-concurrent-partitions",
+    default=1,
+    show_default=True,
+    type=int,
+    help="The number of partitions to export at the same time. Partitions share "
+    "the --max-workers workers, so that the next partitions keep them busy while "
+    "the last batches of a partition finish.",
+)
+@click.option(
+    "--processes",
+    default=1,
+    show_default=True,
+    type=int,
+    help="The number of processes exporting partitions, each with its own "
+    "--max-workers workers and connections. Use more than one to decode and "
+    "write files on several CPU cores.",
+)
+@click.option(
+    "--resume/--no-resume",
+    default=True,
+    show_default=True,
+    help="Skip partitions recorded as exported in OUTPUT_DIR/.export_manifest.sqlite "
+    "with the same --entity-types and --fields, and continue unfinished partitions "
+    "from their last checkpoint.",
+)
+@click.option(
+    "--checkpoint-blocks",
+    default=None,
+    type=int,
+    help="Record progress within partitions every this many blocks, so that an "
+    "interrupted partition can be resumed from its last checkpoint. By default "
+    "only whole partitions are recorded.",
+)
+@click.option(
+    "--writer-queue-size",
+    default=DEFAULT_QUEUE_SIZE,
+    show_default=True,
+    type=int,
+    help="The number of batches of items queued for the writer thread of each "
+    "output. Use 0 to write files from the worker threads.",
+)
+@click.option(
+    "--map-to-rows",
+    is_flag=True,
+    help="Map JSON RPC responses straight to output rows instead of building "
+    "blocks, transactions, receipts and logs first. The files are the same.",
+)
+@click.option(
+    "--fields",
+    default=None,
+    type=str,
+    help="Comma separated item_type.field names of the only fields to map and "
+    'export, e.g. "block.number,block.hash,transaction.hash". '
+    "Item types without listed fields keep all their fields.",
+)
+@click.option(
+    "--entity-types",
+    default=",".join(EntityType.ALL),
+    show_default=True,
+    type=str,
+    help="The comma separated entity types to export. Receipts are only requested "
+    "from the node if receipts or logs are exported.",
+)
 def export_all(
     start,
     end,
@@ -168,12 +338,52 @@ def export_all(
     output_dir,
     max_workers,
     export_batch_size,
+    pool_size,
+    adaptive_batch_size,
+    min_export_batch_size,
+    max_export_batch_size,
+    stream_responses,
+    compression,
+    compress_requests_over,
+    cache_dir,
+    cache_size,
+    replay_only,
+    keep_transaction_hashes,
+    max_concurrent_partitions,
+    processes,
+    resume,
+    checkpoint_blocks,
+    writer_queue_size,
+    map_to_rows,
+    fields,
+    entity_types,
 ):
     """Exports all data for a range of blocks."""
+    fields = parse_fields_option(fields)
+    entity_types = parse_entity_types(entity_types)
     export_all_common(
         get_partitions(start, end, partition_batch_size, provider_uri),
         output_dir,
         provider_uri,
         max_workers,
         export_batch_size,
+        pool_size=pool_size,
+        adaptive_batch_size=adaptive_batch_size,
+        min_batch_size=min_export_batch_size,
+        max_batch_size=max_export_batch_size,
+        stream_responses=stream_responses,
+        compression=compression,
+        compress_requests_over=compress_requests_over,
+        cache_dir=cache_dir,
+        cache_size_bytes=cache_size * 1024 * 1024,
+        replay_only=replay_only,
+        keep_transaction_hashes=keep_transaction_hashes,
+        max_concurrent_partitions=max_concurrent_partitions,
+        processes=processes,
+        resume=resume,
+        checkpoint_blocks=checkpoint_blocks,
+        writer_queue_size=writer_queue_size,
+        map_to_rows=map_to_rows,
+        fields=fields,
+        entity_types=entity_types,
     )
@@ -23,6 +23,7 @@
 import click
 from blockchainetl_common.logging_utils import logging_basic_config
 from blockchainetl_common.thread_local_proxy import ThreadLocalProxy
+from iconetl.cli.export_all import parse_fields_option
 from iconetl.jobs.export_blocks_job import ExportBlocksJob
 from iconetl.jobs.exporters.blocks_and_transactions_item_exporter import \
     blocks_and_transactions_item_exporter
@@ -77,6 +78,14 @@ logging_basic_config()
     help="The output file for transactions. "
     'If not provided transactions will not be exported. Use "-" for stdout',
 )
+@click.option(
+    "--fields",
+    default=None,
+    type=str,
+    help="Comma separated item_type.field names of the only fields to map and "
+    'export, e.g. "block.number,block.hash,transaction.hash". '
+    "Item types without listed fields keep all their fields.",
+)
 def export_blocks_and_transactions(
     start_block,
     end_block,
@@ -85,6 +94,7 @@ def export_blocks_and_transactions(
     max_workers,
     blocks_output,
     transactions_output,
+    fields,
 ):
     """Exports blocks and transactions."""
     if blocks_output is None and transactions_output is None:
@@ -92,6 +102,7 @@ def export_blocks_and_transactions(
             "Either --blocks-output or --transactions-output options must be provided"
         )
 
+    fields = parse_fields_option(fields)
     job = ExportBlocksJob(
         start_block=start_block,
         end_block=end_block,
@@ -101,9 +112,10 @@ def export_blocks_and_transactions(
         ),
         max_workers=max_workers,
         item_exporter=blocks_and_transactions_item_exporter(
-            blocks_output, transactions_output
+            blocks_output, transactions_output, fields=fields
         ),
         export_blocks=blocks_output is not None,
         export_transactions=transactions_output is not None,
+        fields=fields,
     )
     job.run()
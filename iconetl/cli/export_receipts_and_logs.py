@@ -24,6 +24,7 @@ import click
 from blockchainetl_common.file_utils import smart_open
 from blockchainetl_common.logging_utils import logging_basic_config
 from blockchainetl_common.thread_local_proxy import ThreadLocalProxy
+from iconetl.cli.export_all import parse_fields_option
 from iconetl.jobs.export_receipts_job import ExportReceiptsJob
 from iconetl.jobs.exporters.receipts_and_logs_item_exporter import \
     receipts_and_logs_item_exporter
@@ -79,6 +80,14 @@ logging_basic_config()
     help="The output file for receipt logs. "
     'aIf not provided receipt logs will not be exported. Use "-" for stdout',
 )
+@click.option(
+    "--fields",
+    default=None,
+    type=str,
+    help="Comma separated item_type.field names of the only fields to map and "
+    'export, e.g. "receipt.transaction_hash,receipt.status". '
+    "Item types without listed fields keep all their fields.",
+)
 def export_receipts_and_logs(
     batch_size,
     transaction_hashes,
@@ -86,8 +95,10 @@ def export_receipts_and_logs(
     max_workers,
     receipts_output,
     logs_output,
+    fields,
 ):
     """Exports receipts and logs."""
+    fields = parse_fields_option(fields)
     with smart_open(transaction_hashes, "r") as transaction_hashes_file:
         job = ExportReceiptsJob(
             transaction_hashes_iterable=(
@@ -98,9 +109,12 @@ def export_receipts_and_logs(
                 lambda: get_provider_from_uri(provider_uri, batch=True)
             ),
             max_workers=max_workers,
-            item_exporter=receipts_and_logs_item_exporter(receipts_output, logs_output),
+            item_exporter=receipts_and_logs_item_exporter(
+                receipts_output, logs_output, fields=fields
+            ),
             export_receipts=receipts_output is not None,
             export_logs=logs_output is not None,
+            fields=fields,
         )
 
         job.run()
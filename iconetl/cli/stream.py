@@ -0,0 +1,255 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import click
+from blockchainetl_common.streaming.streaming_utils import (
+    configure_logging,
+    configure_signals,
+)
+
+from iconetl.metrics import Metrics
+from iconetl.providers.auto import get_provider_from_uri, is_async_provider_uri
+from iconetl.providers.session import create_session
+from iconetl.streaming.icx_streamer import (
+    CATCH_UP_MODE,
+    TAIL_MODE,
+    IcxStreamer,
+    SyncMode,
+)
+from iconetl.streaming.icx_streamer_adapter import (
+    DEFAULT_REORG_BUFFER_SIZE,
+    IcxStreamerAdapter,
+)
+from iconetl.streaming.item_exporter_creator import create_item_exporter
+
+
+@click.command(context_settings=dict(help_option_names=["-h", "--help"]))
+@click.option(
+    "-l",
+    "--last-synced-block-file",
+    default="last_synced_block.txt",
+    show_default=True,
+    type=str,
+    help="The file with the last synced block number.",
+)
+@click.option(
+    "--lag",
+    default=0,
+    show_default=True,
+    type=int,
+    help="The number of blocks to lag behind the network.",
+)
+@click.option(
+    "-p",
+    "--provider-uri",
+    default="https://ctz.solidwallet.io/api/v3",
+    show_default=True,
+    type=str,
+    help="The URI of the node endpoint. Separate several URIs with commas to "
+    "spread requests across nodes.",
+)
+@click.option(
+    "-o",
+    "--output",
+    default=None,
+    type=str,
+    help="Directory to write CSV files for each range of synced blocks to. "
+    "If not specified, items are printed to the console as JSON lines.",
+)
+@click.option(
+    "-s",
+    "--start-block",
+    default=None,
+    type=int,
+    help="Start block. Requires the last synced block file not to exist.",
+)
+@click.option(
+    "-e",
+    "--end-block",
+    default=None,
+    type=int,
+    help="Stop after this block.",
+)
+@click.option(
+    "--period-seconds",
+    default=10,
+    show_default=True,
+    type=int,
+    help="How many seconds to sleep between syncs.",
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    default=100,
+    show_default=True,
+    type=int,
+    help="The number of requests in JSON RPC batches.",
+)
+@click.option(
+    "-B",
+    "--block-batch-size",
+    default=10,
+    show_default=True,
+    type=int,
+    help="The number of blocks to sync at a time.",
+)
+@click.option(
+    "-w",
+    "--max-workers",
+    default=5,
+    show_default=True,
+    type=int,
+    help="The maximum number of workers.",
+)
+@click.option(
+    "--catch-up-threshold",
+    default=1000,
+    show_default=True,
+    type=int,
+    help="Sync like a backfill, with --catch-up-block-batch-size and "
+    "--catch-up-max-workers, while more than this many blocks behind the chain "
+    "head. Use 0 to always sync with --block-batch-size and --max-workers.",
+)
+@click.option(
+    "--catch-up-block-batch-size",
+    default=1000,
+    show_default=True,
+    type=int,
+    help="The number of blocks to sync at a time while catching up.",
+)
+@click.option(
+    "--catch-up-max-workers",
+    default=20,
+    show_default=True,
+    type=int,
+    help="The maximum number of workers while catching up.",
+)
+@click.option(
+    "--confirmations",
+    default=0,
+    show_default=True,
+    type=int,
+    help="Only export blocks once this many blocks were built on them. With 0, "
+    "blocks are exported as soon as they are produced and exported again if they "
+    "are replaced by a reorg.",
+)
+@click.option(
+    "--reorg-buffer-size",
+    default=DEFAULT_REORG_BUFFER_SIZE,
+    show_default=True,
+    type=int,
+    help="The number of recently exported block hashes kept to detect reorgs.",
+)
+@click.option(
+    "--websocket-uri",
+    default=None,
+    type=str,
+    help="The URI of the block notification websocket of the node, e.g. "
+    "wss://ctz.solidwallet.io/api/v3/icon_dex/block. New blocks are synced as "
+    "soon as they are notified, falling back to polling when the websocket is down. "
+    "Requires the websocket extra.",
+)
+@click.option(
+    "--log-file",
+    default=None,
+    type=str,
+    help="Log file.",
+)
+@click.option(
+    "--pid-file",
+    default=None,
+    type=str,
+    help="pid file.",
+)
+def stream(
+    last_synced_block_file,
+    lag,
+    provider_uri,
+    output,
+    start_block,
+    end_block,
+    period_seconds,
+    batch_size,
+    block_batch_size,
+    max_workers,
+    catch_up_threshold,
+    catch_up_block_batch_size,
+    catch_up_max_workers,
+    confirmations,
+    reorg_buffer_size,
+    websocket_uri,
+    log_file,
+    pid_file,
+):
+    """Streams blocks, transactions, receipts and logs as the chain grows."""
+    configure_logging(log_file)
+    configure_signals()
+    if is_async_provider_uri(provider_uri):
+        raise ValueError("Streaming is not supported by the asyncio engine")
+
+    tail_mode = SyncMode(TAIL_MODE, block_batch_size, batch_size, max_workers)
+    catch_up_mode = None
+    if catch_up_threshold > 0:
+        catch_up_mode = SyncMode(
+            CATCH_UP_MODE, catch_up_block_batch_size, batch_size, catch_up_max_workers
+        )
+
+    metrics = Metrics()
+    session = create_session(
+        pool_size=max(max_workers, catch_up_max_workers), metrics=metrics
+    )
+    block_notifications = None
+    if websocket_uri is not None:
+        # websockets is an optional dependency
+        from iconetl.streaming.block_notifications import BlockNotificationListener
+
+        block_notifications = BlockNotificationListener(websocket_uri, metrics=metrics)
+    try:
+        streamer_adapter = IcxStreamerAdapter(
+            batch_web3_provider=get_provider_from_uri(
+                provider_uri, batch=True, session=session, metrics=metrics
+            ),
+            item_exporter=create_item_exporter(output),
+            batch_size=batch_size,
+            max_workers=max_workers,
+            confirmations=confirmations,
+            reorg_buffer_size=reorg_buffer_size,
+            metrics=metrics,
+        )
+        streamer = IcxStreamer(
+            blockchain_streamer_adapter=streamer_adapter,
+            tail_mode=tail_mode,
+            catch_up_mode=catch_up_mode,
+            catch_up_threshold=catch_up_threshold,
+            confirmations=confirmations,
+            block_notifications=block_notifications,
+            metrics=metrics,
+            last_synced_block_file=last_synced_block_file,
+            lag=lag,
+            start_block=start_block,
+            end_block=end_block,
+            period_seconds=period_seconds,
+            pid_file=pid_file,
+        )
+        streamer.stream()
+    finally:
+        session.close()
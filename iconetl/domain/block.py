@@ -20,7 +20,24 @@
 #  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 
-class IcxBlock(object):
+from iconetl.domain.record import Record
+
+
+class IcxBlock(Record):
+    item_type = "block"
+    __slots__ = (
+        "number",
+        "hash",
+        "parent_hash",
+        "merkle_root_hash",
+        "timestamp",
+        "version",
+        "transactions",
+        "peer_id",
+        "signature",
+        "next_leader",
+    )
+
     def __init__(self):
         self.number = None
         self.hash = None
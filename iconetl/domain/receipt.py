@@ -20,7 +20,24 @@
 #  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 
-class IcxReceipt(object):
+from iconetl.domain.record import Record
+
+
+class IcxReceipt(Record):
+    item_type = "receipt"
+    __slots__ = (
+        "transaction_hash",
+        "transaction_index",
+        "block_hash",
+        "block_number",
+        "cumulative_step_used",
+        "step_used",
+        "step_price",
+        "score_address",
+        "logs",
+        "status",
+    )
+
     def __init__(self):
         self.transaction_hash = None
         self.transaction_index = None
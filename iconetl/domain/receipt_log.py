@@ -20,7 +20,22 @@
 #  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 
-class IcxReceiptLog(object):
+from iconetl.domain.record import Record
+
+
+class IcxReceiptLog(Record):
+    item_type = "log"
+    __slots__ = (
+        "log_index",
+        "transaction_hash",
+        "transaction_index",
+        "block_hash",
+        "block_number",
+        "address",
+        "data",
+        "indexed",
+    )
+
     def __init__(self):
         self.log_index = None
         self.transaction_hash = None
@@ -0,0 +1,74 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+from collections import OrderedDict
+
+
+# Base of the domain records. Attributes are kept in __slots__ instead of a
+# per-instance __dict__, and records can be read like the item dicts exporters
+# take, e.g. record["hash"], record.get("type") or "hash" in record, so they can
+# be exported without building a dict first. The keys are "type" followed by
+# the slots. fields maps each key to serialization options, as exporters expect
+# of items which are not dicts.
+class Record(object):
+    __slots__ = ()
+    item_type = None
+    fields = OrderedDict()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.fields = OrderedDict((key, {}) for key in ("type",) + cls.__slots__)
+
+    def __getitem__(self, key):
+        if key == "type":
+            return self.item_type
+        if key in self.fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key == "type":
+            return self.item_type
+        if key in self.fields:
+            return getattr(self, key)
+        return default
+
+    def __contains__(self, key):
+        return key in self.fields
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def keys(self):
+        return self.fields.keys()
+
+    def items(self):
+        return [(key, self[key]) for key in self.fields]
+
+    def __repr__(self):
+        return "{}({})".format(
+            type(self).__name__,
+            ", ".join("{}={!r}".format(key, value) for key, value in self.items()),
+        )
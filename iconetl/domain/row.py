@@ -0,0 +1,78 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+from collections import OrderedDict
+
+
+# Values of an item in the order of the columns it is exported with, built
+# straight from RPC results without domain records. Subclasses set item_type and
+# field_names. Exporters writing the same columns take the values as they are,
+# other exporters read rows like the item dicts they take, e.g. row["hash"].
+class Row(object):
+    __slots__ = ("values",)
+    item_type = None
+    field_names = ()
+    fields = OrderedDict()
+    _indexes = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.field_names = tuple(cls.field_names)
+        cls.fields = OrderedDict((key, {}) for key in ("type",) + cls.field_names)
+        cls._indexes = {name: index for index, name in enumerate(cls.field_names)}
+
+    def __init__(self, values):
+        self.values = values
+
+    def __getitem__(self, key):
+        if key == "type":
+            return self.item_type
+        return self.values[self._indexes[key]]
+
+    def get(self, key, default=None):
+        if key == "type":
+            return self.item_type
+        index = self._indexes.get(key)
+        if index is None:
+            return default
+        return self.values[index]
+
+    def __contains__(self, key):
+        return key in self.fields
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def keys(self):
+        return self.fields.keys()
+
+    def items(self):
+        return [(key, self[key]) for key in self.fields]
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.values == other.values
+
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, self.values)
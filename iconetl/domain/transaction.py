@@ -20,7 +20,31 @@
 #  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 
-class IcxTransaction(object):
+from iconetl.domain.record import Record
+
+
+class IcxTransaction(Record):
+    item_type = "transaction"
+    __slots__ = (
+        "version",
+        "from_address",
+        "to_address",
+        "value",
+        "step_limit",
+        "timestamp",
+        "block_timestamp",
+        "nid",
+        "nonce",
+        "hash",
+        "transaction_index",
+        "block_hash",
+        "block_number",
+        "fee",
+        "signature",
+        "data_type",
+        "data",
+    )
+
     def __init__(self):
         self.version = None
         self.from_address = None
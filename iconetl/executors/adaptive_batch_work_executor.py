@@ -0,0 +1,157 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import math
+import threading
+import time
+
+from blockchainetl_common.executors.batch_work_executor import (
+    BatchWorkExecutor,
+    execute_with_retries,
+)
+
+DEFAULT_TARGET_LATENCY_SECONDS = 5
+DEFAULT_MAX_RESPONSE_BYTES = 16 * 1024 * 1024
+MAX_GROWTH_FACTOR = 2
+
+
+# Executes the given work in batches, resizing batches between min_batch_size and
+# max_batch_size so that a batch takes about target_latency_seconds and its
+# response stays under max_response_bytes. The work handler may return the size
+# of the response in bytes. Batch sizes are halved in case of errors.
+class AdaptiveBatchWorkExecutor(BatchWorkExecutor):
+    def __init__(
+        self,
+        starting_batch_size,
+        max_workers,
+        min_batch_size,
+        max_batch_size,
+        target_latency_seconds=DEFAULT_TARGET_LATENCY_SECONDS,
+        max_response_bytes=DEFAULT_MAX_RESPONSE_BYTES,
+        name="work",
+        **kwargs
+    ):
+        if not 1 <= min_batch_size <= max_batch_size:
+            raise ValueError("min_batch_size must be between 1 and max_batch_size")
+        super().__init__(
+            min(max(starting_batch_size, min_batch_size), max_batch_size),
+            max_workers,
+            **kwargs
+        )
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.target_latency_seconds = target_latency_seconds
+        self.max_response_bytes = max_response_bytes
+        self.name = name
+
+        self._stats_lock = threading.Lock()
+        self._batch_count = 0
+        self._total_batch_size = 0
+        self._smallest_batch_size = None
+        self._largest_batch_size = None
+
+    def _fail_safe_execute(self, work_handler, batch):
+        self._track_batch_size(len(batch))
+        start_time = time.time()
+        try:
+            response_size = work_handler(batch)
+            self._adjust_batch_size(len(batch), time.time() - start_time, response_size)
+        except self.retry_exceptions:
+            self.logger.exception("An exception occurred while executing work_handler.")
+            self._try_decrease_batch_size(len(batch))
+            self.logger.info(
+                "The batch of size {} will be retried one item at a time.".format(
+                    len(batch)
+                )
+            )
+            for item in batch:
+                execute_with_retries(
+                    work_handler,
+                    [item],
+                    max_retries=self.max_retries,
+                    retry_exceptions=self.retry_exceptions,
+                )
+
+        self.progress_logger.track(len(batch))
+
+    def report_batch_error(self, batch_size):
+        """Reduces the batch size for errors the work handler recovered from."""
+        self._try_decrease_batch_size(batch_size)
+
+    # Some acceptable race conditions are possible
+    def _adjust_batch_size(self, current_batch_size, latency, response_size):
+        batch_size = self.batch_size
+        limits = [batch_size * MAX_GROWTH_FACTOR, self.max_batch_size]
+        if latency > 0:
+            limits.append(current_batch_size * self.target_latency_seconds / latency)
+        if response_size:
+            limits.append(current_batch_size * self.max_response_bytes / response_size)
+        # Move half way to the target to smooth out noisy measurements
+        step = (min(limits) - batch_size) / 2
+        new_batch_size = batch_size + int(
+            math.ceil(step) if step > 0 else math.floor(step)
+        )
+        new_batch_size = min(
+            max(new_batch_size, self.min_batch_size), self.max_batch_size
+        )
+        if new_batch_size != batch_size:
+            self.logger.debug(
+                "Changing {} batch size to {}.".format(self.name, new_batch_size)
+            )
+            self.batch_size = new_batch_size
+
+    def _try_decrease_batch_size(self, current_batch_size):
+        batch_size = self.batch_size
+        if current_batch_size >= batch_size > self.min_batch_size:
+            new_batch_size = max(int(batch_size / 2), self.min_batch_size)
+            self.logger.info(
+                "Reducing {} batch size to {}.".format(self.name, new_batch_size)
+            )
+            self.batch_size = new_batch_size
+
+    def _track_batch_size(self, batch_size):
+        with self._stats_lock:
+            self._batch_count += 1
+            self._total_batch_size += batch_size
+            if (
+                self._smallest_batch_size is None
+                or batch_size < self._smallest_batch_size
+            ):
+                self._smallest_batch_size = batch_size
+            if (
+                self._largest_batch_size is None
+                or batch_size > self._largest_batch_size
+            ):
+                self._largest_batch_size = batch_size
+
+    def shutdown(self):
+        super().shutdown()
+        if self._batch_count > 0:
+            self.logger.info(
+                "Batch sizes for {}: min {}, max {}, average {}, next {}.".format(
+                    self.name,
+                    self._smallest_batch_size,
+                    self._largest_batch_size,
+                    round(self._total_batch_size / self._batch_count, 1),
+                    self.batch_size,
+                )
+            )
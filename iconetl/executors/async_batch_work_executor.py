@@ -0,0 +1,136 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import asyncio
+import logging
+
+from blockchainetl_common.executors.batch_work_executor import RETRY_EXCEPTIONS
+from blockchainetl_common.progress_logger import ProgressLogger
+from blockchainetl_common.utils import dynamic_batch_iterator
+
+ASYNC_RETRY_EXCEPTIONS = RETRY_EXCEPTIONS + (asyncio.TimeoutError,)
+
+
+# Executes the given coroutine work in batches from a single thread, keeping up to
+# max_concurrency batches in flight. Mirrors BatchWorkExecutor retry semantics.
+class AsyncBatchWorkExecutor:
+    def __init__(
+        self,
+        starting_batch_size,
+        max_concurrency,
+        retry_exceptions=ASYNC_RETRY_EXCEPTIONS,
+        max_retries=5,
+        loop=None,
+    ):
+        self.batch_size = starting_batch_size
+        self.max_concurrency = max_concurrency
+        self.retry_exceptions = retry_exceptions
+        self.max_retries = max_retries
+        # A loop owned by the caller can outlive the executor, e.g. to keep
+        # the provider's connections open across jobs.
+        self.loop = loop if loop is not None else asyncio.new_event_loop()
+        self._owns_loop = loop is None
+        self.progress_logger = ProgressLogger()
+        self.logger = logging.getLogger("AsyncBatchWorkExecutor")
+
+    def execute(self, work_iterable, work_handler, total_items=None):
+        self.progress_logger.start(total_items=total_items)
+        self.loop.run_until_complete(self._execute(work_iterable, work_handler))
+
+    async def _execute(self, work_iterable, work_handler):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = []
+        try:
+            for batch in dynamic_batch_iterator(work_iterable, lambda: self.batch_size):
+                await semaphore.acquire()
+                # Fail fast like FailSafeExecutor does for threads
+                _raise_first_exception(tasks)
+                task = asyncio.ensure_future(
+                    self._fail_safe_execute(work_handler, batch)
+                )
+                task.add_done_callback(lambda _: semaphore.release())
+                tasks.append(task)
+                tasks = [task for task in tasks if not _is_successful(task)]
+            await asyncio.gather(*tasks)
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _fail_safe_execute(self, work_handler, batch):
+        try:
+            await work_handler(batch)
+        except self.retry_exceptions:
+            self.logger.exception("An exception occurred while executing work_handler.")
+            self.logger.info(
+                "The batch of size {} will be retried one item at a time.".format(
+                    len(batch)
+                )
+            )
+            for item in batch:
+                await execute_with_retries(
+                    work_handler,
+                    [item],
+                    max_retries=self.max_retries,
+                    retry_exceptions=self.retry_exceptions,
+                )
+
+        self.progress_logger.track(len(batch))
+
+    def shutdown(self):
+        if self._owns_loop:
+            self.loop.close()
+        self.progress_logger.finish()
+
+
+async def execute_with_retries(
+    func, *args, max_retries=5, retry_exceptions=ASYNC_RETRY_EXCEPTIONS, sleep_seconds=1
+):
+    for i in range(max_retries):
+        try:
+            return await func(*args)
+        except retry_exceptions:
+            logging.exception(
+                "An exception occurred while executing execute_with_retries. "
+                "Retry #{}".format(i)
+            )
+            if i < max_retries - 1:
+                logging.info(
+                    "The request will be retried after {} seconds. Retry #{}".format(
+                        sleep_seconds, i
+                    )
+                )
+                await asyncio.sleep(sleep_seconds)
+                continue
+            else:
+                raise
+
+
+def _is_successful(task):
+    return task.done() and not task.cancelled() and task.exception() is None
+
+
+def _raise_first_exception(tasks):
+    for task in tasks:
+        if task.done() and not task.cancelled() and task.exception() is not None:
+            raise task.exception()
@@ -0,0 +1,105 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import concurrent.futures
+import threading
+
+# How often waiting submitters re-check conditions which change outside the pool
+RECHECK_SECONDS = 0.1
+
+
+# A pool of max_workers threads shared by several batch work executors, so that
+# their work together stays within one worker budget. Work from executors with a
+# higher priority is started first. An executor may also pass a can_submit
+# function to hold back its work, e.g. while the stage it feeds is behind.
+class SharedWorkerPool(object):
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._delegate = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self._condition = threading.Condition()
+        self._available = max_workers
+        self._waiting_priorities = []
+
+    def executor(self, priority=0, can_submit=None):
+        return SharedWorkerPoolExecutor(self, priority, can_submit)
+
+    def shutdown(self, wait=True):
+        self._delegate.shutdown(wait)
+
+    def _submit(self, priority, can_submit, fn, *args, **kwargs):
+        self._acquire(priority, can_submit)
+        try:
+            future = self._delegate.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _acquire(self, priority, can_submit):
+        with self._condition:
+            self._waiting_priorities.append(priority)
+            try:
+                while not (
+                    self._available > 0
+                    and priority >= max(self._waiting_priorities)
+                    and (can_submit is None or can_submit())
+                ):
+                    self._condition.wait(RECHECK_SECONDS)
+            finally:
+                self._waiting_priorities.remove(priority)
+            self._available -= 1
+            # Submitters with a lower priority may be next
+            self._condition.notify_all()
+
+    def _release(self):
+        with self._condition:
+            self._available += 1
+            self._condition.notify_all()
+
+
+# Submits work to a SharedWorkerPool. Shutting it down waits for its own work only,
+# so it can be wrapped in a FailSafeExecutor in place of a BoundedExecutor.
+class SharedWorkerPoolExecutor(object):
+    def __init__(self, pool, priority, can_submit):
+        self.pool = pool
+        self.priority = priority
+        self.can_submit = can_submit
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        future = self.pool._submit(self.priority, self.can_submit, fn, *args, **kwargs)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def shutdown(self, wait=True):
+        if wait:
+            with self._lock:
+                futures = list(self._futures)
+            concurrent.futures.wait(futures)
+
+    def _discard(self, future):
+        with self._lock:
+            self._futures.discard(future)
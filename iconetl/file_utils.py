@@ -0,0 +1,60 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+import shutil
+from contextlib import contextmanager
+
+
+def concatenate_csv_files(input_file_names, output_file_name):
+    """Concatenates CSV files, keeping the header of the first non-empty file only."""
+    with open(output_file_name, "wb") as output_file:
+        header = None
+        for input_file_name in input_file_names:
+            with open(input_file_name, "rb") as input_file:
+                first_line = input_file.readline()
+                if not header:
+                    header = first_line
+                    output_file.write(first_line)
+                shutil.copyfileobj(input_file, output_file)
+
+
+@contextmanager
+def atomic_output_files(*file_names):
+    """Yields temporary names to write the given files to. The temporary files are
+    renamed to the given names if no exception is raised, and removed otherwise."""
+    temporary_file_names = [
+        os.path.join(
+            os.path.dirname(file_name),
+            ".{}.tmp".format(os.path.basename(file_name)),
+        )
+        for file_name in file_names
+    ]
+    try:
+        yield temporary_file_names
+    except BaseException:
+        for temporary_file_name in temporary_file_names:
+            if os.path.exists(temporary_file_name):
+                os.remove(temporary_file_name)
+        raise
+    for temporary_file_name, file_name in zip(temporary_file_names, file_names):
+        os.replace(temporary_file_name, file_name)
@@ -0,0 +1,79 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+from iconetl.executors.async_batch_work_executor import AsyncBatchWorkExecutor
+from iconetl.jobs.export_blocks_job import ExportBlocksJob
+from iconetl.json_rpc_requests import generate_get_block_by_number_json_rpc
+from iconetl.providers.salvaging import AsyncSalvagingBatchRequester
+
+
+# Exports blocks and transactions with an asyncio batch provider. max_workers is
+# the number of batch requests kept in flight from a single thread.
+class AsyncExportBlocksJob(ExportBlocksJob):
+    def __init__(
+        self,
+        start_block,
+        end_block,
+        batch_size,
+        batch_web3_provider,
+        max_workers,
+        item_exporter,
+        export_blocks=True,
+        export_transactions=True,
+        batch_work_executor=None,
+        metrics=None,
+        map_to_rows=False,
+        fields=None,
+        loop=None,
+    ):
+        if batch_work_executor is None:
+            batch_work_executor = AsyncBatchWorkExecutor(
+                batch_size, max_workers, loop=loop
+            )
+        super().__init__(
+            start_block=start_block,
+            end_block=end_block,
+            batch_size=batch_size,
+            batch_web3_provider=batch_web3_provider,
+            max_workers=max_workers,
+            item_exporter=item_exporter,
+            export_blocks=export_blocks,
+            export_transactions=export_transactions,
+            batch_work_executor=batch_work_executor,
+            metrics=metrics,
+            map_to_rows=map_to_rows,
+            fields=fields,
+        )
+
+    async def _export_batch(self, block_number_batch):
+        blocks_rpc = list(generate_get_block_by_number_json_rpc(block_number_batch))
+        items = []
+        for block in await self.batch_requester.request(blocks_rpc):
+            items.extend(self._block_to_items(block))
+        self.item_exporter.export_items(items)
+
+    def _new_batch_requester(self, metrics):
+        return AsyncSalvagingBatchRequester(
+            self.batch_web3_provider,
+            metrics=metrics,
+            result_mapper=self._get_result_mapper(),
+        )
@@ -0,0 +1,77 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+from iconetl.executors.async_batch_work_executor import AsyncBatchWorkExecutor
+from iconetl.jobs.export_receipts_job import ExportReceiptsJob
+from iconetl.json_rpc_requests import generate_get_receipt_json_rpc
+from iconetl.providers.salvaging import AsyncSalvagingBatchRequester
+
+
+# Exports receipts and logs with an asyncio batch provider. max_workers is
+# the number of batch requests kept in flight from a single thread.
+class AsyncExportReceiptsJob(ExportReceiptsJob):
+    def __init__(
+        self,
+        transaction_hashes_iterable,
+        batch_size,
+        batch_web3_provider,
+        max_workers,
+        item_exporter,
+        export_receipts=True,
+        export_logs=True,
+        batch_work_executor=None,
+        metrics=None,
+        map_to_rows=False,
+        fields=None,
+        loop=None,
+    ):
+        if batch_work_executor is None:
+            batch_work_executor = AsyncBatchWorkExecutor(
+                batch_size, max_workers, loop=loop
+            )
+        super().__init__(
+            transaction_hashes_iterable=transaction_hashes_iterable,
+            batch_size=batch_size,
+            batch_web3_provider=batch_web3_provider,
+            max_workers=max_workers,
+            item_exporter=item_exporter,
+            export_receipts=export_receipts,
+            export_logs=export_logs,
+            batch_work_executor=batch_work_executor,
+            metrics=metrics,
+            map_to_rows=map_to_rows,
+            fields=fields,
+        )
+
+    async def _export_receipts(self, transaction_hashes):
+        receipts_rpc = list(generate_get_receipt_json_rpc(transaction_hashes))
+        items = []
+        for receipt in await self.batch_requester.request(receipts_rpc):
+            items.extend(self._receipt_to_items(receipt))
+        self.item_exporter.export_items(items)
+
+    def _new_batch_requester(self, metrics):
+        return AsyncSalvagingBatchRequester(
+            self.batch_web3_provider,
+            metrics=metrics,
+            result_mapper=self._get_result_mapper(),
+        )
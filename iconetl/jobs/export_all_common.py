@@ -19,162 +19,779 @@
 #  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
 #  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-import csv
+import asyncio
 import logging
+import multiprocessing
+import multiprocessing.util
 import os
-import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
 from time import time
 
-from blockchainetl_common.file_utils import smart_open
-from blockchainetl_common.thread_local_proxy import ThreadLocalProxy
+from blockchainetl_common.executors.batch_work_executor import BatchWorkExecutor
+from blockchainetl_common.executors.bounded_executor import BoundedExecutor
+from blockchainetl_common.executors.fail_safe_executor import FailSafeExecutor
 
-from iconetl.csv_utils import set_max_field_size_limit
+from iconetl.enumeration.entity_type import EntityType
+from iconetl.executors.adaptive_batch_work_executor import AdaptiveBatchWorkExecutor
+from iconetl.executors.shared_worker_pool import SharedWorkerPool
+from iconetl.file_utils import atomic_output_files, concatenate_csv_files
+from iconetl.jobs.async_export_blocks_job import AsyncExportBlocksJob
+from iconetl.jobs.async_export_receipts_job import AsyncExportReceiptsJob
 from iconetl.jobs.export_blocks_job import ExportBlocksJob
+from iconetl.jobs.export_manifest import ExportManifest, get_selection
 from iconetl.jobs.export_receipts_job import ExportReceiptsJob
 from iconetl.jobs.exporters.blocks_and_transactions_item_exporter import (
     blocks_and_transactions_item_exporter,
 )
+from iconetl.jobs.exporters.fields import with_required_fields
+from iconetl.jobs.exporters.queued_item_exporter import (
+    DEFAULT_QUEUE_SIZE,
+    QueuedItemExporter,
+    get_writer_stats,
+)
 from iconetl.jobs.exporters.receipts_and_logs_item_exporter import (
     receipts_and_logs_item_exporter,
 )
-from iconetl.providers.auto import get_provider_from_uri
+from iconetl.jobs.exporters.transaction_hash_item_exporter import (
+    TransactionHashItemExporter,
+)
+from iconetl.metrics import Metrics
+from iconetl.misc.closable_queue import ClosableQueue
+from iconetl.providers.auto import get_provider_from_uri, is_async_provider_uri
+from iconetl.providers.caching import CachingBatchProvider, get_cache_stats
+from iconetl.providers.compression import get_compression_stats
+from iconetl.providers.response_cache import (
+    DEFAULT_MAX_SIZE_BYTES,
+    SegmentedResponseCache,
+)
+from iconetl.providers.salvaging import get_salvage_stats
+from iconetl.providers.session import create_session, get_connection_stats
 
 logger = logging.getLogger("export_all")
 
+DEFAULT_MIN_BATCH_SIZE = 1
+DEFAULT_MAX_BATCH_SIZE = 500
+# Transaction hashes the blocks job may get ahead of the receipts job
+TRANSACTION_HASH_QUEUE_SIZE = 10000
+# Receipt batches are started before block batches sharing the same workers
+BLOCKS_PRIORITY = 0
+RECEIPTS_PRIORITY = 1
+# Metric names of the writer threads
+BLOCKS_WRITER = "blocks_writer"
+RECEIPTS_WRITER = "receipts_writer"
+
+
+def export_all_common(
+    partitions,
+    output_dir,
+    provider_uri,
+    max_workers,
+    batch_size,
+    pool_size=None,
+    adaptive_batch_size=False,
+    min_batch_size=DEFAULT_MIN_BATCH_SIZE,
+    max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+    stream_responses=False,
+    compression=True,
+    compress_requests_over=None,
+    cache_dir=None,
+    cache_size_bytes=DEFAULT_MAX_SIZE_BYTES,
+    replay_only=False,
+    keep_transaction_hashes=False,
+    max_concurrent_partitions=1,
+    processes=1,
+    resume=True,
+    checkpoint_blocks=None,
+    writer_queue_size=DEFAULT_QUEUE_SIZE,
+    map_to_rows=False,
+    fields=None,
+    entity_types=EntityType.ALL,
+    metrics=None,
+):
+    if adaptive_batch_size and is_async_provider_uri(provider_uri):
+        raise ValueError("Adaptive batch sizes are not supported by the asyncio engine")
+    if cache_dir is not None and is_async_provider_uri(provider_uri):
+        raise ValueError("The response cache is not supported by the asyncio engine")
+    if replay_only and cache_dir is None:
+        raise ValueError("Replaying requires a cache directory")
+    if max_concurrent_partitions > 1 and is_async_provider_uri(provider_uri):
+        raise ValueError(
+            "Concurrent partitions are not supported by the asyncio engine"
+        )
+    if not resume:
+        forget_exported_partitions(output_dir)
+    export_kwargs = dict(
+        output_dir=output_dir,
+        provider_uri=provider_uri,
+        max_workers=max_workers,
+        batch_size=batch_size,
+        pool_size=pool_size,
+        adaptive_batch_size=adaptive_batch_size,
+        min_batch_size=min_batch_size,
+        max_batch_size=max_batch_size,
+        stream_responses=stream_responses,
+        compression=compression,
+        compress_requests_over=compress_requests_over,
+        cache_dir=cache_dir,
+        cache_size_bytes=cache_size_bytes,
+        replay_only=replay_only,
+        keep_transaction_hashes=keep_transaction_hashes,
+        checkpoint_blocks=checkpoint_blocks,
+        writer_queue_size=writer_queue_size,
+        map_to_rows=map_to_rows,
+        fields=fields,
+        entity_types=entity_types,
+    )
+    if processes > 1:
+        export_partitions_in_processes(
+            partitions, processes, export_kwargs, metrics=metrics
+        )
+        return
+    with open_partition_exporter(metrics=metrics, **export_kwargs) as export:
+        if max_concurrent_partitions > 1:
+            export_partitions_concurrently(
+                partitions, export, max_concurrent_partitions
+            )
+        else:
+            for batch_start_block, batch_end_block, partition_dir in partitions:
+                export(batch_start_block, batch_end_block, partition_dir)
+
 
-def extract_csv_column_unique(input, output, column):
-    set_max_field_size_limit()
+@contextmanager
+def open_partition_exporter(
+    output_dir,
+    provider_uri,
+    max_workers,
+    batch_size,
+    pool_size=None,
+    adaptive_batch_size=False,
+    min_batch_size=DEFAULT_MIN_BATCH_SIZE,
+    max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+    stream_responses=False,
+    compression=True,
+    compress_requests_over=None,
+    cache_dir=None,
+    cache_size_bytes=DEFAULT_MAX_SIZE_BYTES,
+    replay_only=False,
+    keep_transaction_hashes=False,
+    checkpoint_blocks=None,
+    writer_queue_size=DEFAULT_QUEUE_SIZE,
+    map_to_rows=False,
+    fields=None,
+    entity_types=EntityType.ALL,
+    metrics=None,
+):
+    """Opens the connections, workers, response cache and manifest of an export
+    and yields a function exporting a partition with them. Batch sizes adapted in
+    a partition carry over to the next one."""
+    batch_work_executor_factory = None
+    if adaptive_batch_size:
+        batch_work_executor_factory = adaptive_batch_work_executor_factory(
+            batch_size, max_workers, min_batch_size, max_batch_size
+        )
 
-    with smart_open(input, "r") as input_file, smart_open(output, "w") as output_file:
-        reader = csv.DictReader(input_file)
-        seen = set()
-        for row in reader:
-            if row[column] in seen:
-                continue
-            seen.add(row[column])
-            output_file.write(row[column] + "\n")
+    if metrics is None:
+        metrics = Metrics()
+    # The asyncio engine runs every job of the export on one event loop
+    loop = asyncio.new_event_loop() if is_async_provider_uri(provider_uri) else None
+    # Blocks and receipts requests of the threaded engine share max_workers threads
+    worker_pool = SharedWorkerPool(max_workers) if loop is None else None
+    manifest = ExportManifest(output_dir)
+    try:
+        with open_batch_web3_provider(
+            provider_uri,
+            pool_size or max_workers,
+            metrics,
+            loop=loop,
+            stream_responses=stream_responses,
+            compression=compression,
+            compress_requests_over=compress_requests_over,
+        ) as batch_web3_provider, open_caching_batch_provider(
+            batch_web3_provider, cache_dir, cache_size_bytes, replay_only, metrics
+        ) as batch_web3_provider:
 
+            def export(batch_start_block, batch_end_block, partition_dir):
+                export_partition(
+                    batch_start_block,
+                    batch_end_block,
+                    partition_dir,
+                    output_dir,
+                    batch_web3_provider,
+                    max_workers,
+                    batch_size,
+                    loop=loop,
+                    batch_work_executor_factory=batch_work_executor_factory,
+                    metrics=metrics,
+                    keep_transaction_hashes=keep_transaction_hashes,
+                    worker_pool=worker_pool,
+                    manifest=manifest,
+                    checkpoint_blocks=checkpoint_blocks,
+                    writer_queue_size=writer_queue_size,
+                    map_to_rows=map_to_rows,
+                    fields=fields,
+                    entity_types=entity_types,
+                )
+                log_export_stats(metrics, cache_dir)
 
-def export_all_common(partitions, output_dir, provider_uri, max_workers, batch_size):
-    for batch_start_block, batch_end_block, partition_dir in partitions:
+            yield export
+    finally:
+        manifest.close()
+        if worker_pool is not None:
+            worker_pool.shutdown()
+        if loop is not None:
+            loop.close()
 
-        start_time = time()
 
-        padded_batch_start_block = str(batch_start_block).zfill(8)
-        padded_batch_end_block = str(batch_end_block).zfill(8)
-        block_range = "{padded_batch_start_block}-{padded_batch_end_block}".format(
-            padded_batch_start_block=padded_batch_start_block,
-            padded_batch_end_block=padded_batch_end_block,
-        )
-        file_name_suffix = "{padded_batch_start_block}_{padded_batch_end_block}".format(
-            padded_batch_start_block=padded_batch_start_block,
-            padded_batch_end_block=padded_batch_end_block,
+def export_partitions_concurrently(partitions, export, max_concurrent_partitions):
+    """Exports up to max_concurrent_partitions partitions at a time, so that the
+    next partitions keep workers busy while the slowest batches of a partition
+    finish. No new partitions are started once one failed."""
+    executor = FailSafeExecutor(BoundedExecutor(0, max_concurrent_partitions))
+    try:
+        for batch_start_block, batch_end_block, partition_dir in partitions:
+            executor.submit(export, batch_start_block, batch_end_block, partition_dir)
+    finally:
+        executor.shutdown()
+
+
+def forget_exported_partitions(output_dir):
+    manifest = ExportManifest(output_dir)
+    try:
+        manifest.clear()
+    finally:
+        manifest.close()
+
+
+def export_partitions_in_processes(partitions, processes, export_kwargs, metrics=None):
+    """Exports partitions in a pool of processes, each with its own connections
+    and workers, so that decoding, mapping and writing files use several cores.
+    Each process opens its exporter once and keeps it for all its partitions.
+    Counters of all processes are added up and logged as partitions finish, gauges
+    keep the value reported last."""
+    if metrics is None:
+        metrics = Metrics()
+    with multiprocessing.Pool(
+        processes, initializer=_open_process_exporter, initargs=(export_kwargs,)
+    ) as pool:
+        finished_partitions = pool.imap_unordered(
+            _export_partition_in_process, partitions
         )
+        for index, (partition, counters, gauges) in enumerate(finished_partitions):
+            metrics.merge(counters, gauges)
+            logger.info(
+                "Finished partition {partition_dir}, {count} partitions "
+                "exported".format(partition_dir=partition[2], count=index + 1)
+            )
+            log_export_stats(metrics, export_kwargs.get("cache_dir"))
+        # Processes close their exporters as they exit, unlike when terminated
+        pool.close()
+        pool.join()
+
+
+# The exporter of a pool process, its metrics and the counters already reported
+_process_exporter = None
 
-        blocks_output_dir = "{output_dir}/blocks{partition_dir}".format(
-            output_dir=output_dir, partition_dir=partition_dir,
+
+def _open_process_exporter(export_kwargs):
+    global _process_exporter
+    metrics = Metrics()
+    exit_stack = ExitStack()
+    export = exit_stack.enter_context(
+        open_partition_exporter(metrics=metrics, **export_kwargs)
+    )
+    multiprocessing.util.Finalize(None, exit_stack.close, exitpriority=0)
+    _process_exporter = (export, metrics, {})
+
+
+def _export_partition_in_process(partition):
+    export, metrics, reported_counters = _process_exporter
+    export(*partition)
+    counters = metrics.counters()
+    new_counters = {
+        name: value - reported_counters.get(name, 0) for name, value in counters.items()
+    }
+    reported_counters.update(counters)
+    return partition, new_counters, metrics.gauges()
+
+
+@contextmanager
+def open_batch_web3_provider(
+    provider_uri, pool_size, metrics, loop=None, **provider_kwargs
+):
+    """Opens a batch provider which keeps its connections for the whole export."""
+    if loop is not None:
+        batch_web3_provider = get_provider_from_uri(
+            provider_uri,
+            batch=True,
+            pool_size=pool_size,
+            metrics=metrics,
+            **provider_kwargs
         )
-        os.makedirs(os.path.dirname(blocks_output_dir), exist_ok=True)
+        try:
+            yield batch_web3_provider
+        finally:
+            loop.run_until_complete(batch_web3_provider.close())
+    else:
+        # One pooled session is shared by all jobs and partitions so that
+        # keep-alive connections stay warm. Providers using a shared session are
+        # thread safe, so a single instance also shares endpoint health scores.
+        session = create_session(pool_size=pool_size, metrics=metrics)
+        try:
+            yield get_provider_from_uri(
+                provider_uri,
+                batch=True,
+                session=session,
+                metrics=metrics,
+                **provider_kwargs
+            )
+        finally:
+            session.close()
 
-        transactions_output_dir = "{output_dir}/transactions{partition_dir}".format(
-            output_dir=output_dir, partition_dir=partition_dir,
+
+def adaptive_batch_work_executor_factory(
+    batch_size, max_workers, min_batch_size, max_batch_size
+):
+    """Returns a function creating an executor per request type. Each executor
+    starts from the batch size its predecessor settled on in the last partition."""
+    executors = {}
+    # Partitions exported concurrently create executors from several threads
+    lock = threading.Lock()
+
+    def create_batch_work_executor(request_type):
+        with lock:
+            previous_executor = executors.get(request_type)
+            executors[request_type] = AdaptiveBatchWorkExecutor(
+                previous_executor.batch_size if previous_executor else batch_size,
+                max_workers,
+                min_batch_size,
+                max_batch_size,
+                name=request_type,
+            )
+            return executors[request_type]
+
+    return create_batch_work_executor
+
+
+@contextmanager
+def open_caching_batch_provider(
+    batch_web3_provider, cache_dir, cache_size_bytes, replay_only, metrics
+):
+    """Serves requests from an on-disk response cache if cache_dir is set."""
+    if cache_dir is None:
+        yield batch_web3_provider
+        return
+    cache = SegmentedResponseCache(cache_dir, max_size_bytes=cache_size_bytes)
+    try:
+        yield CachingBatchProvider(
+            batch_web3_provider, cache, replay_only=replay_only, metrics=metrics
         )
-        os.makedirs(os.path.dirname(transactions_output_dir), exist_ok=True)
+    finally:
+        cache.close()
 
-        blocks_file = "{blocks_output_dir}/blocks_{file_name_suffix}.csv".format(
-            blocks_output_dir=blocks_output_dir, file_name_suffix=file_name_suffix,
+
+def log_export_stats(metrics, cache_dir):
+    log_connection_stats(metrics)
+    log_salvage_stats(metrics)
+    log_writer_stats(metrics)
+    if cache_dir is not None:
+        log_cache_stats(metrics)
+
+
+def log_connection_stats(metrics):
+    opened, reused = get_connection_stats(metrics)
+    bytes_on_wire, bytes_decoded = get_compression_stats(metrics)
+    logger.info(
+        "HTTP connections opened: {opened}, reused: {reused}, response bytes on "
+        "wire: {bytes_on_wire}, decoded: {bytes_decoded}".format(
+            opened=opened,
+            reused=reused,
+            bytes_on_wire=bytes_on_wire,
+            bytes_decoded=bytes_decoded,
         )
-        transactions_file = "{transactions_output_dir}/transactions_{file_name_suffix}.csv".format(
-            transactions_output_dir=transactions_output_dir,
-            file_name_suffix=file_name_suffix,
+    )
+
+
+def log_salvage_stats(metrics):
+    retries, items_retried, items_salvaged, bisections = get_salvage_stats(metrics)
+    logger.info(
+        "RPC batch retries: {retries}, items retried: {items_retried}, "
+        "items salvaged: {items_salvaged}, bisections: {bisections}".format(
+            retries=retries,
+            items_retried=items_retried,
+            items_salvaged=items_salvaged,
+            bisections=bisections,
         )
+    )
+
+
+def log_writer_stats(metrics):
+    for name in (BLOCKS_WRITER, RECEIPTS_WRITER):
+        if metrics.get("{}_batches".format(name)) == 0:
+            continue
+        average_depth, blocked_seconds, idle_seconds = get_writer_stats(metrics, name)
         logger.info(
-            "Exporting blocks {block_range} to {blocks_file}".format(
-                block_range=block_range, blocks_file=blocks_file,
+            "{name} average queue depth: {average_depth}, workers blocked for "
+            "{blocked_seconds} seconds, writer idle for {idle_seconds} "
+            "seconds".format(
+                name=name.capitalize().replace("_", " "),
+                average_depth=average_depth,
+                blocked_seconds=blocked_seconds,
+                idle_seconds=idle_seconds,
             )
         )
+
+
+def log_cache_stats(metrics):
+    hits, misses = get_cache_stats(metrics)
+    logger.info(
+        "RPC cache hits: {hits}, misses: {misses}".format(hits=hits, misses=misses)
+    )
+
+
+def export_partition(
+    batch_start_block,
+    batch_end_block,
+    partition_dir,
+    output_dir,
+    batch_web3_provider,
+    max_workers,
+    batch_size,
+    loop=None,
+    batch_work_executor_factory=None,
+    metrics=None,
+    keep_transaction_hashes=False,
+    worker_pool=None,
+    manifest=None,
+    checkpoint_blocks=None,
+    writer_queue_size=None,
+    map_to_rows=False,
+    fields=None,
+    entity_types=EntityType.ALL,
+):
+    start_time = time()
+
+    def create_batch_work_executor(request_type, priority, can_submit=None):
+        if batch_work_executor_factory is not None:
+            batch_work_executor = batch_work_executor_factory(request_type)
+        elif worker_pool is not None:
+            batch_work_executor = BatchWorkExecutor(batch_size, max_workers)
+        else:
+            return None
+        if worker_pool is not None:
+            batch_work_executor.executor = FailSafeExecutor(
+                worker_pool.executor(priority, can_submit)
+            )
+        return batch_work_executor
+
+    padded_batch_start_block = str(batch_start_block).zfill(8)
+    padded_batch_end_block = str(batch_end_block).zfill(8)
+    block_range = "{padded_batch_start_block}-{padded_batch_end_block}".format(
+        padded_batch_start_block=padded_batch_start_block,
+        padded_batch_end_block=padded_batch_end_block,
+    )
+    file_name_suffix = "{padded_batch_start_block}_{padded_batch_end_block}".format(
+        padded_batch_start_block=padded_batch_start_block,
+        padded_batch_end_block=padded_batch_end_block,
+    )
+
+    # Only the directories and files of exported entity types are created
+    files_by_entity_type = OrderedDict()
+    for entity_type in EntityType.ALL:
+        if entity_type not in entity_types:
+            continue
+        entity_output_dir = "{output_dir}/{entity_type}s{partition_dir}".format(
+            output_dir=output_dir, entity_type=entity_type, partition_dir=partition_dir
+        )
+        os.makedirs(os.path.dirname(entity_output_dir), exist_ok=True)
+        entity_file = "{entity_output_dir}/{entity_type}s_{suffix}.csv".format(
+            entity_output_dir=entity_output_dir,
+            entity_type=entity_type,
+            suffix=file_name_suffix,
+        )
         logger.info(
-            "Exporting transactions from blocks {block_range} to {transactions_file}".format(
-                block_range=block_range, transactions_file=transactions_file,
+            "Exporting {entity_type}s from blocks {block_range} to {file}".format(
+                entity_type=entity_type, block_range=block_range, file=entity_file
             )
         )
+        files_by_entity_type[entity_type] = entity_file
+    # Receipts are requested by the hashes of the transactions of the blocks
+    export_receipts = (
+        EntityType.RECEIPT in files_by_entity_type
+        or EntityType.LOG in files_by_entity_type
+    )
 
-        job = ExportBlocksJob(
-            start_block=batch_start_block,
-            end_block=batch_end_block,
+    output_files = list(files_by_entity_type.values())
+    selection = get_selection(files_by_entity_type, fields)
+    if manifest is not None and all(os.path.exists(f) for f in output_files):
+        row_counts = manifest.get_finished_partition(
+            partition_dir, batch_start_block, batch_end_block, selection
+        )
+        if row_counts is not None:
+            logger.info(
+                "Skipping blocks {block_range}, exported before with {row_counts} "
+                "rows".format(block_range=block_range, row_counts=row_counts)
+            )
+            return
+
+    def blocks_job_kwargs(start_block, end_block, files):
+        blocks_job_fields = fields
+        if export_receipts:
+            if EntityType.TRANSACTION in files:
+                blocks_job_fields = with_required_fields(
+                    fields, EntityType.TRANSACTION, ["hash"]
+                )
+            else:
+                blocks_job_fields = dict(fields or {}, transaction=["hash"])
+        return dict(
+            start_block=start_block,
+            end_block=end_block,
             batch_size=batch_size,
-            batch_web3_provider=ThreadLocalProxy(
-                lambda: get_provider_from_uri(provider_uri, batch=True)
-            ),
+            batch_web3_provider=batch_web3_provider,
             max_workers=max_workers,
-            item_exporter=blocks_and_transactions_item_exporter(
-                blocks_file, transactions_file
-            ),
-            export_blocks=blocks_file is not None,
-            export_transactions=transactions_file is not None,
+            export_blocks=EntityType.BLOCK in files,
+            export_transactions=EntityType.TRANSACTION in files or export_receipts,
+            metrics=metrics,
+            map_to_rows=map_to_rows,
+            fields=blocks_job_fields,
         )
-        job.run()
 
-        cache_output_dir = "{output_dir}/.tmp{partition_dir}".format(
-            output_dir=output_dir, partition_dir=partition_dir,
+    def export_blocks_and_receipts(start_block, end_block, files):
+        files = dict(zip(files_by_entity_type, files))
+        blocks_item_exporter = blocks_and_transactions_item_exporter(
+            files.get(EntityType.BLOCK),
+            files.get(EntityType.TRANSACTION),
+            fields=fields,
         )
-        os.makedirs(os.path.dirname(cache_output_dir), exist_ok=True)
+        blocks_writer = blocks_item_exporter
+        if writer_queue_size:
+            # Workers hand items to a writer thread per job instead of writing
+            blocks_writer = QueuedItemExporter(
+                blocks_item_exporter, writer_queue_size, BLOCKS_WRITER, metrics
+            )
+        if not export_receipts:
+            new_export_blocks_job(
+                loop,
+                item_exporter=blocks_writer,
+                batch_work_executor=create_batch_work_executor(
+                    "blocks", BLOCKS_PRIORITY
+                ),
+                **blocks_job_kwargs(start_block, end_block, files)
+            ).run()
+            return blocks_item_exporter.item_counts
 
-        transaction_hashes_file = "{cache_output_dir}/transaction_hashes_{file_name_suffix}.csv".format(
-            cache_output_dir=cache_output_dir, file_name_suffix=file_name_suffix,
-        )
-        logger.info(
-            "Extracting hash column from transaction file {transactions_file}".format(
-                transactions_file=transactions_file,
+        transaction_hashes_file = None
+        if keep_transaction_hashes:
+            transaction_hashes_file = os.path.join(
+                "{output_dir}/.tmp{partition_dir}".format(
+                    output_dir=output_dir, partition_dir=partition_dir
+                ),
+                "transaction_hashes_{start_block:08d}_{end_block:08d}.csv".format(
+                    start_block=start_block, end_block=end_block
+                ),
             )
-        )
-        extract_csv_column_unique(transactions_file, transaction_hashes_file, "hash")
 
-        receipts_output_dir = "{output_dir}/receipts{partition_dir}".format(
-            output_dir=output_dir, partition_dir=partition_dir,
+        # The asyncio engine runs one job at a time, so its queue must hold all
+        # hashes. With a shared worker pool, block batches wait for the receipts
+        # job instead of blocking workers it needs.
+        transaction_hash_queue = ClosableQueue(
+            maxsize=(
+                TRANSACTION_HASH_QUEUE_SIZE
+                if loop is None and worker_pool is None
+                else 0
+            )
         )
-        os.makedirs(os.path.dirname(receipts_output_dir), exist_ok=True)
 
-        logs_output_dir = "{output_dir}/logs{partition_dir}".format(
-            output_dir=output_dir, partition_dir=partition_dir,
-        )
-        os.makedirs(os.path.dirname(logs_output_dir), exist_ok=True)
+        def can_submit_blocks():
+            # Once the receipts job failed, block batches fail putting hashes
+            # instead of waiting for room forever
+            return (
+                transaction_hash_queue.aborted
+                or transaction_hash_queue.qsize() < TRANSACTION_HASH_QUEUE_SIZE
+            )
 
-        receipts_file = "{receipts_output_dir}/receipts_{file_name_suffix}.csv".format(
-            receipts_output_dir=receipts_output_dir, file_name_suffix=file_name_suffix,
+        receipts_item_exporter = receipts_and_logs_item_exporter(
+            files.get(EntityType.RECEIPT), files.get(EntityType.LOG), fields=fields
         )
-        logs_file = "{logs_output_dir}/logs_{file_name_suffix}.csv".format(
-            logs_output_dir=logs_output_dir, file_name_suffix=file_name_suffix,
+        receipts_writer = receipts_item_exporter
+        if writer_queue_size:
+            receipts_writer = QueuedItemExporter(
+                receipts_item_exporter, writer_queue_size, RECEIPTS_WRITER, metrics
+            )
+        blocks_job = new_export_blocks_job(
+            loop,
+            item_exporter=TransactionHashItemExporter(
+                blocks_writer,
+                transaction_hash_queue,
+                transaction_hashes_file=transaction_hashes_file,
+                # Transactions are mapped for their hashes even if not exported
+                item_types=list(files),
+            ),
+            batch_work_executor=create_batch_work_executor(
+                "blocks", BLOCKS_PRIORITY, can_submit_blocks
+            ),
+            **blocks_job_kwargs(start_block, end_block, files)
         )
-        logger.info(
-            "Exporting receipts and logs from blocks {block_range} to {receipts_file} and {logs_file}".format(
-                block_range=block_range,
-                receipts_file=receipts_file,
-                logs_file=logs_file,
+        receipts_job = new_export_receipts_job(
+            loop,
+            transaction_hashes_iterable=transaction_hash_queue,
+            batch_size=batch_size,
+            batch_web3_provider=batch_web3_provider,
+            max_workers=max_workers,
+            item_exporter=receipts_writer,
+            export_receipts=EntityType.RECEIPT in files,
+            export_logs=EntityType.LOG in files,
+            batch_work_executor=create_batch_work_executor(
+                "receipts", RECEIPTS_PRIORITY
+            ),
+            metrics=metrics,
+            map_to_rows=map_to_rows,
+            fields=fields,
+        )
+        if loop is not None:
+            blocks_job.run()
+            receipts_job.run()
+        else:
+            run_blocks_and_receipts_jobs(
+                blocks_job, receipts_job, transaction_hash_queue
             )
+        return dict(
+            blocks_item_exporter.item_counts, **receipts_item_exporter.item_counts
         )
 
-        with smart_open(transaction_hashes_file, "r") as transaction_hashes:
-            job = ExportReceiptsJob(
-                transaction_hashes_iterable=(
-                    transaction_hash.strip() for transaction_hash in transaction_hashes
-                ),
-                batch_size=batch_size,
-                batch_web3_provider=ThreadLocalProxy(
-                    lambda: get_provider_from_uri(provider_uri, batch=True)
-                ),
-                max_workers=max_workers,
-                item_exporter=receipts_and_logs_item_exporter(receipts_file, logs_file),
-                export_receipts=receipts_file is not None,
-                export_logs=logs_file is not None,
+    checkpoint_ranges = split_block_range(
+        batch_start_block, batch_end_block, checkpoint_blocks
+    )
+    if len(checkpoint_ranges) == 1:
+        # Files are renamed to their final names once the partition is exported
+        with atomic_output_files(*output_files) as temporary_files:
+            row_counts = export_blocks_and_receipts(
+                batch_start_block, batch_end_block, temporary_files
             )
-            job.run()
+    else:
+        row_counts = export_checkpoints(
+            checkpoint_ranges,
+            partition_dir,
+            output_files,
+            export_blocks_and_receipts,
+            manifest,
+            selection,
+        )
+    if manifest is not None:
+        manifest.finish_partition(
+            partition_dir, batch_start_block, batch_end_block, row_counts, selection
+        )
 
-        shutil.rmtree(os.path.dirname(cache_output_dir))
-        end_time = time()
-        time_diff = round(end_time - start_time, 5)
-        logger.info(
-            "Exporting blocks {block_range} took {time_diff} seconds".format(
-                block_range=block_range, time_diff=time_diff,
-            )
+    end_time = time()
+    time_diff = round(end_time - start_time, 5)
+    logger.info(
+        "Exporting blocks {block_range} took {time_diff} seconds".format(
+            block_range=block_range,
+            time_diff=time_diff,
         )
+    )
+
+
+def split_block_range(start_block, end_block, max_blocks=None):
+    """Splits the block range into ranges of up to max_blocks blocks."""
+    if max_blocks is None:
+        return [(start_block, end_block)]
+    return [
+        (range_start_block, min(range_start_block + max_blocks - 1, end_block))
+        for range_start_block in range(start_block, end_block + 1, max_blocks)
+    ]
+
+
+def export_checkpoints(
+    checkpoint_ranges,
+    partition_dir,
+    output_files,
+    export_range,
+    manifest,
+    selection=None,
+):
+    """Exports each block range to files of its own, recording it in the manifest,
+    then concatenates them into output_files. Ranges recorded in the manifest by
+    an earlier run with the same selection are not exported again. Returns the
+    total row counts."""
+    checkpoints = manifest.get_checkpoints(partition_dir, selection) if manifest else {}
+    row_counts = {}
+    checkpoint_files = []
+    for start_block, end_block in checkpoint_ranges:
+        files = [
+            checkpoint_file_name(file_name, start_block, end_block)
+            for file_name in output_files
+        ]
+        checkpoint_files.append(files)
+        range_row_counts = checkpoints.get((start_block, end_block))
+        if range_row_counts is not None and all(os.path.exists(f) for f in files):
+            logger.info(
+                "Resuming after blocks {start_block}-{end_block}, exported "
+                "before".format(start_block=start_block, end_block=end_block)
+            )
+        else:
+            with atomic_output_files(*files) as temporary_files:
+                range_row_counts = export_range(start_block, end_block, temporary_files)
+            if manifest is not None:
+                manifest.add_checkpoint(
+                    partition_dir, start_block, end_block, range_row_counts, selection
+                )
+        for item_type, count in range_row_counts.items():
+            row_counts[item_type] = row_counts.get(item_type, 0) + count
+
+    with atomic_output_files(*output_files) as temporary_files:
+        for index, temporary_file in enumerate(temporary_files):
+            concatenate_csv_files(
+                [files[index] for files in checkpoint_files], temporary_file
+            )
+    for files in checkpoint_files:
+        for file_name in files:
+            os.remove(file_name)
+    return row_counts
+
+
+def checkpoint_file_name(file_name, start_block, end_block):
+    return os.path.join(
+        os.path.dirname(file_name),
+        ".{file_name}.{start_block:08d}_{end_block:08d}.checkpoint".format(
+            file_name=os.path.basename(file_name),
+            start_block=start_block,
+            end_block=end_block,
+        ),
+    )
+
+
+def run_blocks_and_receipts_jobs(blocks_job, receipts_job, transaction_hash_queue):
+    """Runs the receipts job while the blocks job feeds it transaction hashes."""
+
+    def run_receipts_job():
+        try:
+            receipts_job.run()
+        except Exception:
+            # Unblocks the blocks job waiting for room in the queue
+            transaction_hash_queue.abort()
+            raise
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        receipts_future = executor.submit(run_receipts_job)
+        try:
+            blocks_job.run()
+        finally:
+            # Ends the receipts job even if the blocks job failed before opening
+            # its exporter
+            transaction_hash_queue.close()
+            receipts_future.result()
+
+
+def new_export_blocks_job(loop, **kwargs):
+    if loop is not None:
+        return AsyncExportBlocksJob(loop=loop, **kwargs)
+    return ExportBlocksJob(**kwargs)
+
+
+def new_export_receipts_job(loop, **kwargs):
+    if loop is not None:
+        return AsyncExportReceiptsJob(loop=loop, **kwargs)
+    return ExportReceiptsJob(**kwargs)
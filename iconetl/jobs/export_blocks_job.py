@@ -20,15 +20,15 @@
 #  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 
-import json
-
 from blockchainetl_common.executors.batch_work_executor import \
     BatchWorkExecutor
 from blockchainetl_common.jobs.base_job import BaseJob
 from iconetl.json_rpc_requests import generate_get_block_by_number_json_rpc
 from iconetl.mappers.block_mapper import IcxBlockMapper
-from iconetl.mappers.transaction_mapper import IcxTransactionMapper
-from iconetl.utils import rpc_response_batch_to_results, validate_range
+from iconetl.mappers.row_mapper import IcxRowMapper
+from iconetl.providers.rpc import get_last_response_size
+from iconetl.providers.salvaging import SalvagingBatchRequester
+from iconetl.utils import validate_range
 
 
 class ExportBlocksJob(BaseJob):
@@ -42,6 +42,10 @@ class ExportBlocksJob(BaseJob):
         item_exporter,
         export_blocks=True,
         export_transactions=True,
+        batch_work_executor=None,
+        metrics=None,
+        map_to_rows=False,
+        fields=None,
     ):
         validate_range(start_block, end_block)
         self.start_block = start_block
@@ -49,7 +53,9 @@ class ExportBlocksJob(BaseJob):
 
         self.batch_web3_provider = batch_web3_provider
 
-        self.batch_work_executor = BatchWorkExecutor(batch_size, max_workers)
+        if batch_work_executor is None:
+            batch_work_executor = BatchWorkExecutor(batch_size, max_workers)
+        self.batch_work_executor = batch_work_executor
         self.item_exporter = item_exporter
 
         self.export_blocks = export_blocks
@@ -59,8 +65,16 @@ class ExportBlocksJob(BaseJob):
                 "At least one of export_blocks or export_transactions must be True"
             )
 
-        self.block_mapper = IcxBlockMapper()
-        self.transaction_mapper = IcxTransactionMapper()
+        self.block_mapper = IcxBlockMapper(map_transactions=export_transactions)
+        # Rows skip building records, for exporters which only write files. Only
+        # the given fields are mapped, which is done with rows.
+        self.map_to_rows = map_to_rows or fields is not None
+        self.row_mapper = IcxRowMapper(
+            export_blocks=export_blocks,
+            export_transactions=export_transactions,
+            fields=fields,
+        )
+        self.batch_requester = self._new_batch_requester(metrics)
 
     def _start(self):
         self.item_exporter.open()
@@ -74,22 +88,45 @@ class ExportBlocksJob(BaseJob):
 
     def _export_batch(self, block_number_batch):
         blocks_rpc = list(generate_get_block_by_number_json_rpc(block_number_batch))
-        response = self.batch_web3_provider.make_batch_request(json.dumps(blocks_rpc))
-        results = rpc_response_batch_to_results(response)
-        blocks = [self.block_mapper.json_dict_to_block(result) for result in results]
+        items = []
+        for block in self.batch_requester.request(blocks_rpc):
+            items.extend(self._block_to_items(block))
+        # Hands over the whole batch at once, e.g. to the writer thread of a
+        # QueuedItemExporter
+        self.item_exporter.export_items(items)
+        # Lets adaptive executors size batches by response bytes
+        return get_last_response_size(self.batch_web3_provider)
+
+    def _new_batch_requester(self, metrics):
+        return SalvagingBatchRequester(
+            self.batch_web3_provider,
+            metrics=metrics,
+            result_mapper=self._get_result_mapper(),
+            # Batches salvaged after a timeout still shrink adaptive batch sizes
+            on_batch_error=getattr(
+                self.batch_work_executor, "report_batch_error", None
+            ),
+        )
 
-        for block in blocks:
-            self._export_block(block)
+    def _get_result_mapper(self):
+        if self.map_to_rows:
+            return self.row_mapper.json_dict_to_block_rows
+        return self.block_mapper.json_dict_to_block
 
-    def _export_block(self, block):
+    def _block_to_items(self, block):
+        if self.map_to_rows:
+            # Rows of unexported items are not built in the first place
+            yield from block
+            return
+        # Records are exported as they are, without copying them to dicts
         if self.export_blocks:
-            self.item_exporter.export_item(self.block_mapper.block_to_dict(block))
+            yield block
         if self.export_transactions:
-            for tx in block.transactions:
-                self.item_exporter.export_item(
-                    self.transaction_mapper.transaction_to_dict(tx)
-                )
+            yield from block.transactions
 
     def _end(self):
-        self.batch_work_executor.shutdown()
-        self.item_exporter.close()
+        try:
+            self.batch_work_executor.shutdown()
+        finally:
+            # Also ends writer threads of exporters if a batch failed
+            self.item_exporter.close()
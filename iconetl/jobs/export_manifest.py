@@ -0,0 +1,168 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Hidden, so that tools reading the Hive style partitions skip it
+MANIFEST_FILE_NAME = ".export_manifest.sqlite"
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS partitions ("
+    "partition_dir TEXT PRIMARY KEY, "
+    "start_block INTEGER NOT NULL, "
+    "end_block INTEGER NOT NULL, "
+    "row_counts TEXT NOT NULL, "
+    "finished_at REAL NOT NULL, "
+    "selection TEXT)",
+    "CREATE TABLE IF NOT EXISTS checkpoints ("
+    "partition_dir TEXT NOT NULL, "
+    "start_block INTEGER NOT NULL, "
+    "end_block INTEGER NOT NULL, "
+    "row_counts TEXT NOT NULL, "
+    "selection TEXT, "
+    "PRIMARY KEY (partition_dir, start_block, end_block))",
+]
+
+
+# Records the partitions exported to an output directory with their row counts,
+# and the block ranges exported so far within unfinished partitions, so that an
+# interrupted export can be resumed. Both are recorded with the selection of
+# entity types and fields they were exported with, see get_selection, and only
+# found again for the same selection. Kept in a SQLite database in the output
+# directory, so that several processes can share it. Thread safe.
+class ExportManifest(object):
+    def __init__(self, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            os.path.join(output_dir, MANIFEST_FILE_NAME),
+            timeout=60,
+            check_same_thread=False,
+        )
+        with self._connection:
+            for statement in SCHEMA:
+                self._connection.execute(statement)
+            for table in ("partitions", "checkpoints"):
+                self._add_selection_column(table)
+
+    def get_finished_partition(
+        self, partition_dir, start_block, end_block, selection=None
+    ):
+        """Returns the row counts of the partition if it was exported for the given
+        block range and selection, None otherwise."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT row_counts FROM partitions "
+                "WHERE partition_dir = ? AND start_block = ? AND end_block = ? "
+                "AND selection IS ?",
+                (partition_dir, start_block, end_block, selection),
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def finish_partition(
+        self, partition_dir, start_block, end_block, row_counts, selection=None
+    ):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO partitions (partition_dir, start_block, "
+                "end_block, row_counts, finished_at, selection) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    partition_dir,
+                    start_block,
+                    end_block,
+                    json.dumps(row_counts, sort_keys=True),
+                    time.time(),
+                    selection,
+                ),
+            )
+            self._connection.execute(
+                "DELETE FROM checkpoints WHERE partition_dir = ?", (partition_dir,)
+            )
+
+    def get_checkpoints(self, partition_dir, selection=None):
+        """Returns a dict of the row counts of the block ranges exported so far in
+        the partition with the given selection, by (start_block, end_block)."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT start_block, end_block, row_counts FROM checkpoints "
+                "WHERE partition_dir = ? AND selection IS ?",
+                (partition_dir, selection),
+            ).fetchall()
+        return {
+            (start_block, end_block): json.loads(row_counts)
+            for start_block, end_block, row_counts in rows
+        }
+
+    def add_checkpoint(
+        self, partition_dir, start_block, end_block, row_counts, selection=None
+    ):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "(partition_dir, start_block, end_block, row_counts, selection) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    partition_dir,
+                    start_block,
+                    end_block,
+                    json.dumps(row_counts, sort_keys=True),
+                    selection,
+                ),
+            )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM partitions")
+            self._connection.execute("DELETE FROM checkpoints")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _add_selection_column(self, table):
+        # Manifests written before selections were recorded
+        columns = [
+            row[1]
+            for row in self._connection.execute("PRAGMA table_info({})".format(table))
+        ]
+        if "selection" not in columns:
+            try:
+                self._connection.execute(
+                    "ALTER TABLE {} ADD COLUMN selection TEXT".format(table)
+                )
+            except sqlite3.OperationalError:
+                # Added by another process in the meantime
+                pass
+
+
+def get_selection(entity_types, fields=None):
+    """Returns the entity types and fields of an export as a string to record in
+    the manifest. Files exported with another selection have other columns or are
+    missing, and are exported again."""
+    return json.dumps(
+        {"entity_types": sorted(entity_types), "fields": fields}, sort_keys=True
+    )
@@ -20,15 +20,14 @@
 #  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 
-import json
-
 from blockchainetl_common.executors.batch_work_executor import \
     BatchWorkExecutor
 from blockchainetl_common.jobs.base_job import BaseJob
 from iconetl.json_rpc_requests import generate_get_receipt_json_rpc
-from iconetl.mappers.receipt_log_mapper import IcxReceiptLogMapper
 from iconetl.mappers.receipt_mapper import IcxReceiptMapper
-from iconetl.utils import rpc_response_batch_to_results
+from iconetl.mappers.row_mapper import IcxRowMapper
+from iconetl.providers.rpc import get_last_response_size
+from iconetl.providers.salvaging import SalvagingBatchRequester
 
 
 # Exports receipts and logs
@@ -42,11 +41,17 @@ class ExportReceiptsJob(BaseJob):
         item_exporter,
         export_receipts=True,
         export_logs=True,
+        batch_work_executor=None,
+        metrics=None,
+        map_to_rows=False,
+        fields=None,
     ):
         self.batch_web3_provider = batch_web3_provider
         self.transaction_hashes_iterable = transaction_hashes_iterable
 
-        self.batch_work_executor = BatchWorkExecutor(batch_size, max_workers)
+        if batch_work_executor is None:
+            batch_work_executor = BatchWorkExecutor(batch_size, max_workers)
+        self.batch_work_executor = batch_work_executor
         self.item_exporter = item_exporter
 
         self.export_receipts = export_receipts
@@ -56,8 +61,14 @@ class ExportReceiptsJob(BaseJob):
                 "At least one of export_receipts or export_logs must be True"
             )
 
-        self.receipt_mapper = IcxReceiptMapper()
-        self.receipt_log_mapper = IcxReceiptLogMapper()
+        self.receipt_mapper = IcxReceiptMapper(map_logs=export_logs)
+        # Rows skip building records, for exporters which only write files. Only
+        # the given fields are mapped, which is done with rows.
+        self.map_to_rows = map_to_rows or fields is not None
+        self.row_mapper = IcxRowMapper(
+            export_receipts=export_receipts, export_logs=export_logs, fields=fields
+        )
+        self.batch_requester = self._new_batch_requester(metrics)
 
     def _start(self):
         self.item_exporter.open()
@@ -69,23 +80,42 @@ class ExportReceiptsJob(BaseJob):
 
     def _export_receipts(self, transaction_hashes):
         receipts_rpc = list(generate_get_receipt_json_rpc(transaction_hashes))
-        response = self.batch_web3_provider.make_batch_request(json.dumps(receipts_rpc))
-        results = rpc_response_batch_to_results(response)
-        receipts = [
-            self.receipt_mapper.json_dict_to_receipt(result) for result in results
-        ]
-        for receipt in receipts:
-            self._export_receipt(receipt)
+        items = []
+        for receipt in self.batch_requester.request(receipts_rpc):
+            items.extend(self._receipt_to_items(receipt))
+        self.item_exporter.export_items(items)
+        return get_last_response_size(self.batch_web3_provider)
+
+    def _new_batch_requester(self, metrics):
+        return SalvagingBatchRequester(
+            self.batch_web3_provider,
+            metrics=metrics,
+            result_mapper=self._get_result_mapper(),
+            # Batches salvaged after a timeout still shrink adaptive batch sizes
+            on_batch_error=getattr(
+                self.batch_work_executor, "report_batch_error", None
+            ),
+        )
+
+    def _get_result_mapper(self):
+        if self.map_to_rows:
+            return self.row_mapper.json_dict_to_receipt_rows
+        return self.receipt_mapper.json_dict_to_receipt
 
-    def _export_receipt(self, receipt):
+    def _receipt_to_items(self, receipt):
+        if self.map_to_rows:
+            # Rows of unexported items are not built in the first place
+            yield from receipt
+            return
+        # Records are exported as they are, without copying them to dicts
         if self.export_receipts:
-            self.item_exporter.export_item(self.receipt_mapper.receipt_to_dict(receipt))
+            yield receipt
         if self.export_logs:
-            for log in receipt.logs:
-                self.item_exporter.export_item(
-                    self.receipt_log_mapper.receipt_log_to_dict(log)
-                )
+            yield from receipt.logs
 
     def _end(self):
-        self.batch_work_executor.shutdown()
-        self.item_exporter.close()
+        try:
+            self.batch_work_executor.shutdown()
+        finally:
+            # Also ends writer threads of exporters if a batch failed
+            self.item_exporter.close()
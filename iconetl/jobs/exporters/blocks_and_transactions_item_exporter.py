@@ -20,8 +20,7 @@
 #  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 
-from blockchainetl_common.jobs.exporters.composite_item_exporter import \
-    CompositeItemExporter
+from iconetl.jobs.exporters.composite_item_exporter import CompositeItemExporter
 
 BLOCK_FIELDS_TO_EXPORT = [
     "number",
@@ -55,11 +54,16 @@ TRANSACTION_FIELDS_TO_EXPORT = [
 ]
 
 
-def blocks_and_transactions_item_exporter(blocks_output=None, transactions_output=None):
+def blocks_and_transactions_item_exporter(
+    blocks_output=None, transactions_output=None, fields=None
+):
     return CompositeItemExporter(
         filename_mapping={"block": blocks_output, "transaction": transactions_output},
-        field_mapping={
-            "block": BLOCK_FIELDS_TO_EXPORT,
-            "transaction": TRANSACTION_FIELDS_TO_EXPORT,
-        },
+        field_mapping=dict(
+            {
+                "block": BLOCK_FIELDS_TO_EXPORT,
+                "transaction": TRANSACTION_FIELDS_TO_EXPORT,
+            },
+            **(fields or {})
+        ),
     )
@@ -0,0 +1,120 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import threading
+
+from blockchainetl_common.exporters import (
+    CsvItemExporter,
+    JsonLinesItemExporter,
+    to_bytes,
+)
+from blockchainetl_common.file_utils import get_file_handle
+from blockchainetl_common.jobs.exporters.composite_item_exporter import (
+    CompositeItemExporter as CommonCompositeItemExporter,
+)
+
+from iconetl.domain.row import Row
+
+
+# Rows exported with the columns they are declared with are written without
+# looking up their fields one by one. The number of items exported per item type
+# is kept in item_counts once closed.
+class CompositeItemExporter(CommonCompositeItemExporter):
+    def __init__(self, filename_mapping, field_mapping=None):
+        super().__init__(filename_mapping, field_mapping=field_mapping)
+        self.item_counts = {}
+        self._row_exporters = {}
+
+    def open(self):
+        for item_type, filename in self.filename_mapping.items():
+            file = get_file_handle(filename, binary=True)
+            fields = self.field_mapping.get(item_type)
+            self.file_mapping[item_type] = file
+            if str(filename).endswith(".json"):
+                item_exporter = RowJsonLinesItemExporter(file, fields_to_export=fields)
+            else:
+                item_exporter = RowCsvItemExporter(file, fields_to_export=fields)
+            self.exporter_mapping[item_type] = item_exporter
+            self.counter_mapping[item_type] = ItemCounter()
+
+    def export_item(self, item):
+        if isinstance(item, Row):
+            exporter = self._get_row_exporter(type(item))
+            if exporter is not None:
+                exporter.export_row(item.values)
+                self.counter_mapping[item.item_type].increment()
+                return
+        super().export_item(item)
+
+    def _get_row_exporter(self, row_type):
+        try:
+            return self._row_exporters[row_type]
+        except KeyError:
+            pass
+        exporter = self.exporter_mapping.get(row_type.item_type)
+        if exporter is None or list(exporter.fields_to_export or ()) != list(
+            row_type.field_names
+        ):
+            # Other columns are read from the row like from an item dict
+            exporter = None
+        self._row_exporters[row_type] = exporter
+        return exporter
+
+    def close(self):
+        self.item_counts = {
+            item_type: counter.value
+            for item_type, counter in self.counter_mapping.items()
+        }
+        super().close()
+
+
+# Counts like AtomicCounter, but the count can be read without incrementing it
+class ItemCounter(object):
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def increment(self, increment=1):
+        with self._lock:
+            self.value += increment
+            return self.value
+
+
+class RowCsvItemExporter(CsvItemExporter):
+    def export_row(self, values):
+        """Writes values given in the order of fields_to_export, serialized the
+        way export_item serializes the fields of items."""
+        if self._headers_not_written:
+            with self._write_headers_lock:
+                if self._headers_not_written:
+                    self._write_headers_and_set_fields_to_export(None)
+                    self._headers_not_written = False
+        self.csv_writer.writerow([self._join_if_needed(value) for value in values])
+
+
+class RowJsonLinesItemExporter(JsonLinesItemExporter):
+    def export_row(self, values):
+        """Writes values given in the order of fields_to_export, encoded the way
+        export_item encodes items."""
+        itemdict = dict(zip(self.fields_to_export, values))
+        data = self.encoder.encode(itemdict) + "\n"
+        self.file.write(to_bytes(data, self.encoding))
@@ -0,0 +1,84 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+from iconetl.jobs.exporters.blocks_and_transactions_item_exporter import (
+    BLOCK_FIELDS_TO_EXPORT,
+    TRANSACTION_FIELDS_TO_EXPORT,
+)
+from iconetl.jobs.exporters.receipts_and_logs_item_exporter import (
+    LOG_FIELDS_TO_EXPORT,
+    RECEIPT_FIELDS_TO_EXPORT,
+)
+
+FIELDS_TO_EXPORT = {
+    "block": BLOCK_FIELDS_TO_EXPORT,
+    "transaction": TRANSACTION_FIELDS_TO_EXPORT,
+    "receipt": RECEIPT_FIELDS_TO_EXPORT,
+    "log": LOG_FIELDS_TO_EXPORT,
+}
+
+
+def parse_fields(fields_string):
+    """Parses comma separated item_type.field names, e.g. "block.number,
+    transaction.hash", into the fields to export per item type. Fields keep the
+    order of the default columns. Item types without listed fields are left out
+    and keep all their columns."""
+    if fields_string is None:
+        return None
+    fields = {}
+    for name in fields_string.split(","):
+        name = name.strip()
+        if name == "":
+            continue
+        item_type, _, field = name.partition(".")
+        if (
+            item_type not in FIELDS_TO_EXPORT
+            or field not in FIELDS_TO_EXPORT[item_type]
+        ):
+            raise ValueError(
+                "Unknown field {}. Fields are given as item_type.field, e.g. "
+                "block.number".format(name)
+            )
+        fields.setdefault(item_type, set()).add(field)
+    return {
+        item_type: [
+            field for field in FIELDS_TO_EXPORT[item_type] if field in fields[item_type]
+        ]
+        for item_type in fields
+    }
+
+
+def with_required_fields(fields, item_type, required_fields):
+    """Returns fields with required_fields of item_type added, for fields which
+    are needed although they are not exported."""
+    if fields is None or item_type not in fields:
+        return fields
+    return dict(
+        fields,
+        **{
+            item_type: [
+                field
+                for field in FIELDS_TO_EXPORT[item_type]
+                if field in fields[item_type] or field in required_fields
+            ]
+        }
+    )
@@ -0,0 +1,112 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import threading
+import time
+
+from iconetl.misc.closable_queue import ClosableQueue, QueueAbortedError
+
+# Batches of items, as handed over by one export_items call
+DEFAULT_QUEUE_SIZE = 100
+
+
+# Hands batches of items from the worker threads of export jobs to a single writer
+# thread through a bounded queue, so that fetching and mapping do not wait on file
+# writes. Workers block while the queue is full. The time workers spend blocked,
+# the time the writer waits for items and the queue depth are counted in metrics
+# under the name of the exporter, which tells whether fetching or writing is the
+# slow stage. A failure of the writer is raised to workers and from close.
+class QueuedItemExporter(object):
+    def __init__(
+        self, item_exporter, queue_size=DEFAULT_QUEUE_SIZE, name="writer", metrics=None
+    ):
+        self.item_exporter = item_exporter
+        self.queue_size = queue_size
+        self.name = name
+        self.metrics = metrics
+        self._queue = None
+        self._thread = None
+        self._error = None
+
+    def open(self):
+        self.item_exporter.open()
+        self._queue = ClosableQueue(self.queue_size)
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._write, name="QueuedItemExporter", daemon=True
+        )
+        self._thread.start()
+
+    def export_items(self, items):
+        if len(items) == 0:
+            return
+        start_time = time.time()
+        try:
+            self._queue.put(items)
+        except QueueAbortedError as e:
+            raise QueueAbortedError(
+                "The {} failed: {!r}".format(self.name, self._error)
+            ) from e
+        self._increment("blocked_seconds", time.time() - start_time)
+        self._increment("batches")
+        self._increment("queued_batches", self._queue.qsize())
+
+    def export_item(self, item):
+        self.export_items([item])
+
+    def close(self):
+        self._queue.close()
+        self._thread.join()
+        try:
+            if self._error is not None:
+                raise self._error
+        finally:
+            self.item_exporter.close()
+
+    def _write(self):
+        try:
+            wait_start_time = time.time()
+            for items in self._queue:
+                self._increment("idle_seconds", time.time() - wait_start_time)
+                self.item_exporter.export_items(items)
+                wait_start_time = time.time()
+        except BaseException as e:
+            self._error = e
+            self._queue.abort()
+
+    def _increment(self, metric, value=1):
+        if self.metrics is not None:
+            self.metrics.increment("{}_{}".format(self.name, metric), value)
+
+
+def get_writer_stats(metrics, name):
+    """Returns the average queue depth seen by workers, the seconds workers were
+    blocked on a full queue and the seconds the writer waited for items."""
+    batches = metrics.get("{}_batches".format(name))
+    average_depth = (
+        metrics.get("{}_queued_batches".format(name)) / batches if batches else 0
+    )
+    return (
+        round(average_depth, 1),
+        round(metrics.get("{}_blocked_seconds".format(name)), 3),
+        round(metrics.get("{}_idle_seconds".format(name)), 3),
+    )
@@ -20,8 +20,7 @@
 #  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 
-from blockchainetl_common.jobs.exporters.composite_item_exporter import \
-    CompositeItemExporter
+from iconetl.jobs.exporters.composite_item_exporter import CompositeItemExporter
 
 RECEIPT_FIELDS_TO_EXPORT = [
     "transaction_hash",
@@ -47,11 +46,13 @@ LOG_FIELDS_TO_EXPORT = [
 ]
 
 
-def receipts_and_logs_item_exporter(receipts_output=None, logs_output=None):
+def receipts_and_logs_item_exporter(
+    receipts_output=None, logs_output=None, fields=None
+):
     return CompositeItemExporter(
         filename_mapping={"receipt": receipts_output, "log": logs_output},
-        field_mapping={
-            "receipt": RECEIPT_FIELDS_TO_EXPORT,
-            "log": LOG_FIELDS_TO_EXPORT,
-        },
+        field_mapping=dict(
+            {"receipt": RECEIPT_FIELDS_TO_EXPORT, "log": LOG_FIELDS_TO_EXPORT},
+            **(fields or {})
+        ),
     )
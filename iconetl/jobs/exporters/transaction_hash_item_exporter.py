@@ -0,0 +1,88 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import threading
+
+from blockchainetl_common.file_utils import close_silently, get_file_handle
+
+
+# Passes items on to the given exporter and puts the unique hashes of exported
+# transactions on a queue, so that receipts can be exported while blocks are
+# still being exported. Hashes are also written to transaction_hashes_file if
+# it is set, which helps debugging. If item_types is set, only items of these
+# types are passed on, e.g. to export receipts without writing transactions.
+class TransactionHashItemExporter(object):
+    def __init__(
+        self,
+        item_exporter,
+        transaction_hash_queue,
+        transaction_hashes_file=None,
+        item_types=None,
+    ):
+        self.item_exporter = item_exporter
+        self.transaction_hash_queue = transaction_hash_queue
+        self.transaction_hashes_file = transaction_hashes_file
+        self.item_types = item_types
+        self._file = None
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def open(self):
+        self.item_exporter.open()
+        if self.transaction_hashes_file is not None:
+            self._file = get_file_handle(self.transaction_hashes_file, "w")
+
+    def export_items(self, items):
+        if self.item_types is None:
+            self.item_exporter.export_items(items)
+        else:
+            self.item_exporter.export_items(
+                [item for item in items if item.get("type") in self.item_types]
+            )
+        for item in items:
+            self._queue_transaction_hash(item)
+
+    def export_item(self, item):
+        if self.item_types is None or item.get("type") in self.item_types:
+            self.item_exporter.export_item(item)
+        self._queue_transaction_hash(item)
+
+    def _queue_transaction_hash(self, item):
+        if item.get("type") != "transaction":
+            return
+        transaction_hash = item.get("hash")
+        # Export jobs call exporters from several worker threads
+        with self._lock:
+            if transaction_hash in self._seen:
+                return
+            self._seen.add(transaction_hash)
+            if self._file is not None:
+                self._file.write(transaction_hash + "\n")
+        self.transaction_hash_queue.put(transaction_hash)
+
+    def close(self):
+        try:
+            self.item_exporter.close()
+            if self._file is not None:
+                close_silently(self._file)
+        finally:
+            self.transaction_hash_queue.close()
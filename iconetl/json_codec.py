@@ -0,0 +1,110 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+# JSON encoding and decoding with the fastest library installed: orjson, pysimdjson
+# or ujson, in that order, falling back to the standard library. Fast libraries
+# are limited to 64 bit integers, so payloads which may contain larger ones are
+# handled by the standard library. Output files are not written with this module:
+# fast libraries format JSON differently from the standard library.
+
+import json
+import re
+
+from blockchainetl_common.exporters import EncodeDecimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# 19 digits or more may not fit in 64 bits. Matches in strings only cost a fallback.
+BIG_INTEGER_PATTERN = re.compile(rb"\d{19,}")
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, default=EncodeDecimal)
+
+
+def _stdlib_loads(data):
+    return json.loads(data)
+
+
+def _select_backend():
+    if orjson is not None:
+        return (
+            "orjson",
+            orjson.loads,
+            lambda obj: orjson.dumps(obj, default=EncodeDecimal),
+        )
+    if simdjson is not None:
+        return "simdjson", simdjson.loads, None
+    if ujson is not None:
+        return "ujson", ujson.loads, lambda obj: ujson.dumps(obj).encode("utf-8")
+    return "json", None, None
+
+
+BACKEND, _fast_loads, _fast_dumps = _select_backend()
+
+
+def get_backend():
+    """Returns the name of the JSON library in use."""
+    return BACKEND
+
+
+def dumps_bytes(obj):
+    """Serializes obj to UTF-8 encoded JSON."""
+    if _fast_dumps is not None:
+        try:
+            return _fast_dumps(obj)
+        except (TypeError, OverflowError):
+            # Integers beyond 64 bits
+            pass
+    return _stdlib_dumps(obj).encode("utf-8")
+
+
+def dumps(obj):
+    """Serializes obj to a JSON string."""
+    if _fast_dumps is not None:
+        return dumps_bytes(obj).decode("utf-8")
+    return _stdlib_dumps(obj)
+
+
+def loads(data):
+    """Deserializes JSON from bytes or a string."""
+    if _fast_loads is None:
+        return _stdlib_loads(data)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    # Fast libraries turn big integers into floats or fail on them
+    if BIG_INTEGER_PATTERN.search(data) is not None:
+        return _stdlib_loads(data)
+    return _fast_loads(data)
@@ -38,6 +38,10 @@ def generate_get_receipt_json_rpc(transaction_hashes):
         )
 
 
+def generate_get_last_block_json_rpc(request_id=0):
+    return {"jsonrpc": "2.0", "method": "icx_getLastBlock", "id": request_id}
+
+
 def generate_json_rpc(method, params, request_id=1):
     return {
         "jsonrpc": "2.0",
@@ -26,11 +26,13 @@ from iconetl.utils import hex_to_dec
 
 
 class IcxBlockMapper(object):
-    def __init__(self, transaction_mapper=None):
+    def __init__(self, transaction_mapper=None, map_transactions=True):
         if transaction_mapper is None:
             self.transaction_mapper = IcxTransactionMapper()
         else:
             self.transaction_mapper = transaction_mapper
+        # Blocks keep transactions None when they are not exported
+        self.map_transactions = map_transactions
 
     def json_dict_to_block(self, json_dict):
         block = IcxBlock()
@@ -45,7 +47,7 @@ class IcxBlockMapper(object):
         block.signature = json_dict.get("signature")
         block.next_leader = json_dict.get("next_leader")
 
-        if "confirmed_transaction_list" in json_dict:
+        if self.map_transactions and "confirmed_transaction_list" in json_dict:
             block.transactions = [
                 self.transaction_mapper.json_dict_to_transaction(
                     tx, idx, block.hash, block.number, block.timestamp
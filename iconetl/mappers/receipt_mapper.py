@@ -26,11 +26,13 @@ from iconetl.utils import hex_to_dec, to_normalized_address
 
 
 class IcxReceiptMapper(object):
-    def __init__(self, receipt_log_mapper=None):
+    def __init__(self, receipt_log_mapper=None, map_logs=True):
         if receipt_log_mapper is None:
             self.receipt_log_mapper = IcxReceiptLogMapper()
         else:
             self.receipt_log_mapper = receipt_log_mapper
+        # Receipts keep no logs when they are not exported
+        self.map_logs = map_logs
 
     def json_dict_to_receipt(self, json_dict):
         receipt = IcxReceipt()
@@ -45,7 +47,7 @@ class IcxReceiptMapper(object):
         receipt.score_address = to_normalized_address(json_dict.get("scoreAddress"))
         receipt.status = hex_to_dec(json_dict.get("status"))
 
-        if "eventLogs" in json_dict:
+        if self.map_logs and "eventLogs" in json_dict:
             receipt.logs = [
                 self.receipt_log_mapper.json_dict_to_receipt_log(
                     log,
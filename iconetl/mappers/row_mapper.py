@@ -0,0 +1,253 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+from iconetl.domain.row import Row
+from iconetl.jobs.exporters.blocks_and_transactions_item_exporter import (
+    BLOCK_FIELDS_TO_EXPORT,
+    TRANSACTION_FIELDS_TO_EXPORT,
+)
+from iconetl.jobs.exporters.receipts_and_logs_item_exporter import (
+    LOG_FIELDS_TO_EXPORT,
+    RECEIPT_FIELDS_TO_EXPORT,
+)
+from iconetl.utils import fix_tx_hash, hex_to_dec, to_normalized_address
+
+
+class BlockRow(Row):
+    __slots__ = ()
+    item_type = "block"
+    field_names = BLOCK_FIELDS_TO_EXPORT
+
+
+class TransactionRow(Row):
+    __slots__ = ()
+    item_type = "transaction"
+    field_names = TRANSACTION_FIELDS_TO_EXPORT
+
+
+class ReceiptRow(Row):
+    __slots__ = ()
+    item_type = "receipt"
+    field_names = RECEIPT_FIELDS_TO_EXPORT
+
+
+class LogRow(Row):
+    __slots__ = ()
+    item_type = "log"
+    field_names = LOG_FIELDS_TO_EXPORT
+
+
+def _get(key):
+    return lambda json_dict, index, parent: json_dict.get(key)
+
+
+def _get_hex(key):
+    return lambda json_dict, index, parent: hex_to_dec(json_dict.get(key))
+
+
+def _get_parent(key):
+    return lambda json_dict, index, parent: parent[key]
+
+
+def _get_index(json_dict, index, parent):
+    return index
+
+
+def _get_transaction_hash(json_dict, index, parent):
+    if "tx_hash" in json_dict:
+        return fix_tx_hash(json_dict["tx_hash"])
+    if "txHash" in json_dict:
+        return fix_tx_hash(json_dict["txHash"])
+    return None
+
+
+def _get_transaction_index(json_dict, index, parent):
+    tx_index = json_dict.get("txIndex")
+    return hex_to_dec(tx_index) if tx_index else index
+
+
+def _get_log_data(json_dict, index, parent):
+    return [
+        item.replace("\n", "").replace('"', "'")
+        for item in json_dict.get("data")
+        if item
+    ]
+
+
+# How each field is read from JSON, used to map the fields listed in --fields only
+BLOCK_COLUMNS = {
+    "number": _get("height"),
+    "hash": _get("block_hash"),
+    "parent_hash": _get("prev_block_hash"),
+    "merkle_root_hash": _get("merkle_tree_root_hash"),
+    "timestamp": _get("time_stamp"),
+    "version": _get("version"),
+    "peer_id": _get("peer_id"),
+    "signature": _get("signature"),
+    "next_leader": _get("next_leader"),
+}
+
+TRANSACTION_COLUMNS = {
+    "version": _get("version"),
+    "from_address": _get("from"),
+    "to_address": _get("to"),
+    "value": lambda json_dict, index, parent: hex_to_dec(json_dict.get("value", 0)),
+    "step_limit": _get_hex("stepLimit"),
+    "timestamp": _get("timestamp"),
+    "nid": _get_hex("nid"),
+    "nonce": _get_hex("nonce"),
+    "hash": _get_transaction_hash,
+    "transaction_index": _get_transaction_index,
+    "block_hash": _get_parent("block_hash"),
+    "block_number": _get_parent("block_number"),
+    "fee": _get_hex("fee"),
+    "signature": _get("signature"),
+    "data_type": _get("dataType"),
+    "data": _get("data"),
+}
+
+RECEIPT_COLUMNS = {
+    "transaction_hash": _get("txHash"),
+    "transaction_index": _get_hex("txIndex"),
+    "block_hash": _get("blockHash"),
+    "block_number": _get_hex("blockHeight"),
+    "cumulative_step_used": _get_hex("cumulativeStepUsed"),
+    "step_used": _get_hex("stepUsed"),
+    "step_price": _get_hex("stepPrice"),
+    "score_address": lambda json_dict, index, parent: to_normalized_address(
+        json_dict.get("scoreAddress")
+    ),
+    "status": _get_hex("status"),
+}
+
+LOG_COLUMNS = {
+    "log_index": _get_index,
+    "transaction_hash": _get_parent("transaction_hash"),
+    "transaction_index": _get_parent("transaction_index"),
+    "block_hash": _get_parent("block_hash"),
+    "block_number": _get_parent("block_number"),
+    "address": _get("scoreAddress"),
+    "data": _get_log_data,
+    "indexed": _get("indexed"),
+}
+
+
+# Maps block and receipt JSON to the rows of their exported items, with the same
+# values as the block and receipt mappers followed by the *_to_dict methods.
+# Rows are built with the *_COLUMNS extractors in the order of the
+# *_FIELDS_TO_EXPORT columns they are declared with. fields maps item types to
+# the only fields to map, other fields are not read from JSON at all.
+# Extractors take the JSON of an item, its index in its parent and the values of
+# the parent its rows repeat.
+class IcxRowMapper(object):
+    def __init__(
+        self,
+        export_blocks=True,
+        export_transactions=True,
+        export_receipts=True,
+        export_logs=True,
+        fields=None,
+    ):
+        self.export_blocks = export_blocks
+        self.export_transactions = export_transactions
+        self.export_receipts = export_receipts
+        self.export_logs = export_logs
+        fields = fields if fields is not None else {}
+
+        self.block_row = _get_row_mapper(BlockRow, BLOCK_COLUMNS, fields)
+        self.transaction_row = _get_row_mapper(
+            TransactionRow, TRANSACTION_COLUMNS, fields
+        )
+        self.receipt_row = _get_row_mapper(ReceiptRow, RECEIPT_COLUMNS, fields)
+        self.log_row = _get_row_mapper(LogRow, LOG_COLUMNS, fields)
+
+    def json_dict_to_block_rows(self, json_dict):
+        rows = []
+        if self.export_blocks:
+            rows.append(self.block_row(json_dict, None, None))
+        if self.export_transactions and "confirmed_transaction_list" in json_dict:
+            block = {
+                "block_hash": BLOCK_COLUMNS["hash"](json_dict, None, None),
+                "block_number": BLOCK_COLUMNS["number"](json_dict, None, None),
+            }
+            rows.extend(
+                self.transaction_row(tx, idx, block)
+                for idx, tx in enumerate(json_dict["confirmed_transaction_list"])
+                if isinstance(tx, dict)
+            )
+        return rows
+
+    def json_dict_to_receipt_rows(self, json_dict):
+        rows = []
+        if self.export_receipts:
+            rows.append(self.receipt_row(json_dict, None, None))
+        if self.export_logs and "eventLogs" in json_dict:
+            receipt = {
+                name: RECEIPT_COLUMNS[name](json_dict, None, None)
+                for name in LOG_PARENT_FIELDS
+            }
+            rows.extend(
+                self.log_row(log, idx, receipt)
+                for idx, log in enumerate(json_dict["eventLogs"])
+            )
+        return rows
+
+
+# Receipt fields repeated in the rows of its logs
+LOG_PARENT_FIELDS = (
+    "transaction_hash",
+    "transaction_index",
+    "block_hash",
+    "block_number",
+)
+
+
+def _get_row_mapper(row_type, columns, fields):
+    field_names = fields.get(row_type.item_type, row_type.field_names)
+    return RowProjection(row_type, columns, field_names).json_dict_to_row
+
+
+# Maps JSON to rows of the given fields, of a subclass of row_type declared with
+# them unless they are all the fields of row_type
+class RowProjection(object):
+    def __init__(self, row_type, columns, field_names):
+        unknown_fields = [name for name in field_names if name not in columns]
+        if len(unknown_fields) > 0:
+            raise ValueError(
+                "Unknown {} fields: {}".format(
+                    row_type.item_type, ", ".join(unknown_fields)
+                )
+            )
+        if tuple(field_names) == row_type.field_names:
+            self.row_type = row_type
+        else:
+            self.row_type = type(
+                row_type.__name__,
+                (row_type,),
+                {"__slots__": (), "field_names": field_names},
+            )
+        self.extractors = [columns[name] for name in field_names]
+
+    def json_dict_to_row(self, json_dict, index, parent):
+        return self.row_type(
+            tuple([extract(json_dict, index, parent) for extract in self.extractors])
+        )
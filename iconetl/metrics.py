@@ -0,0 +1,72 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import threading
+
+
+# Thread safe named counters and gauges.
+class Metrics(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._gauges = set()
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + value
+
+    def set(self, name, value):
+        with self._lock:
+            self._values[name] = value
+            self._gauges.add(name)
+
+    def get(self, name, default=0):
+        with self._lock:
+            return self._values.get(name, default)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def counters(self):
+        """Returns the values of counters, which are incremented."""
+        with self._lock:
+            return {
+                name: value
+                for name, value in self._values.items()
+                if name not in self._gauges
+            }
+
+    def gauges(self):
+        """Returns the values of gauges, which are set."""
+        with self._lock:
+            return {name: self._values[name] for name in self._gauges}
+
+    def merge(self, counters, gauges=None):
+        """Adds counters and sets gauges from another Metrics, e.g. one in another
+        process."""
+        with self._lock:
+            for name, value in counters.items():
+                self._values[name] = self._values.get(name, 0) + value
+            for name, value in (gauges or {}).items():
+                self._values[name] = value
+                self._gauges.add(name)
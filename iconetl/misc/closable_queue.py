@@ -0,0 +1,84 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import queue
+
+# How often blocked producers check whether the consumer gave up
+ABORT_CHECK_SECONDS = 1
+
+_END = object()
+
+
+class QueueAbortedError(Exception):
+    pass
+
+
+# Bounded queue handing items from producer threads to a consumer iterating over
+# it. Producers block while the queue is full, which slows them down to the pace
+# of the consumer. Iteration ends once the queue is closed. A consumer which
+# fails aborts the queue so that producers raise instead of blocking forever.
+class ClosableQueue(object):
+    def __init__(self, maxsize=0):
+        self._queue = queue.Queue(maxsize)
+        self._closed = False
+        self._aborted = False
+
+    def put(self, item):
+        if self._closed:
+            raise ValueError("Cannot put items on a closed queue")
+        self._put(item)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._put(_END)
+        except QueueAbortedError:
+            pass
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def abort(self):
+        self._aborted = True
+
+    @property
+    def aborted(self):
+        return self._aborted
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            yield item
+
+    def _put(self, item):
+        while True:
+            if self._aborted:
+                raise QueueAbortedError("The consumer of the queue failed")
+            try:
+                self._queue.put(item, timeout=ABORT_CHECK_SECONDS)
+                return
+            except queue.Full:
+                continue
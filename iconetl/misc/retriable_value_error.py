@@ -1,2 +1,8 @@
-class RetriableValueError(ValueError):
+from blockchainetl_common.executors.retriable_value_error import (
+    RetriableValueError as CommonRetriableValueError,
+)
+
+
+# Subclasses the common error so that batch work executors retry it
+class RetriableValueError(CommonRetriableValueError):
     pass
@@ -0,0 +1,123 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import logging
+
+import aiohttp
+
+from iconetl import json_codec
+from iconetl.providers.compression import (
+    compress_request_body,
+    decode_body,
+    get_accept_encoding_header,
+)
+from iconetl.providers.session import DEFAULT_POOL_SIZE
+
+
+class AsyncBatchHTTPProvider(object):
+    logger = logging.getLogger("AsyncBatchHTTPProvider")
+
+    def __init__(
+        self,
+        endpoint_uri,
+        timeout,
+        pool_size=DEFAULT_POOL_SIZE,
+        metrics=None,
+        compression=True,
+        compress_requests_over=None,
+    ):
+        self.endpoint_uri = endpoint_uri
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.metrics = metrics
+        self.compression = compression
+        self.compress_requests_over = compress_requests_over
+        self._session = None
+
+    async def make_batch_request(self, text):
+        self.logger.debug(
+            "Making request HTTP. URI: %s, Request: %s", self.endpoint_uri, text
+        )
+        data = text if isinstance(text, bytes) else text.encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "Accept-Encoding": get_accept_encoding_header(self.compression),
+        }
+        if (
+            self.compress_requests_over is not None
+            and len(data) >= self.compress_requests_over
+        ):
+            data, headers["Content-Encoding"] = compress_request_body(data)
+        try:
+            async with self._get_session().post(
+                self.endpoint_uri, data=data, headers=headers
+            ) as raw_response:
+                raw_response.raise_for_status()
+                content = await raw_response.read()
+                content_encoding = raw_response.headers.get("Content-Encoding")
+        except aiohttp.ClientError as e:
+            # Surface as ConnectionError so that executors retry the batch
+            raise ConnectionError(str(e)) from e
+        response = json_codec.loads(
+            decode_body(content, content_encoding, self.metrics)
+        )
+        self.logger.debug(
+            "Getting response HTTP. URI: %s, " "Request: %s, Response: %s",
+            self.endpoint_uri,
+            text,
+            response,
+        )
+        return response
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        # The session is bound to the running event loop so it is created lazily
+        if self._session is None:
+            trace_configs = []
+            if self.metrics is not None:
+                trace_configs.append(_counting_trace_config(self.metrics))
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=trace_configs,
+                # Decoded by the provider to count bytes on wire
+                auto_decompress=False,
+            )
+        return self._session
+
+
+def _counting_trace_config(metrics):
+    # Uses the same metric names as the counting adapter of requests sessions
+    async def on_request_start(session, context, params):
+        metrics.increment("http_requests")
+
+    async def on_connection_create_end(session, context, params):
+        metrics.increment("connections_opened")
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    return trace_config
@@ -22,19 +22,107 @@
 
 from urllib.parse import urlparse
 
+from iconetl.providers.load_balanced import LoadBalancedBatchProvider
 from iconetl.providers.rpc import BatchHTTPProvider
+from iconetl.providers.session import DEFAULT_POOL_SIZE
 from web3 import HTTPProvider
 
 DEFAULT_TIMEOUT = 60
 
+ASYNC_SCHEME_PREFIX = "async_"
+
+
+def is_async_provider_uri(uri_string):
+    # urlparse does not accept "_" in schemes so the prefix is checked by hand
+    return uri_string.startswith(ASYNC_SCHEME_PREFIX)
+
+
+def strip_async_prefix(uri_string):
+    if is_async_provider_uri(uri_string):
+        return uri_string[len(ASYNC_SCHEME_PREFIX) :]
+    return uri_string
+
+
+def get_provider_from_uri(
+    uri_string,
+    timeout=DEFAULT_TIMEOUT,
+    batch=False,
+    session=None,
+    pool_size=DEFAULT_POOL_SIZE,
+    metrics=None,
+    stream_responses=False,
+    compression=True,
+    compress_requests_over=None,
+):
+    if "," in uri_string:
+        return get_load_balanced_provider_from_uris(
+            uri_string.split(","),
+            timeout=timeout,
+            batch=batch,
+            session=session,
+            metrics=metrics,
+            stream_responses=stream_responses,
+            compression=compression,
+            compress_requests_over=compress_requests_over,
+        )
+
+    if is_async_provider_uri(uri_string):
+        if stream_responses:
+            raise ValueError("Async providers do not support streaming responses")
+        return get_async_provider_from_uri(
+            strip_async_prefix(uri_string),
+            timeout=timeout,
+            batch=batch,
+            pool_size=pool_size,
+            metrics=metrics,
+            compression=compression,
+            compress_requests_over=compress_requests_over,
+        )
 
-def get_provider_from_uri(uri_string, timeout=DEFAULT_TIMEOUT, batch=False):
     uri = urlparse(uri_string)
     if uri.scheme == "http" or uri.scheme == "https":
         request_kwargs = {"timeout": timeout}
         if batch:
-            return BatchHTTPProvider(uri_string, request_kwargs=request_kwargs)
+            return BatchHTTPProvider(
+                uri_string,
+                request_kwargs=request_kwargs,
+                session=session,
+                stream_responses=stream_responses,
+                compression=compression,
+                compress_requests_over=compress_requests_over,
+                metrics=metrics,
+            )
         else:
             return HTTPProvider(uri_string, request_kwargs=request_kwargs)
     else:
         raise ValueError("Unknown uri scheme {}".format(uri_string))
+
+
+def get_async_provider_from_uri(uri_string, timeout, batch, pool_size, **kwargs):
+    uri = urlparse(uri_string)
+    if uri.scheme == "http" or uri.scheme == "https":
+        if not batch:
+            raise ValueError("Async providers only support batch requests")
+        # aiohttp is an optional dependency
+        from iconetl.providers.async_rpc import AsyncBatchHTTPProvider
+
+        return AsyncBatchHTTPProvider(
+            uri_string, timeout=timeout, pool_size=pool_size, **kwargs
+        )
+    else:
+        raise ValueError(
+            "Unknown uri scheme {}".format(ASYNC_SCHEME_PREFIX + uri_string)
+        )
+
+
+def get_load_balanced_provider_from_uris(uri_strings, batch, **kwargs):
+    if not batch:
+        raise ValueError("Multiple endpoints are only supported for batch requests")
+    if any(is_async_provider_uri(uri_string) for uri_string in uri_strings):
+        raise ValueError("Multiple endpoints are not supported for async providers")
+    return LoadBalancedBatchProvider(
+        [
+            get_provider_from_uri(uri_string.strip(), batch=True, **kwargs)
+            for uri_string in uri_strings
+        ]
+    )
@@ -0,0 +1,165 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import threading
+
+from iconetl import json_codec
+from iconetl.metrics import Metrics
+from iconetl.providers.rpc import get_last_response_size
+
+# Results of these methods never change once available
+CACHEABLE_METHODS = ("icx_getBlockByHeight", "icx_getTransactionResult")
+
+
+class CacheMissError(ValueError):
+    pass
+
+
+# Serves block and receipt requests from a response cache, forwarding only the
+# requests it misses to the wrapped provider and caching their results. With
+# replay_only, requests missing from the cache fail instead.
+class CachingBatchProvider(object):
+    def __init__(self, batch_web3_provider, cache, replay_only=False, metrics=None):
+        self.batch_web3_provider = batch_web3_provider
+        self.cache = cache
+        self.replay_only = replay_only
+        self.metrics = metrics if metrics is not None else Metrics()
+        self._thread_local = threading.local()
+
+    @property
+    def stream_responses(self):
+        return getattr(self.batch_web3_provider, "stream_responses", False)
+
+    def make_batch_request(self, text):
+        rpc_requests = json_codec.loads(text)
+        response, missed_requests = self._get_cached_response(rpc_requests)
+        if len(missed_requests) == 0:
+            return response
+
+        self._thread_local.forwarded = True
+        forwarded_response = self.batch_web3_provider.make_batch_request(
+            json_codec.dumps_bytes(missed_requests)
+        )
+        if not isinstance(forwarded_response, list):
+            return forwarded_response
+        self._cache_results(missed_requests, forwarded_response)
+        return response + forwarded_response
+
+    def iter_batch_request(self, text):
+        """Yields the cached items of the batch response, then the items of the
+        requests missing from the cache as the wrapped provider streams them."""
+        rpc_requests = json_codec.loads(text)
+        response, missed_requests = self._get_cached_response(rpc_requests)
+        yield from response
+        if len(missed_requests) == 0:
+            return
+
+        self._thread_local.forwarded = True
+        key_by_id = _build_cache_keys_by_id(missed_requests)
+        results = {}
+        for response_item in self.batch_web3_provider.iter_batch_request(
+            json_codec.dumps_bytes(missed_requests)
+        ):
+            _add_result(results, key_by_id, response_item)
+            yield response_item
+        self.cache.put_many(results)
+
+    def _get_cached_response(self, rpc_requests):
+        self._thread_local.forwarded = False
+        keys = [build_cache_key(rpc_request) for rpc_request in rpc_requests]
+        cached_results = self.cache.get_many([key for key in keys if key is not None])
+
+        response = []
+        missed_requests = []
+        for rpc_request, key in zip(rpc_requests, keys):
+            cached_result = cached_results.get(key)
+            if cached_result is None:
+                missed_requests.append(rpc_request)
+                continue
+            response.append(
+                {
+                    "jsonrpc": "2.0",
+                    "id": rpc_request["id"],
+                    "result": json_codec.loads(cached_result),
+                }
+            )
+        self.metrics.increment("rpc_cache_hits", len(response))
+        self.metrics.increment("rpc_cache_misses", len(missed_requests))
+
+        if len(missed_requests) > 0 and self.replay_only:
+            raise CacheMissError(
+                "{} requests are not in the cache, e.g. {}".format(
+                    len(missed_requests), missed_requests[0]
+                )
+            )
+        return response, missed_requests
+
+    def get_last_response_size(self):
+        if not getattr(self._thread_local, "forwarded", False):
+            return None
+        return get_last_response_size(self.batch_web3_provider)
+
+    def _cache_results(self, rpc_requests, response):
+        key_by_id = _build_cache_keys_by_id(rpc_requests)
+        results = {}
+        for response_item in response:
+            _add_result(results, key_by_id, response_item)
+        self.cache.put_many(results)
+
+
+def _build_cache_keys_by_id(rpc_requests):
+    return {
+        rpc_request["id"]: build_cache_key(rpc_request) for rpc_request in rpc_requests
+    }
+
+
+def _add_result(results, key_by_id, response_item):
+    key = key_by_id.get(response_item.get("id"))
+    result = response_item.get("result")
+    if key is not None and result is not None:
+        results[key] = json_codec.dumps_bytes(result)
+
+
+def build_cache_key(rpc_request):
+    """Builds the key of a request in the format of the test resource file names,
+    e.g. icx_getBlockByHeight_0x9d8a0c. Returns None for methods not cached."""
+    method = rpc_request.get("method")
+    if method not in CACHEABLE_METHODS:
+        return None
+    params = rpc_request.get("params") or {}
+    return "_".join([method] + [_param_to_str(params[name]) for name in sorted(params)])
+
+
+def _param_to_str(param):
+    if isinstance(param, dict):
+        return "_".join(
+            [str(key) + "_" + _param_to_str(param[key]) for key in sorted(param)]
+        )
+    elif isinstance(param, list):
+        return "_".join([_param_to_str(param_item) for param_item in param])
+    else:
+        return str(param).lower()
+
+
+def get_cache_stats(metrics):
+    """Returns the number of requests served from and missing from the cache."""
+    return metrics.get("rpc_cache_hits"), metrics.get("rpc_cache_misses")
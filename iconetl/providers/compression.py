@@ -0,0 +1,157 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import gzip
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP = "gzip"
+DEFLATE = "deflate"
+ZSTD = "zstd"
+IDENTITY = "identity"
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def get_supported_encodings():
+    encodings = [GZIP, DEFLATE]
+    if zstandard is not None:
+        encodings.insert(0, ZSTD)
+    return encodings
+
+
+def get_accept_encoding_header(compression=True):
+    return ", ".join(get_supported_encodings()) if compression else IDENTITY
+
+
+def compress_request_body(data):
+    """Returns the gzip compressed body and the Content-Encoding to send it with."""
+    return gzip.compress(data), GZIP
+
+
+def new_decoder(content_encoding):
+    encoding = (content_encoding or IDENTITY).strip().lower()
+    if encoding == IDENTITY:
+        return _IdentityDecoder()
+    if encoding == GZIP:
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == DEFLATE:
+        return _DeflateDecoder()
+    if encoding == ZSTD and zstandard is not None:
+        return _ZstdDecoder()
+    raise ValueError("Unsupported Content-Encoding {}".format(content_encoding))
+
+
+def decode_body(data, content_encoding, metrics=None):
+    """Decodes a whole response body, counting bytes on the wire and decoded."""
+    decoder = new_decoder(content_encoding)
+    decoded = decoder.decompress(data) + decoder.flush()
+    _count_bytes(metrics, len(data), len(decoded))
+    return decoded
+
+
+def get_compression_stats(metrics):
+    """Returns response bytes received on the wire and after decoding."""
+    return metrics.get("http_bytes_on_wire"), metrics.get("http_bytes_decoded")
+
+
+def _count_bytes(metrics, bytes_on_wire, bytes_decoded):
+    if metrics is not None:
+        metrics.increment("http_bytes_on_wire", bytes_on_wire)
+        metrics.increment("http_bytes_decoded", bytes_decoded)
+
+
+# File-like reader decoding a response body as it is read, for incremental parsing
+class DecodingReader(object):
+    def __init__(self, read_raw, content_encoding, metrics=None):
+        self.read_raw = read_raw
+        self.decoder = new_decoder(content_encoding)
+        self.metrics = metrics
+        self.bytes_on_wire = 0
+        self.bytes_decoded = 0
+        self._buffer = b""
+        self._eof = False
+
+    def read(self, size=-1):
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk = self.read_raw(READ_CHUNK_SIZE)
+            if chunk:
+                self.bytes_on_wire += len(chunk)
+                self._buffer += self.decoder.decompress(chunk)
+            else:
+                self._buffer += self.decoder.flush()
+                self._eof = True
+                _count_bytes(
+                    self.metrics,
+                    self.bytes_on_wire,
+                    self.bytes_decoded + len(self._buffer),
+                )
+
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self.bytes_decoded += len(data)
+        return data
+
+
+class _IdentityDecoder(object):
+    def decompress(self, data):
+        return data
+
+    def flush(self):
+        return b""
+
+
+# Servers disagree on whether deflate means zlib wrapped or raw deflate data
+class _DeflateDecoder(object):
+    def __init__(self):
+        self._decoder = zlib.decompressobj()
+        self._detected = False
+
+    def decompress(self, data):
+        if self._detected:
+            return self._decoder.decompress(data)
+        self._detected = True
+        try:
+            return self._decoder.decompress(data)
+        except zlib.error:
+            self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._decoder.decompress(data)
+
+    def flush(self):
+        return self._decoder.flush()
+
+
+class _ZstdDecoder(object):
+    def __init__(self):
+        self._decoder = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data):
+        return self._decoder.decompress(data)
+
+    def flush(self):
+        return b""
@@ -0,0 +1,184 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import logging
+import random
+import threading
+import time
+
+from iconetl.providers.rpc import get_last_response_size
+
+DEFAULT_COOLDOWN_SECONDS = 30
+DEFAULT_MAX_CONSECUTIVE_ERRORS = 3
+
+# Weight of the latest observation in the moving averages
+SMOOTHING_FACTOR = 0.2
+# Assumed latency of endpoints which have not answered yet, so they get tried
+INITIAL_LATENCY_SECONDS = 0.1
+MIN_SUCCESS_WEIGHT = 0.05
+
+
+# Spreads batch requests across several endpoints, weighted by their observed
+# latency and error rate. Endpoints failing repeatedly are taken out of rotation
+# for a cool-down period. Thread safe as long as the wrapped providers are.
+class LoadBalancedBatchProvider(object):
+    def __init__(
+        self,
+        providers,
+        cooldown_seconds=DEFAULT_COOLDOWN_SECONDS,
+        max_consecutive_errors=DEFAULT_MAX_CONSECUTIVE_ERRORS,
+    ):
+        if len(providers) == 0:
+            raise ValueError("At least one provider is required")
+        self.providers = providers
+        self.health = [EndpointHealth(provider.endpoint_uri) for provider in providers]
+        self.cooldown_seconds = cooldown_seconds
+        self.max_consecutive_errors = max_consecutive_errors
+        self._lock = threading.Lock()
+        self._thread_local = threading.local()
+        self.logger = logging.getLogger("LoadBalancedBatchProvider")
+
+    def make_batch_request(self, text):
+        index = self._choose_endpoint()
+        self._thread_local.last_index = index
+        start_time = time.time()
+        try:
+            response = self.providers[index].make_batch_request(text)
+        except Exception:
+            self._record_failure(index)
+            raise
+
+        if _has_missing_results(response):
+            self._record_failure(index)
+        else:
+            self._record_success(index, time.time() - start_time)
+        return response
+
+    @property
+    def stream_responses(self):
+        return all(
+            getattr(provider, "stream_responses", False) for provider in self.providers
+        )
+
+    def iter_batch_request(self, text):
+        index = self._choose_endpoint()
+        self._thread_local.last_index = index
+        start_time = time.time()
+        has_missing_results = False
+        try:
+            for response_item in self.providers[index].iter_batch_request(text):
+                has_missing_results |= response_item.get("result") is None
+                yield response_item
+        except Exception:
+            self._record_failure(index)
+            raise
+
+        if has_missing_results:
+            self._record_failure(index)
+        else:
+            self._record_success(index, time.time() - start_time)
+
+    def get_last_response_size(self):
+        index = getattr(self._thread_local, "last_index", None)
+        if index is None:
+            return None
+        return get_last_response_size(self.providers[index])
+
+    def _choose_endpoint(self):
+        now = time.time()
+        with self._lock:
+            available = [
+                index
+                for index, health in enumerate(self.health)
+                if health.is_available(now)
+            ]
+            if len(available) == 0:
+                # All endpoints are cooling down, use the one recovering first
+                return min(
+                    range(len(self.health)),
+                    key=lambda index: self.health[index].cooldown_until,
+                )
+            weights = [self.health[index].weight() for index in available]
+        return random.choices(available, weights=weights)[0]
+
+    def _record_success(self, index, latency):
+        with self._lock:
+            self.health[index].record_success(latency)
+
+    def _record_failure(self, index):
+        with self._lock:
+            health = self.health[index]
+            health.record_failure()
+            if health.consecutive_errors >= self.max_consecutive_errors:
+                health.cool_down(time.time() + self.cooldown_seconds)
+                self.logger.warning(
+                    "{} failed {} times in a row and is taken out of rotation "
+                    "for {} seconds.".format(
+                        health.endpoint_uri,
+                        self.max_consecutive_errors,
+                        self.cooldown_seconds,
+                    )
+                )
+
+
+class EndpointHealth(object):
+    def __init__(self, endpoint_uri):
+        self.endpoint_uri = endpoint_uri
+        self.latency = None
+        self.error_rate = 0.0
+        self.consecutive_errors = 0
+        self.cooldown_until = 0
+
+    def record_success(self, latency):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = _smooth(self.latency, latency)
+        self.error_rate = _smooth(self.error_rate, 0.0)
+        self.consecutive_errors = 0
+
+    def record_failure(self):
+        self.error_rate = _smooth(self.error_rate, 1.0)
+        self.consecutive_errors += 1
+
+    def cool_down(self, until):
+        self.cooldown_until = until
+        self.consecutive_errors = 0
+
+    def is_available(self, now):
+        return self.cooldown_until <= now
+
+    def weight(self):
+        latency = self.latency if self.latency is not None else INITIAL_LATENCY_SECONDS
+        success_rate = max(1.0 - self.error_rate, MIN_SUCCESS_WEIGHT)
+        return success_rate / max(latency, 0.001)
+
+
+def _has_missing_results(response):
+    # A node which is behind returns items without results
+    if not isinstance(response, list):
+        return True
+    return any(item.get("result") is None for item in response)
+
+
+def _smooth(average, value):
+    return (1 - SMOOTHING_FACTOR) * average + SMOOTHING_FACTOR * value
@@ -0,0 +1,245 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_MAX_SIZE_BYTES = 10 * 1024**3
+DEFAULT_SEGMENT_SIZE_BYTES = 64 * 1024**2
+
+# SQLite limits the number of variables in a statement
+MAX_KEYS_PER_QUERY = 500
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS segments ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+    "size INTEGER NOT NULL, "
+    "last_access REAL NOT NULL, "
+    "writer_pid INTEGER)",
+    "CREATE TABLE IF NOT EXISTS entries ("
+    "key TEXT PRIMARY KEY, "
+    "segment_id INTEGER NOT NULL, "
+    "offset INTEGER NOT NULL, "
+    "length INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS entries_segment_id ON entries (segment_id)",
+]
+
+
+# Key-value store for RPC results on disk. Values are compressed and appended to
+# segment files, indexed by a SQLite database. When the cache grows over
+# max_size_bytes the least recently used segments are removed as a whole.
+# Each instance appends to segments of its own, so that several processes can
+# share a cache directory. Segments are marked with the pid of the process
+# appending to them and are not evicted while that process is alive. Thread safe.
+class SegmentedResponseCache(object):
+    def __init__(
+        self,
+        cache_dir,
+        max_size_bytes=DEFAULT_MAX_SIZE_BYTES,
+        segment_size_bytes=DEFAULT_SEGMENT_SIZE_BYTES,
+    ):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.segment_size_bytes = segment_size_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            os.path.join(cache_dir, "index.sqlite"),
+            timeout=60,
+            check_same_thread=False,
+        )
+        with self._connection:
+            for statement in SCHEMA:
+                self._connection.execute(statement)
+            self._add_writer_pid_column()
+        self._segment_id = None
+        self._segment_file = None
+        self._segment_size = 0
+        self.logger = logging.getLogger("SegmentedResponseCache")
+
+    def get_many(self, keys):
+        """Returns a dict with the values found for the given keys."""
+        values = {}
+        with self._lock:
+            rows = []
+            for index in range(0, len(keys), MAX_KEYS_PER_QUERY):
+                chunk = keys[index : index + MAX_KEYS_PER_QUERY]
+                rows.extend(
+                    self._connection.execute(
+                        "SELECT key, segment_id, offset, length FROM entries "
+                        "WHERE key IN ({})".format(",".join("?" * len(chunk))),
+                        chunk,
+                    )
+                )
+
+            accessed_segment_ids = set()
+            for key, segment_id, offset, length in rows:
+                value = self._read(segment_id, offset, length)
+                if value is not None:
+                    values[key] = value
+                    accessed_segment_ids.add(segment_id)
+
+            if len(accessed_segment_ids) > 0:
+                now = time.time()
+                with self._connection:
+                    self._connection.executemany(
+                        "UPDATE segments SET last_access = ? WHERE id = ?",
+                        [(now, segment_id) for segment_id in accessed_segment_ids],
+                    )
+        return values
+
+    def put_many(self, values):
+        """Stores the given dict of keys and bytes values."""
+        if len(values) == 0:
+            return
+        with self._lock:
+            entries = []
+            for key, value in values.items():
+                data = zlib.compress(value)
+                if (
+                    self._segment_file is None
+                    or self._segment_size + len(data) > self.segment_size_bytes
+                ):
+                    self._open_new_segment()
+                self._segment_file.write(data)
+                entries.append((key, self._segment_id, self._segment_size, len(data)))
+                self._segment_size += len(data)
+            # Readers open segment files on their own
+            self._segment_file.flush()
+
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO entries (key, segment_id, offset, length) "
+                    "VALUES (?, ?, ?, ?)",
+                    entries,
+                )
+                self._connection.execute(
+                    "UPDATE segments SET size = ?, last_access = ? WHERE id = ?",
+                    (self._segment_size, time.time(), self._segment_id),
+                )
+            self._evict()
+
+    def get_size(self):
+        with self._lock:
+            return self._get_size()
+
+    def close(self):
+        with self._lock:
+            if self._segment_file is not None:
+                self._close_segment()
+            self._connection.close()
+
+    def _add_writer_pid_column(self):
+        # Index databases created before segments had writers
+        columns = [
+            row[1] for row in self._connection.execute("PRAGMA table_info(segments)")
+        ]
+        if "writer_pid" not in columns:
+            try:
+                self._connection.execute(
+                    "ALTER TABLE segments ADD COLUMN writer_pid INTEGER"
+                )
+            except sqlite3.OperationalError:
+                # Added by another process in the meantime
+                pass
+
+    def _open_new_segment(self):
+        if self._segment_file is not None:
+            self._close_segment()
+        with self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO segments (size, last_access, writer_pid) VALUES (0, ?, ?)",
+                (time.time(), os.getpid()),
+            )
+        self._segment_id = cursor.lastrowid
+        self._segment_file = open(self._segment_path(self._segment_id), "ab")
+        self._segment_size = 0
+
+    def _close_segment(self):
+        self._segment_file.close()
+        self._segment_file = None
+        with self._connection:
+            self._connection.execute(
+                "UPDATE segments SET writer_pid = NULL WHERE id = ?",
+                (self._segment_id,),
+            )
+
+    def _read(self, segment_id, offset, length):
+        try:
+            with open(self._segment_path(segment_id), "rb") as segment_file:
+                segment_file.seek(offset)
+                return zlib.decompress(segment_file.read(length))
+        except (OSError, zlib.error):
+            # Evicted by another process in the meantime
+            return None
+
+    def _evict(self):
+        size = self._get_size()
+        if size <= self.max_size_bytes:
+            return
+        rows = self._connection.execute(
+            "SELECT id, size, writer_pid FROM segments WHERE id != ? "
+            "ORDER BY last_access, id",
+            (self._segment_id,),
+        ).fetchall()
+        for segment_id, segment_size, writer_pid in rows:
+            if size <= self.max_size_bytes:
+                break
+            # Other processes still append to their segments
+            if writer_pid is not None and is_process_alive(writer_pid):
+                continue
+            with self._connection:
+                self._connection.execute(
+                    "DELETE FROM entries WHERE segment_id = ?", (segment_id,)
+                )
+                self._connection.execute(
+                    "DELETE FROM segments WHERE id = ?", (segment_id,)
+                )
+            try:
+                os.remove(self._segment_path(segment_id))
+            except OSError:
+                pass
+            self.logger.debug("Evicted cache segment {}".format(segment_id))
+            size -= segment_size
+
+    def _get_size(self):
+        return self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM segments"
+        ).fetchone()[0]
+
+    def _segment_path(self, segment_id):
+        return os.path.join(self.cache_dir, "segment_{:08d}.bin".format(segment_id))
+
+
+def is_process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Owned by another user
+        return True
+    return True
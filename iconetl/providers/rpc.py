@@ -20,20 +20,58 @@
 #  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 
+import threading
+
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
 from web3 import HTTPProvider
-from web3._utils.request import make_post_request
+
+from iconetl import json_codec
+from iconetl.misc.retriable_value_error import RetriableValueError
+from iconetl.providers.compression import (
+    DecodingReader,
+    compress_request_body,
+    decode_body,
+    get_accept_encoding_header,
+)
+from iconetl.providers.session import create_session
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 
 class BatchHTTPProvider(HTTPProvider):
+    def __init__(
+        self,
+        endpoint_uri,
+        request_kwargs=None,
+        session=None,
+        stream_responses=False,
+        compression=True,
+        compress_requests_over=None,
+        metrics=None,
+    ):
+        super().__init__(endpoint_uri, request_kwargs=request_kwargs)
+        if stream_responses and ijson is None:
+            raise ValueError("Streaming responses requires ijson to be installed")
+        # Sessions can be shared between providers to keep connections warm
+        self.session = session if session is not None else create_session()
+        self.stream_responses = stream_responses
+        # Responses are decoded here rather than by urllib3 to count bytes on wire
+        self.compression = compression
+        self.compress_requests_over = compress_requests_over
+        self.metrics = metrics
+        self._thread_local = threading.local()
+
     def make_batch_request(self, text):
         self.logger.debug(
             "Making request HTTP. URI: %s, Request: %s", self.endpoint_uri, text
         )
-        request_data = text.encode("utf-8")
-        raw_response = make_post_request(
-            self.endpoint_uri, request_data, **self.get_request_kwargs()
-        )
-        response = self.decode_rpc_response(raw_response)
+        request_data = text if isinstance(text, bytes) else text.encode("utf-8")
+        raw_response = self._make_post_request(request_data)
+        self._thread_local.last_response_size = len(raw_response)
+        response = json_codec.loads(raw_response)
         self.logger.debug(
             "Getting response HTTP. URI: %s, " "Request: %s, Response: %s",
             self.endpoint_uri,
@@ -41,3 +79,70 @@ class BatchHTTPProvider(HTTPProvider):
             response,
         )
         return response
+
+    def iter_batch_request(self, text):
+        """Yields the items of the batch response as they are parsed, so that the
+        whole body never has to be held in memory."""
+        self.logger.debug(
+            "Making streaming request HTTP. URI: %s, Request: %s",
+            self.endpoint_uri,
+            text,
+        )
+        request_data = text if isinstance(text, bytes) else text.encode("utf-8")
+        with self._post(request_data) as response:
+            body = DecodingReader(
+                lambda size: response.raw.read(size, decode_content=False),
+                response.headers.get("Content-Encoding"),
+                self.metrics,
+            )
+            try:
+                for response_item in ijson.items(body, "item", use_float=True):
+                    yield response_item
+                # Reading to the end returns the connection to the pool
+                body.read()
+            except Urllib3HTTPError as e:
+                # Surface as ConnectionError so that executors retry the batch
+                raise ConnectionError(str(e)) from e
+            except ijson.JSONError as e:
+                raise RetriableValueError(
+                    "Invalid batch response from {}: {}".format(self.endpoint_uri, e)
+                ) from e
+            self._thread_local.last_response_size = body.bytes_decoded
+
+    def get_last_response_size(self):
+        # Sizes are tracked per thread as the provider is shared between workers
+        return getattr(self._thread_local, "last_response_size", None)
+
+    def _make_post_request(self, data):
+        with self._post(data) as response:
+            return decode_body(
+                response.raw.read(decode_content=False),
+                response.headers.get("Content-Encoding"),
+                self.metrics,
+            )
+
+    def _post(self, data):
+        request_kwargs = self.get_request_kwargs()
+        headers = dict(request_kwargs.pop("headers"))
+        headers["Accept-Encoding"] = get_accept_encoding_header(self.compression)
+        if (
+            self.compress_requests_over is not None
+            and len(data) >= self.compress_requests_over
+        ):
+            data, headers["Content-Encoding"] = compress_request_body(data)
+        response = self.session.post(
+            self.endpoint_uri, data=data, headers=headers, stream=True, **request_kwargs
+        )
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+        return response
+
+
+def get_last_response_size(provider):
+    """Returns the size in bytes of the last batch response the calling thread
+    received from the provider, or None if the provider does not track it."""
+    get_size = getattr(provider, "get_last_response_size", None)
+    return get_size() if get_size is not None else None
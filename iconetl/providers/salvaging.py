@@ -0,0 +1,243 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import asyncio
+import logging
+import time
+
+from blockchainetl_common.executors.batch_work_executor import RETRY_EXCEPTIONS
+
+from iconetl import json_codec
+from iconetl.executors.async_batch_work_executor import ASYNC_RETRY_EXCEPTIONS
+from iconetl.metrics import Metrics
+from iconetl.misc.retriable_value_error import RetriableValueError
+from iconetl.utils import rpc_response_batch_by_id, rpc_response_to_result
+
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_SLEEP_SECONDS = 1
+
+logger = logging.getLogger("SalvagingBatchRequester")
+
+
+# Not among the retry exceptions of executors, which would otherwise repeat all
+# the retries made while salvaging
+class SalvageError(Exception):
+    pass
+
+
+# Sends a batch of JSON RPC requests and returns their results in request order,
+# converted with result_mapper. Items which failed are re-requested on their own
+# while the good ones are kept. A batch failing as a whole, e.g. with a timeout
+# or an HTTP error, is retried once and then bisected to isolate the request
+# causing it. Such failures are reported to on_batch_error with the size of the
+# batch, e.g. to let adaptive executors reduce their batch size.
+class SalvagingBatchRequester(object):
+    def __init__(
+        self,
+        batch_web3_provider,
+        metrics=None,
+        max_retries=DEFAULT_MAX_RETRIES,
+        sleep_seconds=DEFAULT_SLEEP_SECONDS,
+        retry_exceptions=RETRY_EXCEPTIONS,
+        result_mapper=None,
+        on_batch_error=None,
+    ):
+        self.batch_web3_provider = batch_web3_provider
+        self.result_mapper = result_mapper
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.max_retries = max_retries
+        self.sleep_seconds = sleep_seconds
+        self.retry_exceptions = retry_exceptions
+        self.on_batch_error = on_batch_error
+
+    def request(self, rpc_requests):
+        plan = salvage_batch(
+            rpc_requests, self.max_retries, self.sleep_seconds, self.metrics
+        )
+        try:
+            delay, sub_batch = next(plan)
+            while True:
+                if delay > 0:
+                    time.sleep(delay)
+                try:
+                    outcome = self._map_results(self._make_batch_request(sub_batch))
+                except self.retry_exceptions as e:
+                    self._report_batch_error(sub_batch)
+                    outcome = e
+                delay, sub_batch = plan.send(outcome)
+        except StopIteration as e:
+            return [response_item["result"] for response_item in e.value]
+
+    def _make_batch_request(self, sub_batch):
+        text = json_codec.dumps_bytes(sub_batch)
+        if getattr(self.batch_web3_provider, "stream_responses", False):
+            return self.batch_web3_provider.iter_batch_request(text)
+        return self.batch_web3_provider.make_batch_request(text)
+
+    def _report_batch_error(self, sub_batch):
+        if self.on_batch_error is not None:
+            self.on_batch_error(len(sub_batch))
+
+    def _map_results(self, response):
+        if isinstance(response, dict):
+            return response
+        # Mapping streamed items as they arrive lets their JSON be freed right away
+        return [self._map_result(response_item) for response_item in response]
+
+    def _map_result(self, response_item):
+        result = response_item.get("result")
+        if result is None or self.result_mapper is None:
+            return response_item
+        return dict(response_item, result=self.result_mapper(result))
+
+
+# Same as SalvagingBatchRequester for providers with a coroutine make_batch_request
+class AsyncSalvagingBatchRequester(SalvagingBatchRequester):
+    def __init__(
+        self, batch_web3_provider, retry_exceptions=ASYNC_RETRY_EXCEPTIONS, **kwargs
+    ):
+        super().__init__(
+            batch_web3_provider, retry_exceptions=retry_exceptions, **kwargs
+        )
+
+    async def request(self, rpc_requests):
+        plan = salvage_batch(
+            rpc_requests, self.max_retries, self.sleep_seconds, self.metrics
+        )
+        try:
+            delay, sub_batch = next(plan)
+            while True:
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    outcome = self._map_results(
+                        await self.batch_web3_provider.make_batch_request(
+                            json_codec.dumps_bytes(sub_batch)
+                        )
+                    )
+                except self.retry_exceptions as e:
+                    self._report_batch_error(sub_batch)
+                    outcome = e
+                delay, sub_batch = plan.send(outcome)
+        except StopIteration as e:
+            return [response_item["result"] for response_item in e.value]
+
+
+def salvage_batch(
+    rpc_requests, max_retries, sleep_seconds, metrics, retry_whole_batch=True
+):
+    """Plans the requests needed to get a result for every item of a batch.
+
+    Yields (delay in seconds, sub-batch of requests) and expects the response to the
+    sub-batch, or the exception raised while requesting it, to be sent back.
+    Returns the response items in request order, or raises SalvageError once a
+    request failed max_retries times. Only the I/O is left to the caller so the
+    same plan serves both threaded and asyncio jobs.
+    """
+    response_items = [None] * len(rpc_requests)
+    pending = list(range(len(rpc_requests)))
+    error = None
+    batch_failed = False
+    for attempt in range(max_retries):
+        if attempt > 0:
+            metrics.increment("rpc_retries")
+            metrics.increment("rpc_items_retried", len(pending))
+        sub_batch = [rpc_requests[index] for index in pending]
+        outcome = yield (sleep_seconds if attempt > 0 else 0, sub_batch)
+
+        if not isinstance(outcome, Exception):
+            try:
+                outcome = rpc_response_batch_by_id(sub_batch, outcome)
+            except RetriableValueError as e:
+                outcome = e
+
+        if isinstance(outcome, Exception):
+            error = outcome
+            # Transient errors are likely gone on the retry of the whole batch,
+            # halves of a bisected batch are bisected further right away
+            if len(pending) > 1 and (batch_failed or not retry_whole_batch):
+                yield from _bisect(
+                    rpc_requests,
+                    pending,
+                    response_items,
+                    max_retries,
+                    sleep_seconds,
+                    metrics,
+                )
+                return response_items
+            batch_failed = True
+            logger.warning(
+                "Request failed, attempt {} of {}: {}".format(
+                    attempt + 1, max_retries, error
+                )
+            )
+            continue
+
+        failed = []
+        for index, response_item in zip(pending, outcome):
+            try:
+                if response_item is None:
+                    raise RetriableValueError(
+                        "No response to request {}.".format(rpc_requests[index])
+                    )
+                rpc_response_to_result(response_item)
+            except RetriableValueError as e:
+                error = e
+                failed.append(index)
+            else:
+                response_items[index] = response_item
+
+        if len(failed) > 0 and len(failed) < len(pending):
+            metrics.increment("rpc_items_salvaged", len(pending) - len(failed))
+        pending = failed
+        if len(pending) == 0:
+            return response_items
+
+    raise SalvageError(
+        "Request failed {} times: {}".format(max_retries, error)
+    ) from error
+
+
+def _bisect(rpc_requests, pending, response_items, max_retries, sleep_seconds, metrics):
+    metrics.increment("rpc_bisections")
+    middle = len(pending) // 2
+    for half in (pending[:middle], pending[middle:]):
+        half_response_items = yield from salvage_batch(
+            [rpc_requests[index] for index in half],
+            max_retries,
+            sleep_seconds,
+            metrics,
+            retry_whole_batch=False,
+        )
+        for index, response_item in zip(half, half_response_items):
+            response_items[index] = response_item
+
+
+def get_salvage_stats(metrics):
+    """Returns counts of retried requests, retried items, salvaged items and
+    bisected batches."""
+    return (
+        metrics.get("rpc_retries"),
+        metrics.get("rpc_items_retried"),
+        metrics.get("rpc_items_salvaged"),
+        metrics.get("rpc_bisections"),
+    )
@@ -0,0 +1,77 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE, metrics=None):
+    """Creates a keep-alive session holding up to pool_size connections per host."""
+    session = requests.Session()
+    if metrics is not None:
+        adapter = CountingHTTPAdapter(
+            metrics, pool_connections=pool_size, pool_maxsize=pool_size
+        )
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_connection_stats(metrics):
+    """Returns the number of connections opened and reused."""
+    opened = metrics.get("connections_opened")
+    reused = max(metrics.get("http_requests") - opened, 0)
+    return opened, reused
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    def __init__(self, metrics, **kwargs):
+        # init_poolmanager is called from the base constructor
+        self.metrics = metrics
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: _counting_pool_class(pool_class, self.metrics)
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request, *args, **kwargs):
+        self.metrics.increment("http_requests")
+        return super().send(request, *args, **kwargs)
+
+
+def _counting_pool_class(pool_class, metrics):
+    class CountingConnection(pool_class.ConnectionCls):
+        def connect(self):
+            metrics.increment("connections_opened")
+            return super().connect()
+
+    class CountingConnectionPool(pool_class):
+        ConnectionCls = CountingConnection
+
+    return CountingConnectionPool
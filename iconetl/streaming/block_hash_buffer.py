@@ -0,0 +1,52 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+from collections import OrderedDict
+
+
+# Ring buffer of the hashes of the most recently exported blocks, used to check that
+# new blocks build on them. Blocks are added in increasing order of number.
+class BlockHashBuffer(object):
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self._hashes = OrderedDict()
+
+    def add(self, number, block_hash):
+        self._hashes[number] = block_hash
+        if len(self._hashes) > self.size:
+            self._hashes.popitem(last=False)
+
+    def get(self, number):
+        return self._hashes.get(number)
+
+    def first_number(self):
+        return next(iter(self._hashes), None)
+
+    def remove_from(self, number):
+        """Forgets the given block and the blocks after it, e.g. after a reorg."""
+        for buffered_number in [n for n in self._hashes if n >= number]:
+            del self._hashes[buffered_number]
+
+    def __len__(self):
+        return len(self._hashes)
@@ -0,0 +1,190 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import asyncio
+import json
+import logging
+import threading
+
+import websockets
+
+DEFAULT_RECONNECT_SECONDS = 5
+DEFAULT_OPEN_TIMEOUT_SECONDS = 10
+
+
+# Subscribes to the block notifications of an ICON node, e.g.
+# wss://ctz.solidwallet.io/api/v3/icon_dex/block, and keeps track of the latest
+# notified height. The websocket is served by an asyncio event loop in a background
+# thread and is reopened from the next height when it drops. Errors which
+# reopening it cannot fix are raised once the listener is queried.
+class BlockNotificationListener(object):
+    def __init__(
+        self,
+        uri,
+        reconnect_seconds=DEFAULT_RECONNECT_SECONDS,
+        open_timeout=DEFAULT_OPEN_TIMEOUT_SECONDS,
+        metrics=None,
+    ):
+        self.uri = uri
+        self.reconnect_seconds = reconnect_seconds
+        self.open_timeout = open_timeout
+        self.metrics = metrics
+        self.logger = logging.getLogger("BlockNotificationListener")
+
+        self._condition = threading.Condition()
+        self._latest_height = None
+        self._connected = False
+        self._error = None
+        self._loop = None
+        self._task = None
+        self._thread = None
+
+    def start(self, height):
+        """Starts listening for blocks from the given height on."""
+        if self._thread is not None:
+            raise ValueError("The listener is already started")
+        self._latest_height = height - 1
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self._listen())
+        self._thread = threading.Thread(
+            target=self._run_loop, name="BlockNotificationListener", daemon=True
+        )
+        self._thread.start()
+
+    def is_started(self):
+        return self._thread is not None
+
+    def is_connected(self):
+        with self._condition:
+            self._raise_error()
+            return self._connected
+
+    def get_latest_height(self):
+        with self._condition:
+            self._raise_error()
+            return self._latest_height
+
+    def wait_for_height(self, height, timeout):
+        """Waits until a block at or above height is notified or the websocket drops.
+        Returns True if the height was notified within the timeout."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: not self._connected or self._latest_height >= height,
+                timeout,
+            )
+            self._raise_error()
+            return self._connected and self._latest_height >= height
+
+    def stop(self):
+        if self._thread is None:
+            return
+        # The loop is closed once listening failed
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join()
+        self._thread = None
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    async def _listen(self):
+        while True:
+            try:
+                await self._listen_once()
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                self.logger.warning(
+                    "Block notifications from {} dropped: {}. Falling back to "
+                    "polling.".format(self.uri, e)
+                )
+            except ValueError as e:
+                self.logger.warning(
+                    "Invalid block notification from {}: {}. Falling back to "
+                    "polling.".format(self.uri, e)
+                )
+            except TypeError as e:
+                # Raised by websockets releases which do not support this version
+                # of Python, every reconnect would fail the same way
+                self.logger.exception(
+                    "Listening to block notifications from {} failed".format(self.uri)
+                )
+                with self._condition:
+                    self._error = e
+                return
+            except Exception:
+                self.logger.exception(
+                    "An exception occurred while listening to block notifications. "
+                    "Falling back to polling."
+                )
+            finally:
+                self._set_connected(False)
+            if self.metrics is not None:
+                self.metrics.increment("block_notification_drops")
+            await asyncio.sleep(self.reconnect_seconds)
+
+    async def _listen_once(self):
+        websocket = await asyncio.wait_for(
+            websockets.connect(self.uri), self.open_timeout
+        )
+        try:
+            next_height = self.get_latest_height() + 1
+            await websocket.send(json.dumps({"height": hex(next_height)}))
+            async for message in websocket:
+                self._handle_message(json.loads(message))
+        finally:
+            await websocket.close()
+
+    def _handle_message(self, message):
+        if "code" in message:
+            # The node acknowledges the subscription before sending notifications
+            if message["code"] != 0:
+                raise ValueError(message.get("message", message["code"]))
+            self.logger.info(
+                "Subscribed to block notifications from {}".format(self.uri)
+            )
+            self._set_connected(True)
+        elif "height" in message:
+            height = int(message["height"], 16)
+            with self._condition:
+                self._connected = True
+                self._latest_height = max(self._latest_height, height)
+                self._condition.notify_all()
+            if self.metrics is not None:
+                self.metrics.increment("block_notifications")
+        else:
+            raise ValueError("Unexpected message {}".format(message))
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError(
+                "Listening to block notifications from {} failed".format(self.uri)
+            ) from self._error
+
+    def _set_connected(self, connected):
+        with self._condition:
+            self._connected = connected
+            self._condition.notify_all()
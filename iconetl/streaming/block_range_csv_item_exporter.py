@@ -0,0 +1,83 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+
+from iconetl.file_utils import atomic_output_files
+from iconetl.jobs.exporters.blocks_and_transactions_item_exporter import (
+    blocks_and_transactions_item_exporter,
+)
+from iconetl.jobs.exporters.receipts_and_logs_item_exporter import (
+    receipts_and_logs_item_exporter,
+)
+
+FILE_PREFIXES = ["blocks", "transactions", "receipts", "logs"]
+
+
+# Writes the items of each export_items call to new CSV files in output_dir, named
+# after the range of blocks they belong to, e.g. blocks/blocks_00000100_00000109.csv.
+# Files are renamed to their final names once complete.
+class BlockRangeCsvItemExporter(object):
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+
+    def open(self):
+        pass
+
+    def export_items(self, items):
+        block_numbers = [item["number"] for item in items if item["type"] == "block"]
+        if len(block_numbers) == 0:
+            return
+        file_names = [
+            os.path.join(
+                self.output_dir,
+                prefix,
+                "{prefix}_{start_block:08d}_{end_block:08d}.csv".format(
+                    prefix=prefix,
+                    start_block=min(block_numbers),
+                    end_block=max(block_numbers),
+                ),
+            )
+            for prefix in FILE_PREFIXES
+        ]
+        with atomic_output_files(*file_names) as temporary_file_names:
+            item_exporters = [
+                blocks_and_transactions_item_exporter(*temporary_file_names[:2]),
+                receipts_and_logs_item_exporter(*temporary_file_names[2:]),
+            ]
+            item_exporter_by_type = {
+                "block": item_exporters[0],
+                "transaction": item_exporters[0],
+                "receipt": item_exporters[1],
+                "log": item_exporters[1],
+            }
+            for item_exporter in item_exporters:
+                item_exporter.open()
+            try:
+                for item in items:
+                    item_exporter_by_type[item["type"]].export_item(item)
+            finally:
+                for item_exporter in item_exporters:
+                    item_exporter.close()
+
+    def close(self):
+        pass
@@ -0,0 +1,214 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import logging
+import time
+
+from blockchainetl_common.streaming.streamer import Streamer, write_last_synced_block
+
+CATCH_UP_MODE = "catch_up"
+TAIL_MODE = "tail"
+
+
+# How blocks are fetched in a sync mode
+class SyncMode(object):
+    def __init__(self, name, block_batch_size, batch_size, max_workers):
+        self.name = name
+        self.block_batch_size = block_batch_size
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+
+
+# Streams like a backfill while far behind the chain head, with large ranges and
+# many workers, and switches to small low-latency ranges near the head. Catch-up
+# mode starts when more than catch_up_threshold blocks are left to sync and ends
+# once a single tail range reaches the head.
+#
+# With a block notification listener, new blocks trigger a sync as soon as they
+# are notified instead of after period_seconds. The node is polled again whenever
+# the websocket is down or no block was notified within period_seconds.
+class IcxStreamer(Streamer):
+    def __init__(
+        self,
+        blockchain_streamer_adapter,
+        tail_mode,
+        catch_up_mode=None,
+        catch_up_threshold=None,
+        confirmations=0,
+        block_notifications=None,
+        metrics=None,
+        **kwargs
+    ):
+        super().__init__(
+            blockchain_streamer_adapter=blockchain_streamer_adapter,
+            block_batch_size=tail_mode.block_batch_size,
+            **kwargs
+        )
+        if catch_up_mode is not None and (
+            catch_up_threshold is None
+            or catch_up_threshold < tail_mode.block_batch_size
+        ):
+            raise ValueError(
+                "catch_up_threshold must be at least the tail block batch size"
+            )
+        # The adapter exports a range once confirmations blocks are built on it
+        self.lag += confirmations
+        self.tail_mode = tail_mode
+        self.catch_up_mode = catch_up_mode
+        self.catch_up_threshold = catch_up_threshold
+        self.block_notifications = block_notifications
+        self.metrics = metrics
+        self.mode = None
+        self._poll_next_cycle = True
+        self.logger = logging.getLogger("IcxStreamer")
+
+    def _do_stream(self):
+        try:
+            while self.end_block is None or self.last_synced_block < self.end_block:
+                synced_blocks = 0
+                try:
+                    synced_blocks = self._sync_cycle()
+                except Exception:
+                    self.logger.exception(
+                        "An exception occurred while syncing block data."
+                    )
+                    if not self.retry_errors:
+                        raise
+
+                if synced_blocks <= 0:
+                    self._wait_for_new_blocks()
+        finally:
+            if self.block_notifications is not None:
+                self.block_notifications.stop()
+
+    def _sync_cycle(self):
+        current_block = self._get_current_block_number()
+        lag = max(current_block - self.lag - self.last_synced_block, 0)
+        self._switch_mode(self._choose_mode(lag), lag)
+
+        target_block = self._calculate_target_block(
+            current_block, self.last_synced_block, self.mode.block_batch_size
+        )
+        blocks_to_sync = max(target_block - self.last_synced_block, 0)
+
+        self.logger.info(
+            "Current block {}, target block {}, last synced block {}, "
+            "blocks to sync {}, {} mode".format(
+                current_block,
+                target_block,
+                self.last_synced_block,
+                blocks_to_sync,
+                self.mode.name,
+            )
+        )
+
+        if blocks_to_sync != 0:
+            self.blockchain_streamer_adapter.export_all(
+                self.last_synced_block + 1, target_block
+            )
+            self.logger.info("Writing last synced block {}".format(target_block))
+            write_last_synced_block(self.last_synced_block_file, target_block)
+            self.last_synced_block = target_block
+            self.processed_blocks_count += blocks_to_sync
+
+        if self.metrics is not None:
+            self.metrics.set("stream_lag_blocks", current_block - target_block)
+            log_stream_stats(self.metrics, self.logger)
+        return blocks_to_sync
+
+    def _get_current_block_number(self):
+        notifications = self.block_notifications
+        if (
+            notifications is not None
+            and not self._poll_next_cycle
+            and notifications.is_connected()
+        ):
+            return notifications.get_latest_height()
+
+        current_block = self.blockchain_streamer_adapter.get_current_block_number()
+        if self.metrics is not None:
+            self.metrics.increment("stream_polls")
+        # Notifications start from the head so that old blocks are not replayed
+        if notifications is not None and not notifications.is_started():
+            notifications.start(current_block + 1)
+        return current_block
+
+    def _wait_for_new_blocks(self):
+        notifications = self.block_notifications
+        if notifications is None or not notifications.is_connected():
+            self.logger.info(
+                "Nothing to sync. Sleeping for {} seconds...".format(
+                    self.period_seconds
+                )
+            )
+            self._poll_next_cycle = True
+            time.sleep(self.period_seconds)
+            return
+
+        next_block = self.last_synced_block + self.lag + 1
+        self.logger.debug("Waiting for block {} to be notified".format(next_block))
+        self._poll_next_cycle = not notifications.wait_for_height(
+            next_block, self.period_seconds
+        )
+
+    def _choose_mode(self, lag):
+        if self.catch_up_mode is None:
+            return self.tail_mode
+        if self.mode is self.catch_up_mode:
+            if lag <= self.tail_mode.block_batch_size:
+                return self.tail_mode
+            return self.catch_up_mode
+        if lag > self.catch_up_threshold:
+            return self.catch_up_mode
+        return self.tail_mode
+
+    def _switch_mode(self, mode, lag):
+        if mode is self.mode:
+            return
+        self.logger.info(
+            "Switching to {} mode, {} blocks behind the chain head".format(
+                mode.name, lag
+            )
+        )
+        self.mode = mode
+        self.blockchain_streamer_adapter.configure(
+            batch_size=mode.batch_size, max_workers=mode.max_workers
+        )
+        if self.metrics is not None:
+            self.metrics.set("stream_mode", mode.name)
+            self.metrics.increment("stream_mode_switches")
+
+
+def log_stream_stats(metrics, logger):
+    logger.info(
+        "Stream mode: {mode}, lag: {lag} blocks, mode switches: {switches}, head "
+        "latency: {latency} seconds, polls: {polls}, block notifications: "
+        "{notifications}, reorgs: {reorgs}".format(
+            mode=metrics.get("stream_mode", None),
+            lag=metrics.get("stream_lag_blocks", None),
+            switches=metrics.get("stream_mode_switches"),
+            latency=metrics.get("stream_head_latency_seconds", None),
+            polls=metrics.get("stream_polls"),
+            notifications=metrics.get("block_notifications"),
+            reorgs=metrics.get("stream_reorgs"),
+        )
+    )
@@ -0,0 +1,249 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import logging
+import time
+
+from blockchainetl_common.jobs.exporters.console_item_exporter import (
+    ConsoleItemExporter,
+)
+
+from iconetl.jobs.export_blocks_job import ExportBlocksJob
+from iconetl.jobs.export_receipts_job import ExportReceiptsJob
+from iconetl.jobs.exporters.blocks_and_transactions_item_exporter import (
+    BLOCK_FIELDS_TO_EXPORT,
+    TRANSACTION_FIELDS_TO_EXPORT,
+)
+from iconetl.jobs.exporters.in_memory_item_exporter import InMemoryItemExporter
+from iconetl.jobs.exporters.receipts_and_logs_item_exporter import (
+    LOG_FIELDS_TO_EXPORT,
+    RECEIPT_FIELDS_TO_EXPORT,
+)
+from iconetl.json_rpc_requests import generate_get_last_block_json_rpc
+from iconetl.providers.salvaging import SalvagingBatchRequester
+from iconetl.streaming.block_hash_buffer import BlockHashBuffer
+
+FIELDS_TO_EXPORT = {
+    "block": BLOCK_FIELDS_TO_EXPORT,
+    "transaction": TRANSACTION_FIELDS_TO_EXPORT,
+    "receipt": RECEIPT_FIELDS_TO_EXPORT,
+    "log": LOG_FIELDS_TO_EXPORT,
+}
+
+# Block timestamps are in microseconds
+MICROSECONDS_PER_SECOND = 1000000
+
+DEFAULT_REORG_BUFFER_SIZE = 128
+
+
+# Exports blocks, transactions, receipts and logs for the Streamer of
+# blockchainetl_common, which calls export_all for each range of new blocks. Items
+# of a range are passed to the item exporter at once, in block order.
+#
+# The hashes of recently exported blocks are kept to detect reorgs. When a new
+# range does not build on the last exported block, the blocks since the fork are
+# exported again before the range, and their items replace the items previously
+# exported for the same block numbers. With confirmations, a range is only
+# exported once that many blocks were built on it, which the caller has to allow
+# for when choosing ranges.
+class IcxStreamerAdapter(object):
+    def __init__(
+        self,
+        batch_web3_provider,
+        item_exporter=None,
+        batch_size=100,
+        max_workers=5,
+        confirmations=0,
+        reorg_buffer_size=DEFAULT_REORG_BUFFER_SIZE,
+        metrics=None,
+    ):
+        self.batch_web3_provider = batch_web3_provider
+        self.item_exporter = (
+            item_exporter if item_exporter is not None else ConsoleItemExporter()
+        )
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.confirmations = confirmations
+        self.block_hashes = BlockHashBuffer(reorg_buffer_size)
+        self.metrics = metrics
+        self.batch_requester = SalvagingBatchRequester(
+            batch_web3_provider, metrics=metrics
+        )
+        self.logger = logging.getLogger("IcxStreamerAdapter")
+
+    def open(self):
+        self.item_exporter.open()
+
+    def configure(self, batch_size, max_workers):
+        # Takes effect from the next range of blocks
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+
+    def get_current_block_number(self):
+        (last_block,) = self.batch_requester.request(
+            [generate_get_last_block_json_rpc()]
+        )
+        return int(last_block["height"])
+
+    def export_all(self, start_block, end_block):
+        blocks, transactions = self._export_blocks_and_transactions(
+            start_block, end_block + self.confirmations
+        )
+        blocks = sort_by(blocks, "number")
+        check_blocks_are_linked(blocks)
+
+        reorged_blocks, reorged_transactions = self._export_reorged_blocks(blocks[0])
+        blocks = [block for block in blocks if block["number"] <= end_block]
+        transactions = [
+            transaction
+            for transaction in transactions
+            if transaction["block_number"] <= end_block
+        ]
+        blocks = reorged_blocks + blocks
+        transactions = reorged_transactions + transactions
+        receipts, logs = self._export_receipts_and_logs(transactions)
+
+        items = (
+            blocks
+            + sort_by(transactions, "block_number", "transaction_index")
+            + sort_by(receipts, "block_number", "transaction_index")
+            + sort_by(logs, "block_number", "transaction_index", "log_index")
+        )
+        self.item_exporter.export_items(
+            [project_fields(item, FIELDS_TO_EXPORT[item["type"]]) for item in items]
+        )
+        for block in blocks:
+            self.block_hashes.add(block["number"], block["hash"])
+        self._track_latency(blocks)
+
+    def _export_reorged_blocks(self, first_block):
+        """Returns the blocks which replaced exported blocks, if first_block does not
+        build on the last exported block, with their transactions."""
+        parent_hash = self.block_hashes.get(first_block["number"] - 1)
+        if parent_hash is None or parent_hash == first_block["parent_hash"]:
+            return [], []
+
+        first_buffered_block = self.block_hashes.first_number()
+        blocks, transactions = self._export_blocks_and_transactions(
+            first_buffered_block, first_block["number"] - 1
+        )
+        blocks = sort_by(blocks, "number")
+        check_blocks_are_linked(blocks + [first_block])
+        fork_block = next(
+            block["number"]
+            for block in blocks
+            if block["hash"] != self.block_hashes.get(block["number"])
+        )
+        if fork_block == first_buffered_block:
+            raise ValueError(
+                "Reorg deeper than the {} buffered blocks before block {}".format(
+                    len(self.block_hashes), first_block["number"]
+                )
+            )
+
+        self.logger.warning(
+            "Reorg detected, blocks {} to {} are exported again".format(
+                fork_block, first_block["number"] - 1
+            )
+        )
+        if self.metrics is not None:
+            self.metrics.increment("stream_reorgs")
+            self.metrics.increment(
+                "stream_reorged_blocks", first_block["number"] - fork_block
+            )
+        self.block_hashes.remove_from(fork_block)
+        return (
+            [block for block in blocks if block["number"] >= fork_block],
+            [
+                transaction
+                for transaction in transactions
+                if transaction["block_number"] >= fork_block
+            ],
+        )
+
+    def _export_blocks_and_transactions(self, start_block, end_block):
+        exporter = InMemoryItemExporter(item_types=["block", "transaction"])
+        job = ExportBlocksJob(
+            start_block=start_block,
+            end_block=end_block,
+            batch_size=self.batch_size,
+            batch_web3_provider=self.batch_web3_provider,
+            max_workers=self.max_workers,
+            item_exporter=exporter,
+            metrics=self.metrics,
+        )
+        job.run()
+        return exporter.get_items("block"), exporter.get_items("transaction")
+
+    def _export_receipts_and_logs(self, transactions):
+        exporter = InMemoryItemExporter(item_types=["receipt", "log"])
+        job = ExportReceiptsJob(
+            transaction_hashes_iterable=(
+                transaction["hash"] for transaction in transactions
+            ),
+            batch_size=self.batch_size,
+            batch_web3_provider=self.batch_web3_provider,
+            max_workers=self.max_workers,
+            item_exporter=exporter,
+            metrics=self.metrics,
+        )
+        job.run()
+        return exporter.get_items("receipt"), exporter.get_items("log")
+
+    def _track_latency(self, blocks):
+        timestamps = [block["timestamp"] for block in blocks if block["timestamp"]]
+        if len(timestamps) == 0:
+            return
+        # Time from the newest block being produced until it was exported
+        latency = round(time.time() - max(timestamps) / MICROSECONDS_PER_SECOND, 3)
+        self.logger.info(
+            "Exported {count} blocks, head to export latency {latency} "
+            "seconds".format(count=len(blocks), latency=latency)
+        )
+        if self.metrics is not None:
+            self.metrics.increment("stream_blocks_exported", len(blocks))
+            self.metrics.set("stream_head_latency_seconds", latency)
+
+    def close(self):
+        self.item_exporter.close()
+
+
+def check_blocks_are_linked(blocks):
+    """Raises ValueError if a block does not build on the block before it, e.g.
+    when the node switched forks while the blocks were requested."""
+    for parent, block in zip(blocks, blocks[1:]):
+        if block["parent_hash"] != parent["hash"]:
+            raise ValueError(
+                "Block {} does not build on block {}, the node may be switching "
+                "forks".format(block["number"], parent["number"])
+            )
+
+
+def sort_by(items, *fields):
+    return sorted(items, key=lambda item: tuple(item.get(f) or 0 for f in fields))
+
+
+def project_fields(item, fields):
+    projected = {"type": item["type"]}
+    for field in fields:
+        projected[field] = item.get(field)
+    return projected
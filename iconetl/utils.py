@@ -61,6 +61,34 @@ def rpc_response_batch_to_results(response):
         yield rpc_response_to_result(response_item)
 
 
+def rpc_response_batch_by_id(rpc_requests, response):
+    """Matches batch response items to requests by id, so that servers and proxies
+    may reorder them. Returns the items in request order, None for requests which
+    were not answered."""
+    if not isinstance(response, list):
+        raise RetriableValueError("Batch response {} is not a list.".format(response))
+
+    index_by_id = {}
+    for index, rpc_request in enumerate(rpc_requests):
+        if rpc_request["id"] in index_by_id:
+            raise ValueError("Duplicate id {} in batch.".format(rpc_request["id"]))
+        index_by_id[rpc_request["id"]] = index
+
+    response_items = [None] * len(rpc_requests)
+    for response_item in response:
+        index = index_by_id.get(response_item.get("id"))
+        if index is None:
+            raise RetriableValueError(
+                "Unexpected id in response {}.".format(response_item)
+            )
+        if response_items[index] is not None:
+            raise RetriableValueError(
+                "Duplicate id in response {}.".format(response_item)
+            )
+        response_items[index] = response_item
+    return response_items
+
+
 def rpc_response_to_result(response):
     result = response.get("result")
     if result is None:
@@ -33,6 +33,15 @@ setup(
             "timeout-decorator==0.4.1",
             "sqlalchemy==1.3.13",
         ],
+        "async": ["aiohttp>=3.5.0"],
+        "fast-json": ["orjson>=2.0"],
+        "streaming-json": ["ijson>=3.1"],
+        "zstd": ["zstandard>=0.13.0"],
+        "websocket": [
+            # Releases before 10.0 pass the loop argument removed in Python 3.10
+            "websockets>=8.1; python_version<'3.10'",
+            "websockets>=10.0; python_version>='3.10'",
+        ],
         "dev": ["pytest~=4.3.0"],
     },
     project_urls={
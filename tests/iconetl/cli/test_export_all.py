@@ -0,0 +1,134 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import csv
+import json
+import os
+from datetime import datetime, timezone
+
+import pytest
+from click.testing import CliRunner
+
+import tests.resources
+from iconetl.cli.export_all import export_all, get_partitions
+from tests.iconetl.providers.stub_rpc_server import StubRpcServer
+
+BLOCK_RESOURCE_GROUPS = ["test_export_blocks_job", "version_04_block"]
+BLOCK_RESOURCE_FILE = "web3_response.icx_getBlockByHeight_0xdcd995.json"
+START_TIMESTAMP = datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp()
+LAST_BLOCK = 100
+
+
+# Answers block requests with a block without transactions per hour, starting
+# half an hour before 2020-01-01
+class HourlyBlockRpcServer(StubRpcServer):
+    def handle_batch(self, batch):
+        if isinstance(batch, dict):
+            return self.handle_request(batch)
+        return super().handle_batch(batch)
+
+    def handle_request(self, request):
+        if request["method"] == "icx_getLastBlock":
+            height = LAST_BLOCK
+        else:
+            height = int(request["params"]["height"], 16)
+        response = json.loads(
+            tests.resources.read_resource(BLOCK_RESOURCE_GROUPS, BLOCK_RESOURCE_FILE)
+        )
+        response["result"]["height"] = height
+        response["result"]["confirmed_transaction_list"] = []
+        response["result"]["time_stamp"] = int(
+            (START_TIMESTAMP + height * 3600 - 1800) * 1000000
+        )
+        response["id"] = request["id"]
+        return response
+
+
+@pytest.mark.parametrize("scheme_prefix", ["", "async_"])
+def test_get_partitions_for_dates(scheme_prefix):
+    with HourlyBlockRpcServer(None) as server:
+        partitions = list(
+            get_partitions("2020-01-02", "2020-01-03", 100, scheme_prefix + server.uri)
+        )
+
+    assert partitions == [
+        (25, 48, "/date=2020-01-02/"),
+        (49, 72, "/date=2020-01-03/"),
+    ]
+
+
+def test_get_partitions_for_dates_with_several_endpoints():
+    with HourlyBlockRpcServer(None) as server, HourlyBlockRpcServer(None) as other:
+        partitions = list(
+            get_partitions(
+                "2020-01-02", "2020-01-02", 100, server.uri + "," + other.uri
+            )
+        )
+
+    assert partitions == [(25, 48, "/date=2020-01-02/")]
+
+
+def test_export_all_for_dates_with_several_endpoints(tmpdir):
+    with HourlyBlockRpcServer(None) as server, HourlyBlockRpcServer(None) as other:
+        result = CliRunner().invoke(
+            export_all,
+            [
+                "--start",
+                "2020-01-02",
+                "--end",
+                "2020-01-02",
+                "--provider-uri",
+                server.uri + "," + other.uri,
+                "--output-dir",
+                str(tmpdir),
+                "--entity-types",
+                "block",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    blocks_file = os.path.join(
+        str(tmpdir), "blocks", "date=2020-01-02", "blocks_00000025_00000048.csv"
+    )
+    with open(blocks_file) as f:
+        numbers = [int(row["number"]) for row in csv.DictReader(f)]
+    assert sorted(numbers) == list(range(25, 49))
+
+
+def test_export_all_rejects_unknown_fields(tmpdir):
+    result = CliRunner().invoke(
+        export_all,
+        [
+            "--start",
+            "0",
+            "--end",
+            "1",
+            "--output-dir",
+            str(tmpdir),
+            "--fields",
+            "block.number,block.color",
+        ],
+    )
+
+    assert result.exit_code == 2
+    assert "Unknown field block.color" in result.output
+    assert result.exception is None or isinstance(result.exception, SystemExit)
@@ -0,0 +1,67 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import json
+
+import pytest
+
+import tests.resources
+from iconetl.domain.receipt_log import IcxReceiptLog
+from iconetl.mappers.block_mapper import IcxBlockMapper
+from iconetl.mappers.receipt_log_mapper import IcxReceiptLogMapper
+
+
+def read_block(resource_group):
+    return json.loads(
+        tests.resources.read_resource(
+            ["test_export_blocks_job", resource_group],
+            "web3_response.icx_getBlockByHeight_0xdcd995.json",
+        )
+    )["result"]
+
+
+def test_records_read_like_their_dicts():
+    block_mapper = IcxBlockMapper()
+    block = block_mapper.json_dict_to_block(read_block("version_04_block"))
+
+    for record, record_dict in [(block, block_mapper.block_to_dict(block))] + [
+        (transaction, block_mapper.transaction_mapper.transaction_to_dict(transaction))
+        for transaction in block.transactions
+    ]:
+        assert list(record.keys()) == list(record_dict.keys())
+        assert dict(record.items()) == record_dict
+        assert all(record[key] == value for key, value in record_dict.items())
+        assert record.get("type") == record_dict["type"]
+        assert record.get("missing", 1) == 1
+        assert "missing" not in record
+
+
+def test_records_have_no_instance_dict():
+    receipt_log = IcxReceiptLogMapper().dict_to_receipt_log({"log_index": 1})
+
+    assert not hasattr(receipt_log, "__dict__")
+    assert receipt_log.log_index == 1
+    with pytest.raises(AttributeError):
+        receipt_log.unknown = 1
+    with pytest.raises(KeyError):
+        receipt_log["unknown"]
+    assert list(IcxReceiptLog.fields)[:2] == ["type", "log_index"]
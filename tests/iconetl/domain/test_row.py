@@ -0,0 +1,103 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import json
+
+import tests.resources
+from iconetl.jobs.exporters.blocks_and_transactions_item_exporter import (
+    TRANSACTION_FIELDS_TO_EXPORT,
+)
+from iconetl.mappers.block_mapper import IcxBlockMapper
+from iconetl.mappers.receipt_mapper import IcxReceiptMapper
+from iconetl.mappers.row_mapper import IcxRowMapper, TransactionRow
+
+
+def read_json(resource_group, file_name):
+    return json.loads(tests.resources.read_resource(resource_group, file_name))[
+        "result"
+    ]
+
+
+def test_row_reads_like_item_dict():
+    values = tuple(range(len(TRANSACTION_FIELDS_TO_EXPORT)))
+    row = TransactionRow(values)
+
+    assert row.get("type") == "transaction"
+    assert row["hash"] == TRANSACTION_FIELDS_TO_EXPORT.index("hash")
+    assert "hash" in row
+    assert "block_timestamp" not in row
+    assert row.get("block_timestamp", "missing") == "missing"
+    assert list(row) == ["type"] + TRANSACTION_FIELDS_TO_EXPORT
+    assert row.fields["hash"] == {}
+
+
+def test_block_rows_have_mapper_values():
+    block_json = read_json(
+        ["test_export_blocks_job", "version_03_block"],
+        "web3_response.icx_getBlockByHeight_0xc0e1f8.json",
+    )
+    block = IcxBlockMapper().json_dict_to_block(block_json)
+
+    rows = IcxRowMapper().json_dict_to_block_rows(block_json)
+
+    assert len(rows) == 1 + len(block.transactions)
+    for row, record in zip(rows, [block] + block.transactions):
+        assert row.item_type == record.item_type
+        assert [row[field] for field in row.field_names] == [
+            record[field] for field in row.field_names
+        ]
+
+
+def test_receipt_rows_have_mapper_values():
+    receipt_json = read_json(
+        ["test_export_receipts_job", "html_sanitize"],
+        "web3_response.icx_getTransactionResult_0x16dbc932b601821b08450ad6f228a6a8e1"
+        "bfd9cf5a361f0bf42ccf4b0b29be7b.json",
+    )
+    receipt = IcxReceiptMapper().json_dict_to_receipt(receipt_json)
+
+    rows = IcxRowMapper(export_receipts=False).json_dict_to_receipt_rows(receipt_json)
+
+    assert len(rows) == len(receipt.logs) > 0
+    for row, log in zip(rows, receipt.logs):
+        assert [row[field] for field in row.field_names] == [
+            log[field] for field in row.field_names
+        ]
+
+
+def test_projected_rows_have_full_row_values():
+    receipt_json = read_json(
+        ["test_export_receipts_job", "html_sanitize"],
+        "web3_response.icx_getTransactionResult_0x16dbc932b601821b08450ad6f228a6a8e1"
+        "bfd9cf5a361f0bf42ccf4b0b29be7b.json",
+    )
+    fields = {"receipt": ["status", "transaction_hash"], "log": ["data", "log_index"]}
+
+    rows = IcxRowMapper().json_dict_to_receipt_rows(receipt_json)
+    projected_rows = IcxRowMapper(fields=fields).json_dict_to_receipt_rows(receipt_json)
+
+    assert len(projected_rows) == len(rows)
+    for row, projected_row in zip(rows, projected_rows):
+        assert projected_row.field_names == tuple(fields[row.item_type])
+        assert [projected_row[field] for field in projected_row.field_names] == [
+            row[field] for field in projected_row.field_names
+        ]
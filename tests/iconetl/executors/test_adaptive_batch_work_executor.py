@@ -0,0 +1,82 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import threading
+
+from iconetl.executors.adaptive_batch_work_executor import AdaptiveBatchWorkExecutor
+
+
+def run_executor(executor, item_count, work_handler):
+    batch_sizes = []
+    lock = threading.Lock()
+
+    def handler(batch):
+        with lock:
+            batch_sizes.append(len(batch))
+        return work_handler(batch)
+
+    executor.execute(range(item_count), handler, total_items=item_count)
+    executor.shutdown()
+    return batch_sizes
+
+
+def test_adaptive_batch_work_executor_grows_fast_small_batches_to_max():
+    executor = AdaptiveBatchWorkExecutor(2, 1, 1, 64)
+
+    batch_sizes = run_executor(executor, 1000, lambda batch: 100 * len(batch))
+
+    assert sum(batch_sizes) == 1000
+    assert max(batch_sizes) == 64
+    assert executor.batch_size == 64
+
+
+def test_adaptive_batch_work_executor_shrinks_large_responses():
+    executor = AdaptiveBatchWorkExecutor(64, 1, 1, 64, max_response_bytes=10000)
+
+    run_executor(executor, 500, lambda batch: 1000 * len(batch))
+
+    assert executor.batch_size == 10
+
+
+def test_adaptive_batch_work_executor_halves_on_errors_down_to_min():
+    executor = AdaptiveBatchWorkExecutor(32, 1, 4, 64)
+
+    def fail_batches(batch):
+        if len(batch) > 1:
+            raise ConnectionError("Timed out")
+        return 100
+
+    batch_sizes = run_executor(executor, 200, fail_batches)
+
+    assert executor.batch_size == 4
+    # Batches already queued keep their size, later ones are halved
+    assert {32, 4} <= set(batch_sizes)
+    assert batch_sizes[-1] == 1
+
+
+def test_adaptive_batch_work_executor_halves_on_reported_errors():
+    executor = AdaptiveBatchWorkExecutor(32, 1, 4, 64)
+
+    executor.report_batch_error(32)
+    executor.report_batch_error(8)
+
+    assert executor.batch_size == 16
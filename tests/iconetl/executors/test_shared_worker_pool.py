@@ -0,0 +1,114 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import threading
+import time
+
+from blockchainetl_common.executors.batch_work_executor import BatchWorkExecutor
+from blockchainetl_common.executors.fail_safe_executor import FailSafeExecutor
+
+from iconetl.executors.shared_worker_pool import SharedWorkerPool
+
+
+class ConcurrencyTracker(object):
+    def __init__(self):
+        self.current = 0
+        self.highest = 0
+        self.lock = threading.Lock()
+
+    def work(self, batch):
+        with self.lock:
+            self.current += 1
+            self.highest = max(self.highest, self.current)
+        time.sleep(0.01)
+        with self.lock:
+            self.current -= 1
+
+
+def new_batch_work_executor(pool, priority=0, can_submit=None):
+    batch_work_executor = BatchWorkExecutor(1, pool.max_workers)
+    batch_work_executor.executor = FailSafeExecutor(pool.executor(priority, can_submit))
+    return batch_work_executor
+
+
+def test_shared_worker_pool_keeps_executors_within_budget():
+    pool = SharedWorkerPool(3)
+    tracker = ConcurrencyTracker()
+    executors = [new_batch_work_executor(pool) for _ in range(2)]
+
+    threads = [
+        threading.Thread(target=executor.execute, args=(range(20), tracker.work))
+        for executor in executors
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for executor in executors:
+        executor.shutdown()
+    pool.shutdown()
+
+    assert tracker.highest == 3
+
+
+def test_shared_worker_pool_starts_higher_priority_work_first():
+    pool = SharedWorkerPool(1)
+    started = []
+    release = threading.Event()
+    low = pool.executor(priority=0)
+    high = pool.executor(priority=1)
+
+    low.submit(release.wait)
+    waiting = [
+        threading.Thread(target=low.submit, args=(started.append, "low")),
+        threading.Thread(target=high.submit, args=(started.append, "high")),
+    ]
+    for thread in waiting:
+        thread.start()
+        time.sleep(0.05)
+    release.set()
+    for thread in waiting:
+        thread.join()
+    low.shutdown()
+    high.shutdown()
+    pool.shutdown()
+
+    assert started == ["high", "low"]
+
+
+def test_shared_worker_pool_holds_back_work_until_it_can_be_submitted():
+    pool = SharedWorkerPool(2)
+    ready = threading.Event()
+    executor = pool.executor(can_submit=ready.is_set)
+    submitted = threading.Event()
+
+    def submit():
+        executor.submit(lambda: None)
+        submitted.set()
+
+    threading.Thread(target=submit).start()
+
+    assert not submitted.wait(0.3)
+    ready.set()
+    assert submitted.wait(1)
+    executor.shutdown()
+    pool.shutdown()
@@ -0,0 +1,343 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import json
+import threading
+import time
+
+import pytest
+
+import iconetl.jobs.export_all_common as export_all_common_module
+import tests.resources
+from iconetl.enumeration.entity_type import EntityType
+from iconetl.jobs.export_all_common import (
+    export_all_common,
+    export_checkpoints,
+    export_partitions_concurrently,
+)
+from iconetl.jobs.export_manifest import ExportManifest, get_selection
+from iconetl.metrics import Metrics
+from iconetl.providers.caching import CacheMissError
+from tests.iconetl.providers.stub_rpc_server import StubRpcServer
+
+BLOCK_RESOURCE_GROUPS = ["test_export_blocks_job", "version_04_block"]
+BLOCK_RESOURCE_FILE = "web3_response.icx_getBlockByHeight_0xdcd995.json"
+RECEIPT_RESOURCE_GROUPS = ["test_export_receipts_job", "receipts_with_logs"]
+RECEIPT_RESOURCE_FILE = (
+    "web3_response.icx_getTransactionResult_"
+    "0x3680f3262fed98a4bc169c11b6ac66778da43c889d47a673d252362138715da9.json"
+)
+
+
+# Answers every block request with the same block without transactions
+class EmptyBlockRpcServer(StubRpcServer):
+    def handle_request(self, request):
+        response = json.loads(
+            tests.resources.read_resource(BLOCK_RESOURCE_GROUPS, BLOCK_RESOURCE_FILE)
+        )
+        response["result"]["height"] = int(request["params"]["height"], 16)
+        response["result"]["confirmed_transaction_list"] = []
+        response["id"] = request["id"]
+        return response
+
+
+# Answers block requests with the same block with 2 transactions, and receipt
+# requests with the same receipt with 2 logs
+class BlockAndReceiptRpcServer(StubRpcServer):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.methods = []
+
+    def handle_request(self, request):
+        self.methods.append(request["method"])
+        if request["method"] == "icx_getBlockByHeight":
+            response = json.loads(
+                tests.resources.read_resource(
+                    BLOCK_RESOURCE_GROUPS, BLOCK_RESOURCE_FILE
+                )
+            )
+            response["result"]["height"] = int(request["params"]["height"], 16)
+        else:
+            response = json.loads(
+                tests.resources.read_resource(
+                    RECEIPT_RESOURCE_GROUPS, RECEIPT_RESOURCE_FILE
+                )
+            )
+            response["result"]["txHash"] = request["params"]["txHash"]
+        response["id"] = request["id"]
+        return response
+
+
+# Answers block requests with the same block with 2 transactions whose hashes
+# differ per block, and receipt requests with an error
+class FailingReceiptRpcServer(StubRpcServer):
+    def handle_request(self, request):
+        if request["method"] != "icx_getBlockByHeight":
+            return {
+                "jsonrpc": "2.0",
+                "error": {"code": -32602, "message": "Invalid params"},
+                "id": request["id"],
+            }
+        height = int(request["params"]["height"], 16)
+        response = json.loads(
+            tests.resources.read_resource(BLOCK_RESOURCE_GROUPS, BLOCK_RESOURCE_FILE)
+        )
+        response["result"]["height"] = height
+        for index, transaction in enumerate(
+            response["result"]["confirmed_transaction_list"]
+        ):
+            transaction["txHash"] = "0x{:064x}".format(height * 2 + index)
+        response["id"] = request["id"]
+        return response
+
+
+def test_export_partitions_concurrently_runs_up_to_max_partitions():
+    partitions = [
+        (start, start + 9, "/{}".format(start)) for start in range(0, 100, 10)
+    ]
+    exported = []
+    running = [0, 0]
+    lock = threading.Lock()
+
+    def export(batch_start_block, batch_end_block, partition_dir):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+            exported.append(partition_dir)
+
+    export_partitions_concurrently(iter(partitions), export, 3)
+
+    assert sorted(exported) == sorted(partition[2] for partition in partitions)
+    assert running[1] == 3
+
+
+def test_export_partitions_concurrently_stops_after_failures():
+    partitions = [
+        (start, start + 9, "/{}".format(start)) for start in range(0, 100, 10)
+    ]
+    exported = []
+
+    def export(batch_start_block, batch_end_block, partition_dir):
+        if batch_start_block == 10:
+            raise ValueError("Export failed")
+        time.sleep(0.05)
+        exported.append(partition_dir)
+
+    with pytest.raises(ValueError):
+        export_partitions_concurrently(iter(partitions), export, 2)
+
+    assert len(exported) < len(partitions) - 1
+
+
+def test_export_all_common_exports_partitions_in_processes(tmpdir):
+    partitions = [(start, start + 4, "/{}".format(start)) for start in range(0, 20, 5)]
+
+    with EmptyBlockRpcServer(None) as server:
+        export_all_common(partitions, str(tmpdir), server.uri, 2, 2, processes=2)
+
+    for _, _, partition_dir in partitions:
+        blocks_dir = tmpdir.join("blocks" + partition_dir)
+        assert len(blocks_dir.listdir()) == 1
+        assert len(blocks_dir.listdir()[0].readlines()) == 6
+
+
+def test_export_all_common_keeps_connections_of_processes(tmpdir):
+    partitions = [(start, start + 4, "/{}".format(start)) for start in range(0, 40, 5)]
+    metrics = Metrics()
+
+    with EmptyBlockRpcServer(None) as server:
+        export_all_common(
+            partitions, str(tmpdir), server.uri, 2, 2, processes=2, metrics=metrics
+        )
+
+    # 3 batches per partition over at most 2 connections per process
+    assert metrics.get("http_requests") == 3 * len(partitions)
+    assert metrics.get("connections_opened") <= 2 * 2
+
+
+def test_export_all_common_raises_errors_of_processes(tmpdir):
+    partitions = [(start, start + 4, "/{}".format(start)) for start in range(0, 20, 5)]
+
+    with pytest.raises(CacheMissError):
+        export_all_common(
+            partitions,
+            str(tmpdir.join("output")),
+            "http://127.0.0.1:1/api/v3",
+            2,
+            2,
+            cache_dir=str(tmpdir.join("cache")),
+            replay_only=True,
+            processes=2,
+        )
+
+
+def test_export_all_common_skips_partitions_in_manifest(tmpdir):
+    partitions = [(0, 9, "/0"), (10, 19, "/10")]
+
+    with EmptyBlockRpcServer(None) as server:
+        export_all_common(partitions, str(tmpdir), server.uri, 2, 5)
+        request_count = server.request_count
+        export_all_common(partitions, str(tmpdir), server.uri, 2, 5)
+        assert server.request_count == request_count
+        export_all_common(partitions, str(tmpdir), server.uri, 2, 5, resume=False)
+        assert server.request_count == 2 * request_count
+
+    manifest = ExportManifest(str(tmpdir))
+    assert manifest.get_finished_partition(
+        "/0", 0, 9, get_selection(EntityType.ALL)
+    ) == {
+        "block": 10,
+        "transaction": 0,
+        "receipt": 0,
+        "log": 0,
+    }
+    manifest.close()
+
+
+def test_export_all_common_exports_partitions_again_with_other_fields(tmpdir):
+    output_dir = str(tmpdir.join("output"))
+    cache_dir = str(tmpdir.join("cache"))
+    with EmptyBlockRpcServer(None) as server:
+        export_all_common(
+            [(0, 9, "/0")], output_dir, server.uri, 2, 5, cache_dir=cache_dir
+        )
+        server_uri = server.uri
+
+    export_kwargs = dict(
+        cache_dir=cache_dir,
+        replay_only=True,
+        fields={"block": ["number", "hash"]},
+    )
+    export_all_common([(0, 9, "/0")], output_dir, server_uri, 2, 5, **export_kwargs)
+    blocks_file = tmpdir.join("output", "blocks", "0").listdir()[0]
+    assert blocks_file.readlines()[0] == "number,hash\n"
+
+    # The same fields again skip the partition
+    blocks_file.write("number,hash\n")
+    export_all_common([(0, 9, "/0")], output_dir, server_uri, 2, 5, **export_kwargs)
+    assert blocks_file.readlines() == ["number,hash\n"]
+
+
+def test_export_all_common_skips_receipts_of_unexported_entity_types(tmpdir):
+    with BlockAndReceiptRpcServer(None) as server:
+        export_all_common(
+            [(0, 2, "/0")],
+            str(tmpdir),
+            server.uri,
+            2,
+            5,
+            entity_types=["block", "transaction"],
+        )
+
+    assert set(server.methods) == {"icx_getBlockByHeight"}
+    assert sorted(path.basename for path in tmpdir.listdir()) == [
+        ".export_manifest.sqlite",
+        "blocks",
+        "transactions",
+    ]
+    assert len(tmpdir.join("transactions", "0").listdir()[0].readlines()) == 1 + 3 * 2
+
+
+@pytest.mark.parametrize("map_to_rows", [False, True])
+def test_export_all_common_exports_logs_only(tmpdir, map_to_rows):
+    with BlockAndReceiptRpcServer(None) as server:
+        export_all_common(
+            [(0, 2, "/0")],
+            str(tmpdir),
+            server.uri,
+            2,
+            5,
+            keep_transaction_hashes=True,
+            map_to_rows=map_to_rows,
+            entity_types=["log"],
+        )
+
+    # Transactions are the same in every block, so their receipts are requested once
+    assert server.methods.count("icx_getTransactionResult") == 2
+    assert sorted(path.basename for path in tmpdir.listdir()) == [
+        ".export_manifest.sqlite",
+        ".tmp",
+        "logs",
+    ]
+    assert len(tmpdir.join("logs", "0").listdir()[0].readlines()) == 1 + 2 * 2
+
+
+def test_export_checkpoints_resumes_after_last_checkpoint(tmpdir):
+    output_file = str(tmpdir.join("blocks.csv"))
+    manifest = ExportManifest(str(tmpdir))
+    exported_ranges = []
+
+    def export_range(start_block, end_block, files, fail_at=None):
+        if start_block == fail_at:
+            raise ValueError("Export failed")
+        exported_ranges.append(start_block)
+        with open(files[0], "w") as f:
+            f.write("number\n")
+            f.writelines("{}\n".format(n) for n in range(start_block, end_block + 1))
+        return {"block": end_block - start_block + 1}
+
+    ranges = [(0, 4), (5, 9), (10, 11)]
+    with pytest.raises(ValueError):
+        export_checkpoints(
+            ranges,
+            "/0",
+            [output_file],
+            lambda *args: export_range(*args, fail_at=5),
+            manifest,
+        )
+    row_counts = export_checkpoints(ranges, "/0", [output_file], export_range, manifest)
+    manifest.close()
+
+    assert exported_ranges == [0, 5, 10]
+    assert row_counts == {"block": 12}
+    with open(output_file) as f:
+        assert f.read().split() == ["number"] + [str(n) for n in range(12)]
+    assert tmpdir.listdir() == sorted(
+        [tmpdir.join("blocks.csv"), tmpdir.join(".export_manifest.sqlite")]
+    )
+
+
+def test_export_all_common_fails_when_receipts_fail_with_full_hash_queue(
+    tmpdir, monkeypatch
+):
+    monkeypatch.setattr(export_all_common_module, "TRANSACTION_HASH_QUEUE_SIZE", 2)
+    errors = []
+
+    def export():
+        try:
+            export_all_common([(0, 49, "/0")], str(tmpdir), server.uri, 1, 2)
+        except Exception as e:
+            errors.append(e)
+
+    with FailingReceiptRpcServer(None) as server:
+        # Block batches are held back by the shared worker pool while the queue
+        # is full, which must not outlive the receipts job
+        thread = threading.Thread(target=export, daemon=True)
+        thread.start()
+        thread.join(10)
+
+    assert not thread.is_alive()
+    assert len(errors) == 1
+    assert isinstance(errors[0], ValueError)
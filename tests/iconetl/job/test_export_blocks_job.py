@@ -20,12 +20,16 @@
 #  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 
+import csv
+import io
+
 import pytest
 import tests.resources
 from blockchainetl_common.thread_local_proxy import ThreadLocalProxy
 from iconetl.jobs.export_blocks_job import ExportBlocksJob
 from iconetl.jobs.exporters.blocks_and_transactions_item_exporter import \
     blocks_and_transactions_item_exporter
+from iconetl.jobs.exporters.fields import parse_fields
 from tests.iconetl.job.utils import get_web3_provider
 from tests.utils import (compare_lines_ignore_order, read_file,
                          skip_if_slow_tests_disabled)
@@ -93,3 +97,96 @@ def test_export_blocks_job(
         read_resource(resource_group, "expected_transactions.csv"),
         read_file(transactions_output_file),
     )
+
+
+@pytest.mark.parametrize(
+    "block_number,resource_group",
+    [
+        (10324748, "version_01a_block"),
+        (12640760, "version_03_block"),
+        (14473621, "version_04_block"),
+        (14473622, "version_05_block"),
+    ],
+)
+def test_export_blocks_job_map_to_rows(tmpdir, block_number, resource_group):
+    blocks_output_file = str(tmpdir.join("actual_blocks.csv"))
+    transactions_output_file = str(tmpdir.join("actual_transactions.csv"))
+
+    job = ExportBlocksJob(
+        start_block=block_number,
+        end_block=block_number,
+        batch_size=1,
+        batch_web3_provider=ThreadLocalProxy(
+            lambda: get_web3_provider(
+                "mock", lambda file: read_resource(resource_group, file), batch=True,
+            )
+        ),
+        max_workers=5,
+        item_exporter=blocks_and_transactions_item_exporter(
+            blocks_output_file, transactions_output_file
+        ),
+        map_to_rows=True,
+    )
+    job.run()
+
+    assert read_resource(resource_group, "expected_blocks.csv") == read_file(
+        blocks_output_file
+    )
+    compare_lines_ignore_order(
+        read_resource(resource_group, "expected_transactions.csv"),
+        read_file(transactions_output_file),
+    )
+
+
+def project_csv(csv_string, fields):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    for row in csv.DictReader(io.StringIO(csv_string)):
+        if output.tell() == 0:
+            writer.writerow(fields)
+        writer.writerow([row[field] for field in fields])
+    return output.getvalue()
+
+
+@pytest.mark.parametrize(
+    "block_number,resource_group",
+    [(10324748, "version_01a_block"), (14473622, "version_05_block")],
+)
+def test_export_blocks_job_with_fields(tmpdir, block_number, resource_group):
+    blocks_output_file = str(tmpdir.join("actual_blocks.csv"))
+    transactions_output_file = str(tmpdir.join("actual_transactions.csv"))
+    fields = parse_fields(
+        "block.number,block.timestamp,transaction.hash,transaction.transaction_index,"
+        "transaction.value,transaction.data"
+    )
+
+    job = ExportBlocksJob(
+        start_block=block_number,
+        end_block=block_number,
+        batch_size=1,
+        batch_web3_provider=ThreadLocalProxy(
+            lambda: get_web3_provider(
+                "mock", lambda file: read_resource(resource_group, file), batch=True,
+            )
+        ),
+        max_workers=5,
+        item_exporter=blocks_and_transactions_item_exporter(
+            blocks_output_file, transactions_output_file, fields=fields
+        ),
+        fields=fields,
+    )
+    job.run()
+
+    compare_lines_ignore_order(
+        project_csv(
+            read_resource(resource_group, "expected_blocks.csv"), ["number", "timestamp"]
+        ),
+        read_file(blocks_output_file),
+    )
+    compare_lines_ignore_order(
+        project_csv(
+            read_resource(resource_group, "expected_transactions.csv"),
+            ["value", "hash", "transaction_index", "data"],
+        ),
+        read_file(transactions_output_file),
+    )
@@ -110,3 +110,45 @@ def test_export_receipts_job(
         read_resource(resource_group, "expected_logs." + output_format),
         read_file(logs_output_file),
     )
+
+
+@pytest.mark.parametrize(
+    "transaction_hashes,output_format,resource_group",
+    [
+        (DEFAULT_TX_HASHES, "csv", "receipts_with_logs"),
+        (DEFAULT_TX_HASHES, "json", "receipts_with_logs"),
+        (HTML_TX_HASHES, "csv", "html_sanitize"),
+        (HTML_TX_HASHES, "json", "html_sanitize"),
+    ],
+)
+def test_export_receipts_job_map_to_rows(
+    tmpdir, transaction_hashes, output_format, resource_group
+):
+    receipts_output_file = str(tmpdir.join("actual_receipts." + output_format))
+    logs_output_file = str(tmpdir.join("actual_logs." + output_format))
+
+    job = ExportReceiptsJob(
+        transaction_hashes_iterable=transaction_hashes,
+        batch_size=2,
+        batch_web3_provider=ThreadLocalProxy(
+            lambda: get_web3_provider(
+                "mock", lambda file: read_resource(resource_group, file), batch=True,
+            )
+        ),
+        max_workers=5,
+        item_exporter=receipts_and_logs_item_exporter(
+            receipts_output_file, logs_output_file
+        ),
+        map_to_rows=True,
+    )
+    job.run()
+
+    compare_lines_ignore_order(
+        read_resource(resource_group, "expected_receipts." + output_format),
+        read_file(receipts_output_file),
+    )
+
+    compare_lines_ignore_order(
+        read_resource(resource_group, "expected_logs." + output_format),
+        read_file(logs_output_file),
+    )
@@ -0,0 +1,53 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import pytest
+
+from iconetl.jobs.exporters.fields import parse_fields, with_required_fields
+
+
+def test_parse_fields_keeps_column_order():
+    fields = parse_fields("transaction.data, block.hash,transaction.hash,block.number")
+
+    assert fields == {
+        "block": ["number", "hash"],
+        "transaction": ["hash", "data"],
+    }
+
+
+@pytest.mark.parametrize(
+    "fields_string", ["block.height", "blocks.number", "number", "log.index"]
+)
+def test_parse_fields_rejects_unknown_fields(fields_string):
+    with pytest.raises(ValueError):
+        parse_fields(fields_string)
+
+
+def test_with_required_fields():
+    fields = {"block": ["number"], "transaction": ["data"]}
+
+    assert with_required_fields(fields, "transaction", ["hash"]) == {
+        "block": ["number"],
+        "transaction": ["hash", "data"],
+    }
+    assert with_required_fields(fields, "receipt", ["status"]) is fields
+    assert with_required_fields(None, "transaction", ["hash"]) is None
@@ -0,0 +1,129 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import threading
+
+import pytest
+
+from iconetl.jobs.export_blocks_job import ExportBlocksJob
+from iconetl.jobs.export_receipts_job import ExportReceiptsJob
+from iconetl.jobs.exporters.queued_item_exporter import (
+    QueuedItemExporter,
+    get_writer_stats,
+)
+from iconetl.metrics import Metrics
+from iconetl.misc.closable_queue import QueueAbortedError
+
+
+class RecordingItemExporter(object):
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.items = []
+        self.threads = set()
+        self.closed = False
+
+    def open(self):
+        pass
+
+    def export_items(self, items):
+        self.threads.add(threading.current_thread().name)
+        for item in items:
+            if item == self.fail_on:
+                raise OSError("No space left on device")
+            self.items.append(item)
+
+    def close(self):
+        self.closed = True
+
+
+def test_queued_item_exporter_writes_batches_in_writer_thread():
+    item_exporter = RecordingItemExporter()
+    metrics = Metrics()
+    exporter = QueuedItemExporter(item_exporter, queue_size=2, metrics=metrics)
+
+    exporter.open()
+    for batch in range(10):
+        exporter.export_items([{"batch": batch, "index": i} for i in range(3)])
+    exporter.export_items([])
+    exporter.close()
+
+    assert [(item["batch"], item["index"]) for item in item_exporter.items] == [
+        (batch, index) for batch in range(10) for index in range(3)
+    ]
+    assert item_exporter.threads == {"QueuedItemExporter"}
+    assert item_exporter.closed
+    assert metrics.get("writer_batches") == 10
+    average_depth, blocked_seconds, idle_seconds = get_writer_stats(metrics, "writer")
+    assert 0 <= average_depth <= 2
+    assert blocked_seconds >= 0 and idle_seconds >= 0
+
+
+def test_queued_item_exporter_raises_writer_errors():
+    item_exporter = RecordingItemExporter(fail_on={"index": 1})
+    exporter = QueuedItemExporter(item_exporter, queue_size=1, name="blocks_writer")
+
+    exporter.open()
+    with pytest.raises(QueueAbortedError, match="blocks_writer"):
+        for index in range(100):
+            exporter.export_item({"index": index})
+    with pytest.raises(OSError):
+        exporter.close()
+    assert item_exporter.items == [{"index": 0}]
+    assert item_exporter.closed
+
+
+class FailingBatchProvider(object):
+    def make_batch_request(self, text):
+        raise ValueError("Invalid params")
+
+
+def new_blocks_job(item_exporter):
+    return ExportBlocksJob(
+        start_block=0,
+        end_block=9,
+        batch_size=1,
+        batch_web3_provider=FailingBatchProvider(),
+        max_workers=2,
+        item_exporter=item_exporter,
+    )
+
+
+def new_receipts_job(item_exporter):
+    return ExportReceiptsJob(
+        transaction_hashes_iterable=["0x01", "0x02"],
+        batch_size=1,
+        batch_web3_provider=FailingBatchProvider(),
+        max_workers=2,
+        item_exporter=item_exporter,
+    )
+
+
+@pytest.mark.parametrize("new_job", [new_blocks_job, new_receipts_job])
+def test_failing_export_job_closes_queued_item_exporter(new_job):
+    item_exporter = RecordingItemExporter()
+    exporter = QueuedItemExporter(item_exporter, queue_size=1)
+
+    with pytest.raises(ValueError):
+        new_job(exporter).run()
+
+    assert item_exporter.closed
+    assert not exporter._thread.is_alive()
@@ -0,0 +1,76 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import pytest
+
+import tests.resources
+from iconetl.jobs.export_blocks_job import ExportBlocksJob
+from iconetl.jobs.exporters.blocks_and_transactions_item_exporter import (
+    blocks_and_transactions_item_exporter,
+)
+from iconetl.providers.auto import get_provider_from_uri
+from tests.iconetl.providers.stub_rpc_server import StubRpcServer
+from tests.utils import compare_lines_ignore_order, read_file
+
+pytest.importorskip("ijson")
+
+
+def read_resource(groups, file_name):
+    return tests.resources.read_resource(groups, file_name)
+
+
+@pytest.mark.parametrize(
+    "start_block,end_block,batch_size,resource_group",
+    [
+        (10324748, 10324748, 1, "version_01a_block"),
+        (14473622, 14473622, 1, "version_05_block"),
+    ],
+)
+def test_export_blocks_job_with_streamed_responses(
+    tmpdir, start_block, end_block, batch_size, resource_group
+):
+    groups = ["test_export_blocks_job", resource_group]
+    blocks_output_file = str(tmpdir.join("actual_blocks.csv"))
+    transactions_output_file = str(tmpdir.join("actual_transactions.csv"))
+
+    with StubRpcServer(lambda file: read_resource(groups, file)) as stub_server:
+        job = ExportBlocksJob(
+            start_block=start_block,
+            end_block=end_block,
+            batch_size=batch_size,
+            batch_web3_provider=get_provider_from_uri(
+                stub_server.uri, batch=True, stream_responses=True
+            ),
+            max_workers=5,
+            item_exporter=blocks_and_transactions_item_exporter(
+                blocks_output_file, transactions_output_file
+            ),
+        )
+        job.run()
+
+    compare_lines_ignore_order(
+        read_resource(groups, "expected_blocks.csv"), read_file(blocks_output_file)
+    )
+    compare_lines_ignore_order(
+        read_resource(groups, "expected_transactions.csv"),
+        read_file(transactions_output_file),
+    )
@@ -0,0 +1,117 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import threading
+
+import pytest
+
+from iconetl.jobs.export_all_common import run_blocks_and_receipts_jobs
+from iconetl.jobs.exporters.transaction_hash_item_exporter import (
+    TransactionHashItemExporter,
+)
+from iconetl.misc.closable_queue import ClosableQueue, QueueAbortedError
+
+
+class ListItemExporter(object):
+    def __init__(self):
+        self.items = []
+
+    def open(self):
+        pass
+
+    def export_items(self, items):
+        self.items.extend(items)
+
+    def export_item(self, item):
+        self.items.append(item)
+
+    def close(self):
+        pass
+
+
+class FunctionJob(object):
+    def __init__(self, run):
+        self.run = run
+
+
+def test_transaction_hash_item_exporter_queues_unique_hashes(tmpdir):
+    transaction_hash_queue = ClosableQueue()
+    transaction_hashes_file = str(tmpdir.join("transaction_hashes.csv"))
+    item_exporter = ListItemExporter()
+    exporter = TransactionHashItemExporter(
+        item_exporter, transaction_hash_queue, transaction_hashes_file
+    )
+    items = [
+        {"type": "block", "hash": "0x00"},
+        {"type": "transaction", "hash": "0x01"},
+        {"type": "transaction", "hash": "0x02"},
+        {"type": "transaction", "hash": "0x01"},
+    ]
+
+    exporter.open()
+    exporter.export_items(items)
+    exporter.close()
+
+    assert item_exporter.items == items
+    assert list(transaction_hash_queue) == ["0x01", "0x02"]
+    with open(transaction_hashes_file) as f:
+        assert f.read() == "0x01\n0x02\n"
+
+
+def test_closable_queue_blocks_producers_while_full():
+    transaction_hash_queue = ClosableQueue(maxsize=2)
+    produced = []
+
+    def produce():
+        for index in range(5):
+            transaction_hash_queue.put(index)
+            produced.append(index)
+        transaction_hash_queue.close()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    producer.join(0.5)
+
+    assert producer.is_alive()
+    assert produced == [0, 1]
+    assert list(transaction_hash_queue) == [0, 1, 2, 3, 4]
+    producer.join()
+
+
+def test_failing_receipts_job_does_not_block_blocks_job():
+    transaction_hash_queue = ClosableQueue(maxsize=1)
+
+    def run_blocks_job():
+        for index in range(10):
+            transaction_hash_queue.put(index)
+
+    def run_receipts_job():
+        for _ in transaction_hash_queue:
+            raise ValueError("Receipts failed")
+
+    with pytest.raises(ValueError, match="Receipts failed") as exc_info:
+        run_blocks_and_receipts_jobs(
+            FunctionJob(run_blocks_job),
+            FunctionJob(run_receipts_job),
+            transaction_hash_queue,
+        )
+    assert isinstance(exc_info.value.__context__, QueueAbortedError)
@@ -0,0 +1,75 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import glob
+import json
+import os
+
+import pytest
+
+import tests.resources
+from iconetl.mappers.row_mapper import IcxRowMapper
+from iconetl.mappers.transaction_mapper import IcxTransactionMapper
+
+BLOCKS_DIR = os.path.join(
+    os.path.dirname(tests.resources.__file__), "test_export_blocks_job"
+)
+
+
+def read_block(resource_group):
+    (file_name,) = glob.glob(os.path.join(BLOCKS_DIR, resource_group, "web3_*.json"))
+    with open(file_name) as f:
+        return json.load(f)["result"]
+
+
+@pytest.mark.parametrize(
+    "resource_group",
+    ["version_01a_block", "version_03_block", "version_04_block", "version_05_block"],
+)
+def test_transaction_rows_map_like_transaction_mapper(resource_group):
+    block = read_block(resource_group)
+    transaction_mapper = IcxTransactionMapper()
+    row_mapper = IcxRowMapper(export_blocks=False)
+
+    transaction_rows = row_mapper.json_dict_to_block_rows(block)
+
+    for idx, tx in enumerate(block["confirmed_transaction_list"]):
+        expected = transaction_mapper.json_dict_to_transaction(
+            tx, idx, block["block_hash"], block["height"], block["time_stamp"]
+        )
+        row = transaction_rows[idx]
+        assert [row[field] for field in row.field_names] == [
+            expected[field] for field in row.field_names
+        ]
+
+
+def test_transaction_rows_map_transactions_without_hash():
+    block = read_block("version_05_block")
+    for tx in block["confirmed_transaction_list"]:
+        del tx["txHash"]
+    row_mapper = IcxRowMapper(export_blocks=False)
+
+    transaction_rows = row_mapper.json_dict_to_block_rows(block)
+
+    assert [row["hash"] for row in transaction_rows] == [None] * len(
+        block["confirmed_transaction_list"]
+    )
@@ -0,0 +1,133 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import gzip
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from tests.iconetl.job.mock_web3_provider import build_file_name
+
+
+class StubRpcServer(object):
+    """Local HTTP/1.1 JSON RPC server answering batches from test resources."""
+
+    def __init__(
+        self, read_resource, response_delay=0, status_code=200, content_encoding=None
+    ):
+        self.read_resource = read_resource
+        self.response_delay = response_delay
+        self.status_code = status_code
+        # Used for responses when the client accepts it
+        self.content_encoding = content_encoding
+        self.request_count = 0
+        self.request_encodings = []
+        self._lock = threading.Lock()
+        self._httpd = _ThreadingHTTPServer(("127.0.0.1", 0), _handler_class(self))
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def uri(self):
+        host, port = self._httpd.server_address
+        return "http://{host}:{port}/api/v3".format(host=host, port=port)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def handle_batch(self, batch):
+        return [self.handle_request(request) for request in batch]
+
+    def handle_request(self, request):
+        file_name = build_file_name(request["method"], request["params"])
+        response = json.loads(self.read_resource(file_name))
+        response["id"] = request["id"]
+        return response
+
+    def track_request(self, request_encoding):
+        with self._lock:
+            self.request_count += 1
+            self.request_encodings.append(request_encoding)
+
+    def encode_response(self, content, accept_encoding):
+        accepted = [encoding.strip() for encoding in accept_encoding.split(",")]
+        if self.content_encoding is None or self.content_encoding not in accepted:
+            return content, None
+        return _compress(content, self.content_encoding), self.content_encoding
+
+
+def _compress(content, content_encoding):
+    if content_encoding == "gzip":
+        return gzip.compress(content)
+    if content_encoding == "deflate":
+        return zlib.compress(content)
+    if content_encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor().compress(content)
+    raise ValueError("Unknown encoding {}".format(content_encoding))
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def _handler_class(stub_server):
+    class StubRpcRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, avoid delayed ACK stalls
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            request_encoding = self.headers.get("Content-Encoding")
+            stub_server.track_request(request_encoding)
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            if request_encoding == "gzip":
+                body = gzip.decompress(body)
+            time.sleep(stub_server.response_delay)
+            if stub_server.status_code != 200:
+                self.send_error(stub_server.status_code)
+                return
+            response = stub_server.handle_batch(json.loads(body.decode("utf-8")))
+            content, content_encoding = stub_server.encode_response(
+                json.dumps(response).encode("utf-8"),
+                self.headers.get("Accept-Encoding", ""),
+            )
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if content_encoding is not None:
+                self.send_header("Content-Encoding", content_encoding)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubRpcRequestHandler
@@ -0,0 +1,78 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import json
+
+import pytest
+
+import tests.resources
+from iconetl.json_rpc_requests import generate_get_block_by_number_json_rpc
+from iconetl.metrics import Metrics
+from iconetl.providers.auto import get_provider_from_uri
+from iconetl.providers.session import create_session, get_connection_stats
+from tests.iconetl.providers.stub_rpc_server import StubRpcServer
+
+RESOURCE_GROUP = "test_export_blocks_job"
+
+
+def read_resource(resource_group, file_name):
+    return tests.resources.read_resource([RESOURCE_GROUP, resource_group], file_name)
+
+
+def test_batch_http_provider_reuses_pooled_connections():
+    metrics = Metrics()
+    session = create_session(pool_size=2, metrics=metrics)
+
+    with StubRpcServer(
+        lambda file: read_resource("version_03_block", file)
+    ) as stub_server:
+        for _ in range(3):
+            # A fresh provider per request still shares the pooled session
+            provider = get_provider_from_uri(
+                stub_server.uri, batch=True, session=session
+            )
+            response = provider.make_batch_request(
+                json.dumps(list(generate_get_block_by_number_json_rpc([12640760])))
+            )
+            assert response[0]["result"]["height"] == 12640760
+
+    session.close()
+
+    assert stub_server.request_count == 3
+    assert get_connection_stats(metrics) == (1, 2)
+
+
+def test_batch_http_provider_streams_response_items():
+    pytest.importorskip("ijson")
+
+    with StubRpcServer(
+        lambda file: read_resource("version_03_block", file)
+    ) as stub_server:
+        provider = get_provider_from_uri(
+            stub_server.uri, batch=True, stream_responses=True
+        )
+        response_items = provider.iter_batch_request(
+            json.dumps(list(generate_get_block_by_number_json_rpc([12640760] * 3)))
+        )
+        assert [item["id"] for item in response_items] == [0, 1, 2]
+
+    assert provider.get_last_response_size() > 0
@@ -0,0 +1,206 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import json
+import os
+import time
+
+import pytest
+
+import tests.resources
+from iconetl.jobs.export_blocks_job import ExportBlocksJob
+from iconetl.jobs.exporters.blocks_and_transactions_item_exporter import (
+    blocks_and_transactions_item_exporter,
+)
+from iconetl.json_rpc_requests import generate_get_block_by_number_json_rpc
+from iconetl.metrics import Metrics
+from iconetl.providers.auto import get_provider_from_uri
+from iconetl.providers.caching import (
+    CacheMissError,
+    CachingBatchProvider,
+    get_cache_stats,
+)
+from iconetl.providers.response_cache import SegmentedResponseCache
+from tests.iconetl.providers.stub_rpc_server import StubRpcServer
+from tests.utils import compare_lines_ignore_order, read_file
+
+RESOURCE_GROUPS = ["test_export_blocks_job", "version_05_block"]
+
+
+def read_resource(file_name):
+    return tests.resources.read_resource(RESOURCE_GROUPS, file_name)
+
+
+def export_blocks(tmpdir, name, batch_web3_provider):
+    blocks_output_file = str(tmpdir.join(name + "_blocks.csv"))
+    transactions_output_file = str(tmpdir.join(name + "_transactions.csv"))
+    job = ExportBlocksJob(
+        start_block=14473622,
+        end_block=14473622,
+        batch_size=1,
+        batch_web3_provider=batch_web3_provider,
+        max_workers=1,
+        item_exporter=blocks_and_transactions_item_exporter(
+            blocks_output_file, transactions_output_file
+        ),
+    )
+    job.run()
+    return blocks_output_file, transactions_output_file
+
+
+def test_caching_batch_provider_replays_export_from_cache(tmpdir):
+    cache_dir = str(tmpdir.join("cache"))
+    metrics = Metrics()
+
+    with StubRpcServer(read_resource) as stub_server:
+        cache = SegmentedResponseCache(cache_dir)
+        export_blocks(
+            tmpdir,
+            "online",
+            CachingBatchProvider(
+                get_provider_from_uri(stub_server.uri, batch=True), cache
+            ),
+        )
+        cache.close()
+
+    cache = SegmentedResponseCache(cache_dir)
+    blocks_file, transactions_file = export_blocks(
+        tmpdir,
+        "replayed",
+        CachingBatchProvider(None, cache, replay_only=True, metrics=metrics),
+    )
+    cache.close()
+
+    assert stub_server.request_count == 1
+    assert get_cache_stats(metrics) == (1, 0)
+    compare_lines_ignore_order(
+        read_resource("expected_blocks.csv"), read_file(blocks_file)
+    )
+    compare_lines_ignore_order(
+        read_resource("expected_transactions.csv"), read_file(transactions_file)
+    )
+
+
+def test_caching_batch_provider_forwards_only_misses(tmpdir):
+    metrics = Metrics()
+    cache = SegmentedResponseCache(str(tmpdir))
+
+    with StubRpcServer(read_resource) as stub_server:
+        provider = CachingBatchProvider(
+            get_provider_from_uri(stub_server.uri, batch=True), cache, metrics=metrics
+        )
+        for block_numbers in [[14473622], [14473622, 14473622]]:
+            provider.make_batch_request(
+                json.dumps(list(generate_get_block_by_number_json_rpc(block_numbers)))
+            )
+
+    assert stub_server.request_count == 1
+    assert get_cache_stats(metrics) == (2, 1)
+
+    replaying_provider = CachingBatchProvider(None, cache, replay_only=True)
+    with pytest.raises(CacheMissError):
+        replaying_provider.make_batch_request(
+            json.dumps(list(generate_get_block_by_number_json_rpc([1])))
+        )
+    cache.close()
+
+
+def test_caching_batch_provider_streams_responses(tmpdir):
+    cache = SegmentedResponseCache(str(tmpdir.join("cache")))
+
+    with StubRpcServer(read_resource) as stub_server:
+        provider = CachingBatchProvider(
+            get_provider_from_uri(stub_server.uri, batch=True, stream_responses=True),
+            cache,
+        )
+        assert provider.stream_responses
+        for name in ["online", "cached"]:
+            blocks_file, transactions_file = export_blocks(tmpdir, name, provider)
+            compare_lines_ignore_order(
+                read_resource("expected_blocks.csv"), read_file(blocks_file)
+            )
+            compare_lines_ignore_order(
+                read_resource("expected_transactions.csv"), read_file(transactions_file)
+            )
+    cache.close()
+
+    assert stub_server.request_count == 1
+
+
+def test_segmented_response_cache_evicts_least_recently_used_segments(tmpdir):
+    values = {key: os.urandom(1000) for key in ["a", "b", "c", "d"]}
+    # Every value goes to a segment of its own
+    cache = SegmentedResponseCache(
+        str(tmpdir), max_size_bytes=3500, segment_size_bytes=1000
+    )
+    for key in ["a", "b", "c"]:
+        cache.put_many({key: values[key]})
+        time.sleep(0.01)
+    assert cache.get_many(["a"]) == {"a": values["a"]}
+    time.sleep(0.01)
+
+    cache.put_many({"d": values["d"]})
+
+    assert sorted(cache.get_many(["a", "b", "c", "d"])) == ["a", "c", "d"]
+    assert cache.get_size() <= 3500
+    cache.close()
+
+
+def test_segmented_response_cache_keeps_segments_of_other_writers(tmpdir):
+    values = {key: os.urandom(1000) for key in ["a", "b", "c"]}
+    # Another process sharing the cache directory
+    other_cache = SegmentedResponseCache(
+        str(tmpdir), max_size_bytes=2500, segment_size_bytes=1000
+    )
+    other_cache.put_many({"a": values["a"]})
+    time.sleep(0.01)
+    cache = SegmentedResponseCache(
+        str(tmpdir), max_size_bytes=2500, segment_size_bytes=1000
+    )
+    for key in ["b", "c"]:
+        cache.put_many({key: values[key]})
+        time.sleep(0.01)
+
+    assert sorted(cache.get_many(["a", "b", "c"])) == ["a", "c"]
+    other_cache.close()
+    cache.close()
+
+
+def test_segmented_response_cache_evicts_segments_of_exited_writers(tmpdir):
+    values = {key: os.urandom(1000) for key in ["a", "b", "c"]}
+    cache = SegmentedResponseCache(
+        str(tmpdir), max_size_bytes=2500, segment_size_bytes=1000
+    )
+    cache.put_many({"a": values["a"]})
+    # Left behind by a process that was killed while appending
+    with cache._connection:
+        cache._connection.execute(
+            "UPDATE segments SET writer_pid = ? WHERE id = ?",
+            (2**22 + 1, cache._segment_id),
+        )
+    time.sleep(0.01)
+    for key in ["b", "c"]:
+        cache.put_many({key: values[key]})
+        time.sleep(0.01)
+
+    assert sorted(cache.get_many(["a", "b", "c"])) == ["b", "c"]
+    cache.close()
@@ -0,0 +1,118 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import asyncio
+import json
+
+import pytest
+
+import tests.resources
+from iconetl.json_rpc_requests import generate_get_block_by_number_json_rpc
+from iconetl.metrics import Metrics
+from iconetl.providers.auto import get_provider_from_uri
+from iconetl.providers.compression import get_compression_stats
+from tests.iconetl.providers.stub_rpc_server import StubRpcServer
+
+RESOURCE_GROUP = "test_export_blocks_job"
+
+BLOCK_NUMBERS = [10324748] * 20
+
+
+def read_resource(file_name):
+    return tests.resources.read_resource(
+        [RESOURCE_GROUP, "version_01a_block"], file_name
+    )
+
+
+def make_batch_request(provider, streaming):
+    text = json.dumps(list(generate_get_block_by_number_json_rpc(BLOCK_NUMBERS)))
+    if streaming:
+        return list(provider.iter_batch_request(text))
+    return provider.make_batch_request(text)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+@pytest.mark.parametrize("content_encoding", ["gzip", "deflate", "zstd"])
+def test_batch_http_provider_decodes_compressed_responses(content_encoding, streaming):
+    if content_encoding == "zstd":
+        pytest.importorskip("zstandard")
+    if streaming:
+        pytest.importorskip("ijson")
+    metrics = Metrics()
+
+    with StubRpcServer(read_resource, content_encoding=content_encoding) as stub_server:
+        provider = get_provider_from_uri(
+            stub_server.uri, batch=True, metrics=metrics, stream_responses=streaming
+        )
+        response = make_batch_request(provider, streaming)
+
+    assert [item["result"]["height"] for item in response] == BLOCK_NUMBERS
+    bytes_on_wire, bytes_decoded = get_compression_stats(metrics)
+    assert 0 < bytes_on_wire * 5 < bytes_decoded
+    assert provider.get_last_response_size() == bytes_decoded
+
+
+def test_batch_http_provider_without_compression():
+    metrics = Metrics()
+
+    with StubRpcServer(read_resource, content_encoding="gzip") as stub_server:
+        provider = get_provider_from_uri(
+            stub_server.uri, batch=True, metrics=metrics, compression=False
+        )
+        make_batch_request(provider, streaming=False)
+
+    bytes_on_wire, bytes_decoded = get_compression_stats(metrics)
+    assert bytes_on_wire == bytes_decoded
+
+
+def test_batch_http_provider_compresses_large_requests():
+    with StubRpcServer(read_resource) as stub_server:
+        provider = get_provider_from_uri(
+            stub_server.uri, batch=True, compress_requests_over=1000
+        )
+        make_batch_request(provider, streaming=False)
+        provider.make_batch_request(
+            json.dumps(list(generate_get_block_by_number_json_rpc([10324748])))
+        )
+
+    assert stub_server.request_encodings == ["gzip", None]
+
+
+def test_async_batch_http_provider_decodes_compressed_responses():
+    pytest.importorskip("aiohttp")
+    metrics = Metrics()
+    loop = asyncio.new_event_loop()
+
+    with StubRpcServer(read_resource, content_encoding="gzip") as stub_server:
+        provider = get_provider_from_uri(
+            "async_" + stub_server.uri, batch=True, metrics=metrics
+        )
+        text = json.dumps(list(generate_get_block_by_number_json_rpc(BLOCK_NUMBERS)))
+        try:
+            response = loop.run_until_complete(provider.make_batch_request(text))
+        finally:
+            loop.run_until_complete(provider.close())
+            loop.close()
+
+    assert [item["result"]["height"] for item in response] == BLOCK_NUMBERS
+    bytes_on_wire, bytes_decoded = get_compression_stats(metrics)
+    assert 0 < bytes_on_wire * 5 < bytes_decoded
@@ -0,0 +1,94 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import json
+
+import pytest
+from requests.exceptions import HTTPError
+
+import tests.resources
+from iconetl.json_rpc_requests import generate_get_block_by_number_json_rpc
+from iconetl.providers.auto import get_provider_from_uri
+from iconetl.providers.session import create_session
+from tests.iconetl.providers.stub_rpc_server import StubRpcServer
+
+BLOCK_REQUEST = json.dumps(list(generate_get_block_by_number_json_rpc([12640760])))
+
+
+def read_resource(file_name):
+    return tests.resources.read_resource(
+        ["test_export_blocks_job", "version_03_block"], file_name
+    )
+
+
+def make_requests(provider, count):
+    failures = 0
+    for _ in range(count):
+        try:
+            provider.make_batch_request(BLOCK_REQUEST)
+        except HTTPError:
+            failures += 1
+    return failures
+
+
+def test_load_balanced_provider_prefers_fast_endpoints():
+    # Far slower than jitter of the fast endpoint, e.g. opening its connection
+    with StubRpcServer(read_resource) as fast_server, StubRpcServer(
+        read_resource, response_delay=0.2
+    ) as slow_server:
+        provider = get_provider_from_uri(
+            fast_server.uri + "," + slow_server.uri,
+            batch=True,
+            session=create_session(),
+        )
+        assert make_requests(provider, 40) == 0
+
+    assert fast_server.request_count + slow_server.request_count == 40
+    assert fast_server.request_count > 3 * slow_server.request_count
+
+
+def test_load_balanced_provider_cools_down_failing_endpoints():
+    with StubRpcServer(
+        read_resource, response_delay=0.01
+    ) as healthy_server, StubRpcServer(
+        read_resource, status_code=503
+    ) as failing_server:
+        provider = get_provider_from_uri(
+            healthy_server.uri + "," + failing_server.uri,
+            batch=True,
+            session=create_session(),
+        )
+        failures = 0
+        while failures < provider.max_consecutive_errors and failures < 1000:
+            failures += make_requests(provider, 1)
+        healthy_request_count = healthy_server.request_count
+
+        # The failing endpoint is out of rotation for the cool-down period
+        assert make_requests(provider, 20) == 0
+
+    assert failing_server.request_count == provider.max_consecutive_errors
+    assert healthy_server.request_count == healthy_request_count + 20
+
+
+def test_load_balanced_provider_requires_batch():
+    with pytest.raises(ValueError):
+        get_provider_from_uri("http://localhost:1,http://localhost:2")
@@ -0,0 +1,228 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import asyncio
+import json
+
+import pytest
+from blockchainetl_common.executors.batch_work_executor import BatchWorkExecutor
+
+from iconetl.metrics import Metrics
+from iconetl.misc.retriable_value_error import RetriableValueError
+from iconetl.providers.salvaging import (
+    AsyncSalvagingBatchRequester,
+    SalvageError,
+    SalvagingBatchRequester,
+    get_salvage_stats,
+)
+
+
+class FakeBatchProvider(object):
+    def __init__(self, fail_request):
+        self.fail_request = fail_request
+        self.batches = []
+
+    def make_batch_request(self, text):
+        batch = json.loads(text)
+        self.batches.append([request["id"] for request in batch])
+        return [self.respond(request) for request in batch]
+
+    def respond(self, request):
+        if self.fail_request(request):
+            return {"jsonrpc": "2.0", "id": request["id"]}
+        return {"jsonrpc": "2.0", "id": request["id"], "result": request["params"]}
+
+
+def rpc_requests(count):
+    return [
+        {"jsonrpc": "2.0", "method": "icx_getBlockByHeight", "params": idx, "id": idx}
+        for idx in range(count)
+    ]
+
+
+def test_salvaging_batch_requester_retries_only_failed_items():
+    failures = {3: 2, 7: 1}
+
+    def fail_request(request):
+        if failures.get(request["id"], 0) > 0:
+            failures[request["id"]] -= 1
+            return True
+        return False
+
+    provider = FakeBatchProvider(fail_request)
+    metrics = Metrics()
+    requester = SalvagingBatchRequester(provider, metrics=metrics, sleep_seconds=0)
+
+    results = requester.request(rpc_requests(10))
+
+    assert results == list(range(10))
+    assert provider.batches == [list(range(10)), [3, 7], [3]]
+    assert get_salvage_stats(metrics) == (2, 3, 9, 0)
+
+
+class ShufflingBatchProvider(FakeBatchProvider):
+    def __init__(self, shuffle):
+        super().__init__(lambda request: False)
+        self.shuffle = shuffle
+
+    def make_batch_request(self, text):
+        response = super().make_batch_request(text)
+        return self.shuffle(response) if len(self.batches) == 1 else response
+
+
+def test_salvaging_batch_requester_reassembles_reordered_response():
+    provider = ShufflingBatchProvider(lambda response: list(reversed(response)))
+    requester = SalvagingBatchRequester(provider, sleep_seconds=0)
+
+    results = requester.request(rpc_requests(5))
+
+    assert results == list(range(5))
+    assert provider.batches == [list(range(5))]
+
+
+def test_salvaging_batch_requester_retries_missing_ids():
+    provider = ShufflingBatchProvider(lambda response: response[1:3])
+    requester = SalvagingBatchRequester(provider, sleep_seconds=0)
+
+    results = requester.request(rpc_requests(4))
+
+    assert results == list(range(4))
+    assert provider.batches == [[0, 1, 2, 3], [0, 3]]
+
+
+def test_salvaging_batch_requester_rejects_duplicate_ids():
+    provider = ShufflingBatchProvider(lambda response: response + response[:1])
+    requester = SalvagingBatchRequester(provider, sleep_seconds=0)
+
+    results = requester.request(rpc_requests(4))
+
+    assert results == list(range(4))
+    # The corrupted response is discarded and the whole batch retried
+    assert provider.batches == [[0, 1, 2, 3], [0, 1, 2, 3]]
+
+
+class PoisonedBatchProvider(FakeBatchProvider):
+    def __init__(self, poisoned_id, failures=None):
+        super().__init__(lambda request: False)
+        self.poisoned_id = poisoned_id
+        self.failures = failures
+
+    def make_batch_request(self, text):
+        if any(request["id"] == self.poisoned_id for request in json.loads(text)):
+            if self.failures is None or self.failures > 0:
+                if self.failures is not None:
+                    self.failures -= 1
+                self.batches.append(None)
+                raise ConnectionError("Connection reset")
+        return super().make_batch_request(text)
+
+
+def test_salvaging_batch_requester_retries_whole_batch_before_bisecting():
+    provider = PoisonedBatchProvider(5, failures=1)
+    metrics = Metrics()
+    batch_errors = []
+    requester = SalvagingBatchRequester(
+        provider, metrics=metrics, sleep_seconds=0, on_batch_error=batch_errors.append
+    )
+
+    results = requester.request(rpc_requests(8))
+
+    assert results == list(range(8))
+    assert provider.batches == [None, list(range(8))]
+    assert get_salvage_stats(metrics) == (1, 8, 0, 0)
+    assert batch_errors == [8]
+
+
+def test_salvaging_batch_requester_bisects_to_isolate_failing_request():
+    provider = PoisonedBatchProvider(5)
+    metrics = Metrics()
+    batch_errors = []
+    requester = SalvagingBatchRequester(
+        provider,
+        metrics=metrics,
+        max_retries=3,
+        sleep_seconds=0,
+        on_batch_error=batch_errors.append,
+    )
+
+    with pytest.raises(SalvageError) as exc_info:
+        requester.request(rpc_requests(8))
+
+    assert isinstance(exc_info.value.__cause__, ConnectionError)
+    succeeded = sorted(id for batch in provider.batches if batch for id in batch)
+    assert succeeded == [0, 1, 2, 3, 4]
+    # The whole batch twice, 8 -> 4 -> 2 -> 1 bisections, then the failing
+    # request alone
+    assert provider.batches.count(None) == 2 + 2 + 3
+    assert get_salvage_stats(metrics)[3] == 3
+    assert batch_errors == [8, 8, 4, 2, 1, 1, 1]
+
+
+def test_salvaging_batch_requester_gives_up_after_max_retries():
+    provider = FakeBatchProvider(lambda request: request["id"] == 1)
+    requester = SalvagingBatchRequester(provider, max_retries=2, sleep_seconds=0)
+
+    with pytest.raises(SalvageError) as exc_info:
+        requester.request(rpc_requests(3))
+
+    assert isinstance(exc_info.value.__cause__, RetriableValueError)
+    assert provider.batches == [[0, 1, 2], [1]]
+
+
+def test_batch_work_executor_does_not_retry_salvaged_batches():
+    provider = PoisonedBatchProvider(5)
+    requester = SalvagingBatchRequester(provider, max_retries=2, sleep_seconds=0)
+    executor = BatchWorkExecutor(8, 1)
+
+    with pytest.raises(SalvageError):
+        executor.execute(
+            range(8),
+            lambda batch: requester.request(
+                [rpc_requests(8)[index] for index in batch]
+            ),
+        )
+        executor.shutdown()
+
+    # Only the retries of the requester, none of the executor
+    assert provider.batches.count(None) == 2 + 1 + 1 + 2
+
+
+def test_async_salvaging_batch_requester_retries_only_failed_items():
+    failures = {0: 1}
+
+    class AsyncFakeBatchProvider(FakeBatchProvider):
+        async def make_batch_request(self, text):
+            return super().make_batch_request(text)
+
+    provider = AsyncFakeBatchProvider(
+        lambda request: failures.pop(request["id"], 0) > 0
+    )
+    requester = AsyncSalvagingBatchRequester(provider, sleep_seconds=0)
+
+    loop = asyncio.new_event_loop()
+    try:
+        results = loop.run_until_complete(requester.request(rpc_requests(4)))
+    finally:
+        loop.close()
+
+    assert results == list(range(4))
+    assert provider.batches == [[0, 1, 2, 3], [0]]
@@ -0,0 +1,210 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from iconetl.metrics import Metrics
+from iconetl.streaming.icx_streamer import IcxStreamer, SyncMode
+from tests.iconetl.streaming.test_icx_streamer import RecordingStreamerAdapter
+
+websockets = pytest.importorskip("websockets")
+
+from iconetl.streaming.block_notifications import (  # noqa: E402
+    BlockNotificationListener,
+)
+
+
+class StubBlockNotificationServer(object):
+    """Local websocket server notifying synthetic block heights from the requested
+    height on. Connections are dropped after heights_per_connection notifications,
+    subscriptions are rejected with error_code."""
+
+    def __init__(self, heights_per_connection=None, error_code=0, interval=0.01):
+        self.heights_per_connection = heights_per_connection
+        self.error_code = error_code
+        self.interval = interval
+        self.requested_heights = []
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    @property
+    def uri(self):
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return "ws://{host}:{port}/api/v3/icon_dex/block".format(host=host, port=port)
+
+    def __enter__(self):
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            self._serve(), self._loop
+        ).result()
+        return self
+
+    def __exit__(self, *args):
+        async def close():
+            self._server.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _serve(self):
+        # Servers of websockets 14.0+ are created on a running event loop
+        return await websockets.serve(self._handle, "127.0.0.1", 0)
+
+    async def _handle(self, websocket, path=None):
+        request = json.loads(await websocket.recv())
+        height = int(request["height"], 16)
+        self.requested_heights.append(height)
+        if self.error_code != 0:
+            await websocket.send(
+                json.dumps({"code": self.error_code, "message": "rejected"})
+            )
+            return
+        await websocket.send(json.dumps({"code": 0}))
+        count = 0
+        while (
+            self.heights_per_connection is None or count < self.heights_per_connection
+        ):
+            await asyncio.sleep(self.interval)
+            await websocket.send(
+                json.dumps({"hash": "0x{:064x}".format(height), "height": hex(height)})
+            )
+            height += 1
+            count += 1
+
+
+# The chain head only moves on every other poll, so that some cycles find nothing
+# to sync
+class SlowChainStreamerAdapter(RecordingStreamerAdapter):
+    def __init__(self, current_block):
+        super().__init__(current_block)
+        self.polls = 0
+
+    def get_current_block_number(self):
+        self.polls += 1
+        if self.polls % 2 == 0:
+            self.current_block += 1
+        return self.current_block
+
+
+def create_streamer(tmpdir, adapter, listener, end_block, metrics):
+    return IcxStreamer(
+        blockchain_streamer_adapter=adapter,
+        tail_mode=SyncMode("tail", 2, 10, 1),
+        block_notifications=listener,
+        metrics=metrics,
+        last_synced_block_file=str(tmpdir.join("last_synced_block.txt")),
+        start_block=100,
+        end_block=end_block,
+        period_seconds=0.05,
+        retry_errors=False,
+    )
+
+
+def wait_until_connected(listener, timeout=5):
+    deadline = time.time() + timeout
+    while not listener.is_connected():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_listener_tracks_notified_heights():
+    with StubBlockNotificationServer() as server:
+        listener = BlockNotificationListener(server.uri)
+        listener.start(50)
+        try:
+            wait_until_connected(listener)
+            assert listener.wait_for_height(55, timeout=5)
+            assert listener.is_connected()
+            assert listener.get_latest_height() >= 55
+        finally:
+            listener.stop()
+    assert server.requested_heights == [50]
+
+
+def test_listener_reconnects_from_next_height():
+    with StubBlockNotificationServer(heights_per_connection=2) as server:
+        listener = BlockNotificationListener(server.uri, reconnect_seconds=0.05)
+        listener.start(50)
+        try:
+            wait_until_connected(listener)
+            while listener.get_latest_height() < 53:
+                listener.wait_for_height(53, timeout=5)
+                wait_until_connected(listener)
+        finally:
+            listener.stop()
+    assert server.requested_heights[:2] == [50, 52]
+
+
+def test_streamer_syncs_notified_blocks(tmpdir):
+    adapter = RecordingStreamerAdapter(current_block=100)
+    metrics = Metrics()
+    with StubBlockNotificationServer() as server:
+        listener = BlockNotificationListener(server.uri, metrics=metrics)
+        create_streamer(tmpdir, adapter, listener, 110, metrics).stream()
+
+    # The polled head never moves, later blocks are only known from notifications
+    assert adapter.ranges[0] == (100, 100)
+    assert adapter.ranges[-1][1] == 110
+    assert server.requested_heights == [101]
+    assert metrics.get("block_notifications") > 0
+    assert not listener.is_started()
+
+
+def test_streamer_polls_when_subscription_fails(tmpdir):
+    adapter = SlowChainStreamerAdapter(current_block=100)
+    metrics = Metrics()
+    with StubBlockNotificationServer(error_code=-32000) as server:
+        listener = BlockNotificationListener(
+            server.uri, reconnect_seconds=60, metrics=metrics
+        )
+        start_time = time.time()
+        create_streamer(tmpdir, adapter, listener, 104, metrics).stream()
+
+    assert [end for _, end in adapter.ranges] == [100, 101, 102, 103, 104]
+    assert metrics.get("block_notifications") == 0
+    assert metrics.get("stream_polls") == adapter.polls
+    assert time.time() - start_time < 30
+
+
+def test_listener_raises_errors_reconnecting_cannot_fix(monkeypatch):
+    async def connect(uri):
+        # As websockets releases before 10.0 fail on Python 3.10+
+        raise TypeError("__init__() got an unexpected keyword argument 'loop'")
+
+    monkeypatch.setattr(websockets, "connect", connect)
+    listener = BlockNotificationListener("ws://127.0.0.1:1/api/v3/icon_dex/block")
+    listener.start(50)
+    listener._thread.join(5)
+
+    with pytest.raises(RuntimeError) as exc_info:
+        listener.is_connected()
+    assert isinstance(exc_info.value.__cause__, TypeError)
+    listener.stop()
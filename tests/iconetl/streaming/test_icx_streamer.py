@@ -0,0 +1,132 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import logging
+
+import pytest
+
+from iconetl.metrics import Metrics
+from iconetl.streaming.icx_streamer import IcxStreamer, SyncMode
+
+
+class RecordingStreamerAdapter(object):
+    def __init__(self, current_block):
+        self.current_block = current_block
+        self.ranges = []
+        self.configurations = []
+
+    def open(self):
+        pass
+
+    def get_current_block_number(self):
+        return self.current_block
+
+    def configure(self, batch_size, max_workers):
+        self.configurations.append((batch_size, max_workers))
+
+    def export_all(self, start_block, end_block):
+        self.ranges.append((start_block, end_block))
+
+    def close(self):
+        pass
+
+
+def create_streamer(tmpdir, adapter, start_block, end_block, metrics):
+    return IcxStreamer(
+        blockchain_streamer_adapter=adapter,
+        tail_mode=SyncMode("tail", 2, 10, 1),
+        catch_up_mode=SyncMode("catch_up", 50, 100, 8),
+        catch_up_threshold=20,
+        metrics=metrics,
+        last_synced_block_file=str(tmpdir.join("last_synced_block.txt")),
+        start_block=start_block,
+        end_block=end_block,
+        retry_errors=False,
+    )
+
+
+def test_streamer_catches_up_then_tails(tmpdir):
+    adapter = RecordingStreamerAdapter(current_block=200)
+    metrics = Metrics()
+    streamer = create_streamer(tmpdir, adapter, 100, 200, metrics)
+    streamer.stream()
+
+    assert adapter.ranges == [(100, 149), (150, 199), (200, 200)]
+    assert adapter.configurations == [(100, 8), (10, 1)]
+    assert metrics.get("stream_mode") == "tail"
+    assert metrics.get("stream_lag_blocks") == 0
+
+
+def test_streamer_tails_when_close_to_head(tmpdir):
+    adapter = RecordingStreamerAdapter(current_block=110)
+    metrics = Metrics()
+    streamer = create_streamer(tmpdir, adapter, 100, 103, metrics)
+    streamer.stream()
+
+    assert adapter.ranges == [(100, 101), (102, 103)]
+    assert adapter.configurations == [(10, 1)]
+    assert metrics.get("stream_lag_blocks") == 7
+
+
+def test_streamer_logs_stream_metrics_every_cycle(tmpdir, caplog):
+    adapter = RecordingStreamerAdapter(current_block=110)
+    metrics = Metrics()
+    streamer = create_streamer(tmpdir, adapter, 100, 103, metrics)
+    with caplog.at_level(logging.INFO, logger="IcxStreamer"):
+        streamer.stream()
+
+    stats = [
+        record.getMessage()
+        for record in caplog.records
+        if record.getMessage().startswith("Stream mode")
+    ]
+    assert len(stats) == 2
+    assert stats[-1].startswith(
+        "Stream mode: tail, lag: 7 blocks, mode switches: 1, head latency: None "
+        "seconds, polls: 2,"
+    )
+
+
+def test_catch_up_threshold_below_tail_block_batch_size_is_rejected(tmpdir):
+    with pytest.raises(ValueError):
+        IcxStreamer(
+            blockchain_streamer_adapter=RecordingStreamerAdapter(0),
+            tail_mode=SyncMode("tail", 10, 10, 1),
+            catch_up_mode=SyncMode("catch_up", 50, 100, 8),
+            catch_up_threshold=5,
+            last_synced_block_file=str(tmpdir.join("last_synced_block.txt")),
+        )
+
+
+def test_streamer_leaves_room_for_confirmations(tmpdir):
+    adapter = RecordingStreamerAdapter(current_block=105)
+    streamer = IcxStreamer(
+        blockchain_streamer_adapter=adapter,
+        tail_mode=SyncMode("tail", 10, 10, 1),
+        confirmations=2,
+        last_synced_block_file=str(tmpdir.join("last_synced_block.txt")),
+        start_block=100,
+    )
+    assert streamer._sync_cycle() == 4
+    assert streamer._sync_cycle() == 0
+
+    assert adapter.ranges == [(100, 103)]
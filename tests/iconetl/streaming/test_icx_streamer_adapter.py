@@ -0,0 +1,198 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import json
+
+import pytest
+from blockchainetl_common.streaming.streamer import Streamer
+
+import tests.resources
+from iconetl.jobs.exporters.in_memory_item_exporter import InMemoryItemExporter
+from iconetl.providers.auto import get_provider_from_uri
+from iconetl.streaming.block_range_csv_item_exporter import BlockRangeCsvItemExporter
+from iconetl.streaming.icx_streamer_adapter import IcxStreamerAdapter
+from tests.iconetl.providers.stub_rpc_server import StubRpcServer
+
+LAST_BLOCK_HEIGHT = 14473625
+
+
+def read_json_resource(groups, file_name):
+    return json.loads(tests.resources.read_resource(groups, file_name))
+
+
+# Answers with one block template for every height, with unique block and
+# transaction hashes, and one receipt template for every transaction. Blocks from
+# fork_height on are on another fork once switch_fork is called.
+class ChainRpcServer(StubRpcServer):
+    fork_height = None
+    fork = 0
+
+    def switch_fork(self, fork_height):
+        self.fork_height = fork_height
+        self.fork += 1
+
+    def block_hash(self, height):
+        fork = (
+            self.fork
+            if self.fork_height is not None and height >= self.fork_height
+            else 0
+        )
+        return "{:032x}{:032x}".format(fork, height)
+
+    def handle_request(self, request):
+        if request["method"] == "icx_getLastBlock":
+            response = {"jsonrpc": "2.0", "result": {"height": LAST_BLOCK_HEIGHT}}
+        elif request["method"] == "icx_getBlockByHeight":
+            response = read_json_resource(
+                ["test_export_blocks_job", "version_04_block"],
+                "web3_response.icx_getBlockByHeight_0xdcd995.json",
+            )
+            height = int(request["params"]["height"], 16)
+            response["result"]["height"] = height
+            response["result"]["block_hash"] = self.block_hash(height)
+            response["result"]["prev_block_hash"] = self.block_hash(height - 1)
+            for index, transaction in enumerate(
+                response["result"]["confirmed_transaction_list"]
+            ):
+                transaction["txHash"] = "0x{}{:08x}".format(
+                    self.block_hash(height)[8:], index
+                )
+        else:
+            response = read_json_resource(
+                ["test_export_receipts_job", "receipts_with_logs"],
+                "web3_response.icx_getTransactionResult_0x3680f3262fed98a4bc169c11b"
+                "6ac66778da43c889d47a673d252362138715da9.json",
+            )
+            response["result"]["txHash"] = request["params"]["txHash"]
+        response["id"] = request["id"]
+        return response
+
+
+def test_icx_streamer_adapter_exports_items_in_block_order():
+    item_exporter = InMemoryItemExporter(
+        item_types=["block", "transaction", "receipt", "log"]
+    )
+    with ChainRpcServer(None) as server:
+        adapter = IcxStreamerAdapter(
+            get_provider_from_uri(server.uri, batch=True),
+            item_exporter=item_exporter,
+            batch_size=2,
+        )
+        adapter.open()
+        assert adapter.get_current_block_number() == LAST_BLOCK_HEIGHT
+        adapter.export_all(100, 104)
+        adapter.close()
+
+    blocks = item_exporter.get_items("block")
+    transactions = item_exporter.get_items("transaction")
+    assert [block["number"] for block in blocks] == [100, 101, 102, 103, 104]
+    assert "transactions" not in blocks[0]
+    assert len(transactions) > 0
+    assert [t["block_number"] for t in transactions] == sorted(
+        t["block_number"] for t in transactions
+    )
+    assert len(item_exporter.get_items("receipt")) == len(transactions)
+
+
+def create_adapter(server, **kwargs):
+    item_exporter = InMemoryItemExporter(
+        item_types=["block", "transaction", "receipt", "log"]
+    )
+    adapter = IcxStreamerAdapter(
+        get_provider_from_uri(server.uri, batch=True),
+        item_exporter=item_exporter,
+        **kwargs
+    )
+    adapter.open()
+    return adapter, item_exporter
+
+
+def test_icx_streamer_adapter_exports_reorged_blocks_again():
+    with ChainRpcServer(None) as server:
+        adapter, item_exporter = create_adapter(server)
+        adapter.export_all(100, 104)
+        server.switch_fork(103)
+        adapter.export_all(105, 106)
+
+    blocks = item_exporter.get_items("block")
+    assert [block["number"] for block in blocks] == list(range(100, 105)) + [
+        103,
+        104,
+        105,
+        106,
+    ]
+    assert blocks[-3]["parent_hash"] == blocks[-4]["hash"] != blocks[3]["hash"]
+    receipts = item_exporter.get_items("receipt")
+    assert len(receipts) == len(item_exporter.get_items("transaction"))
+    assert adapter.block_hashes.get(104) == server.block_hash(104)
+
+
+def test_icx_streamer_adapter_exports_confirmed_blocks():
+    with ChainRpcServer(None) as server:
+        adapter, item_exporter = create_adapter(server, confirmations=2)
+        adapter.export_all(100, 102)
+
+    blocks = item_exporter.get_items("block")
+    assert [block["number"] for block in blocks] == [100, 101, 102]
+    assert {t["block_number"] for t in item_exporter.get_items("transaction")} == {
+        100,
+        101,
+        102,
+    }
+    assert len(adapter.block_hashes) == 3
+
+
+def test_icx_streamer_adapter_fails_on_reorg_deeper_than_buffer():
+    with ChainRpcServer(None) as server:
+        adapter, item_exporter = create_adapter(server, reorg_buffer_size=3)
+        adapter.export_all(100, 104)
+        server.switch_fork(101)
+        with pytest.raises(ValueError, match="deeper"):
+            adapter.export_all(105, 105)
+
+
+def test_streamer_writes_csv_files_per_block_range(tmpdir):
+    last_synced_block_file = str(tmpdir.join("last_synced_block.txt"))
+    output_dir = tmpdir.join("output")
+    with ChainRpcServer(None) as server:
+        streamer = Streamer(
+            blockchain_streamer_adapter=IcxStreamerAdapter(
+                get_provider_from_uri(server.uri, batch=True),
+                item_exporter=BlockRangeCsvItemExporter(str(output_dir)),
+            ),
+            last_synced_block_file=last_synced_block_file,
+            lag=2,
+            start_block=LAST_BLOCK_HEIGHT - 6,
+            block_batch_size=2,
+            end_block=LAST_BLOCK_HEIGHT - 2,
+            retry_errors=False,
+        )
+        streamer.stream()
+
+    with open(last_synced_block_file) as f:
+        assert int(f.read()) == LAST_BLOCK_HEIGHT - 2
+    assert [f.basename for f in output_dir.join("blocks").listdir(sort=True)] == [
+        "blocks_14473619_14473620.csv",
+        "blocks_14473621_14473622.csv",
+        "blocks_14473623_14473623.csv",
+    ]
+    assert len(output_dir.join("logs").listdir()) == 3
@@ -0,0 +1,52 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import os
+
+import pytest
+
+from iconetl.file_utils import atomic_output_files
+
+
+def test_atomic_output_files_renames_files_when_complete(tmpdir):
+    file_name = str(tmpdir.join("blocks.csv"))
+
+    with atomic_output_files(file_name) as (temporary_file_name,):
+        with open(temporary_file_name, "w") as f:
+            f.write("number\n")
+        assert not os.path.exists(file_name)
+
+    assert tmpdir.listdir() == [tmpdir.join("blocks.csv")]
+    with open(file_name) as f:
+        assert f.read() == "number\n"
+
+
+def test_atomic_output_files_removes_files_on_errors(tmpdir):
+    file_name = str(tmpdir.join("blocks.csv"))
+
+    with pytest.raises(ValueError):
+        with atomic_output_files(file_name) as (temporary_file_name,):
+            with open(temporary_file_name, "w") as f:
+                f.write("number\n")
+            raise ValueError("Export failed")
+
+    assert tmpdir.listdir() == []
@@ -0,0 +1,93 @@
+#  MIT License
+#
+#  Copyright (c) 2020 Richard Mah (richard@richardmah.com) & Insight Infrastructure
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of
+#  this software and associated documentation files (the "Software"), to deal in
+#  the Software without restriction, including without limitation the rights to
+#  use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of
+#  the Software, and to permit persons to whom the Software is furnished to do so,
+#  subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#  IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS
+#  FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+#  COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER
+#  IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+#  CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+
+import json
+
+import pytest
+from blockchainetl_common.exporters import JsonLinesItemExporter
+
+from iconetl import json_codec
+from iconetl.jobs.exporters.receipts_and_logs_item_exporter import (
+    RECEIPT_FIELDS_TO_EXPORT,
+    receipts_and_logs_item_exporter,
+)
+from iconetl.mappers.row_mapper import ReceiptRow
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        [{"jsonrpc": "2.0", "result": {"height": 12640760}, "id": 0}],
+        {"value": 2**70, "negative": -(2**64), "fee": 12500000000000000},
+        {"data": "é ☃", "list": [1.5, None, True]},
+    ],
+)
+def test_json_codec_round_trip(obj):
+    assert json_codec.loads(json_codec.dumps_bytes(obj)) == obj
+    assert json_codec.loads(json_codec.dumps(obj)) == obj
+    assert json.loads(json_codec.dumps(obj)) == obj
+
+
+def test_json_codec_keeps_big_integers_exact():
+    assert json_codec.loads(b'{"value": 123456789012345678901234567890}') == {
+        "value": 123456789012345678901234567890
+    }
+
+
+def test_json_lines_exporter_writes_like_baseline_exporter(tmpdir):
+    receipt = {
+        "type": "receipt",
+        "transaction_hash": "0x01",
+        "transaction_index": 0,
+        "block_hash": "0x02",
+        "block_number": 1,
+        "cumulative_step_used": 2,
+        "step_used": 2,
+        "step_price": 12500000000,
+        "score_address": "cx01",
+        "status": 1,
+    }
+    receipts = [
+        dict(receipt, step_used=2**70),
+        dict(receipt, score_address="cx\u00e9 \u2603"),
+    ]
+    receipts_file = str(tmpdir.join("receipts.json"))
+    exporter = receipts_and_logs_item_exporter(receipts_file, None)
+    exporter.open()
+    for item in receipts:
+        exporter.export_item(item)
+        exporter.export_item(
+            ReceiptRow([item[field] for field in RECEIPT_FIELDS_TO_EXPORT])
+        )
+    exporter.close()
+
+    baseline_file = tmpdir.join("baseline.json")
+    with open(str(baseline_file), "wb") as f:
+        baseline_exporter = JsonLinesItemExporter(
+            f, fields_to_export=RECEIPT_FIELDS_TO_EXPORT
+        )
+        for item in receipts:
+            baseline_exporter.export_item(item)
+            baseline_exporter.export_item(item)
+
+    with open(receipts_file, "rb") as f:
+        assert f.read() == baseline_file.read_binary()